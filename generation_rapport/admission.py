@@ -0,0 +1,339 @@
+"""
+ADMISSION CONTROL MODULE - Cedric's Meeting Report Generator
+Memory-aware admission of Whisper jobs and load-adaptive model selection
+
+Clients may ask for any Whisper size, and a few concurrent medium/large jobs
+on a CPU node exhaust its RAM. Every transcription job goes through an
+AdmissionController first:
+- Memory is accounted as: process baseline + resident models (measured when
+  they were loaded) + the model copies of the multi-track worker pools, which
+  stay loaded between requests + models about to be loaded + per-job working
+  sets (model activations and the decoded audio); the real RSS is used when
+  higher (it does not include the worker processes)
+- A job is admitted when it fits in the RSS budget
+- Under memory pressure, or when the predicted wait for the requested model
+  (jobs queued on it x their audio length x its measured real-time factor)
+  is too long, a smaller model is used instead, down to WHISPER_MIN_MODEL
+- Otherwise the job waits for memory to be released, up to a timeout
+- Optional work (background transcription of uploads still arriving, live
+  windows) uses try_admit(): it never waits, and is deferred when it does
+  not fit or other jobs are already waiting
+
+The model actually used is reported back so that responses can say so.
+
+Only uses the standard library.
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+
+import model_registry
+import process_stats
+import track_transcription
+
+
+# Whisper sizes, smallest first (downgrades walk this list backwards)
+MODEL_LADDER = ("tiny", "base", "small", "medium", "large")
+
+# Approximate resident size of the weights (fp32, CPU) and working set of one
+# transcription, in MB; measured load sizes replace the first when known
+MODEL_MEMORY_MB = {"tiny": 150, "base": 290, "small": 930, "medium": 2900, "large": 6000}
+JOB_MEMORY_MB = {"tiny": 150, "base": 250, "small": 450, "medium": 900, "large": 1500}
+# Decoded audio plus Whisper's padded copies / mel spectrogram, MB per audio second
+AUDIO_MEMORY_MB_PER_SECOND = 0.2
+# Processing seconds per audio second on CPU until measured (model_registry.record_inference)
+DEFAULT_REAL_TIME_FACTOR = {"tiny": 0.05, "base": 0.1, "small": 0.3, "medium": 0.9, "large": 1.8}
+# Assumed length of jobs whose audio length is unknown (seconds)
+DEFAULT_AUDIO_SECONDS = 600.0
+
+RSS_BUDGET_MB = float(os.getenv("WHISPER_RSS_BUDGET_MB", "0"))  # 0 = 85% of the memory limit
+MIN_MODEL = os.getenv("WHISPER_MIN_MODEL", "base")
+AUTO_DOWNGRADE = os.getenv("WHISPER_AUTO_DOWNGRADE", "1") != "0"
+MAX_QUEUE_SECONDS = float(os.getenv("WHISPER_MAX_QUEUE_SECONDS", "120"))
+ADMISSION_TIMEOUT_SECONDS = float(os.getenv("WHISPER_ADMISSION_TIMEOUT_SECONDS", "600"))
+
+
+class AdmissionTimeout(Exception):
+    """Raised when a job could not be admitted before the timeout"""
+
+
+def model_family(model_size):
+    """'large-v3' -> 'large', 'small.en' -> 'small'; None for sizes off the ladder"""
+    family = model_size.split(".")[0].split("-")[0]
+    return family if family in MODEL_LADDER else None
+
+
+def real_time_factor(model_size):
+    """Processing seconds per audio second of a model: measured, else the default of its size"""
+    return (model_registry.real_time_factor(model_size)
+            or DEFAULT_REAL_TIME_FACTOR.get(model_family(model_size), 1.0))
+
+
+class Job:
+    """One admitted transcription job"""
+
+    def __init__(self, job_id, requested_model, model_size, memory_mb, loads_model,
+                 audio_seconds, queued_seconds, reason, copies=1):
+        self.job_id = job_id
+        self.requested_model = requested_model
+        self.model_size = model_size
+        self.memory_mb = memory_mb
+        self.loads_model = loads_model
+        self.audio_seconds = audio_seconds
+        self.queued_seconds = queued_seconds
+        self.reason = reason
+        self.copies = copies
+        self.started = time.monotonic()
+
+    @property
+    def downgraded(self):
+        return self.model_size != self.requested_model
+
+    def headers(self):
+        """Response headers reporting the model actually used"""
+        headers = {"X-Whisper-Model": self.model_size}
+        if self.downgraded:
+            headers["X-Whisper-Model-Requested"] = self.requested_model
+        return headers
+
+
+class AdmissionController:
+    """
+    Admits Whisper jobs against an RSS budget (see module docstring)
+
+    Use from the event loop:
+        async with controller.admit("medium", audio_seconds=1800) as job:
+            ... transcribe with job.model_size ...
+    """
+
+    def __init__(self, budget_mb=RSS_BUDGET_MB, min_model=MIN_MODEL, auto_downgrade=AUTO_DOWNGRADE,
+                 max_queue_seconds=MAX_QUEUE_SECONDS, timeout=ADMISSION_TIMEOUT_SECONDS):
+        self.budget_mb = budget_mb or 0.85 * process_stats.memory_limit_bytes() / 2**20
+        self.min_model = min_model
+        self.auto_downgrade = auto_downgrade
+        self.max_queue_seconds = max_queue_seconds
+        self.timeout = timeout
+        # Memory of the process before any model is loaded
+        self.baseline_mb = process_stats.rss_bytes() / 2**20
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._changed = None  # asyncio.Condition, created in the running loop
+        self._waiting = 0
+        self.counters = {'admitted': 0, 'downgraded': 0, 'queued': 0, 'timed_out': 0, 'deferred': 0}
+
+    # ------------------------------------------------------------------
+    # Accounting
+    # ------------------------------------------------------------------
+    def _model_mb(self, model_size, resident):
+        measured = resident.get(model_size)
+        if measured:
+            return measured
+        return MODEL_MEMORY_MB.get(model_family(model_size), MODEL_MEMORY_MB["medium"])
+
+    def _loading(self, resident):
+        """Models that admitted jobs are loading in process (counted once, like resident ones)"""
+        return {
+            job.model_size for job in self._jobs.values() if job.loads_model and job.copies == 1
+        } - set(resident)
+
+    def _starting_pools(self, pools):
+        """{model_size: copies} of the track worker pools admitted jobs are starting"""
+        starting = {}
+        for job in self._jobs.values():
+            if job.loads_model and job.copies > 1 and job.model_size not in pools:
+                starting[job.model_size] = max(job.copies, starting.get(job.model_size, 0))
+        return starting
+
+    def committed_mb(self):
+        resident = model_registry.resident_models()
+        loading = self._loading(resident)
+        pools = track_transcription.resident_pools()
+        pools.update(self._starting_pools(pools))
+        accounted = (
+            self.baseline_mb
+            + sum(self._model_mb(size, resident) for size in resident)
+            + sum(self._model_mb(size, resident) for size in loading)
+            + sum(copies * self._model_mb(size, resident) for size, copies in pools.items())
+            + sum(job.memory_mb for job in self._jobs.values())
+        )
+        return max(accounted, process_stats.rss_bytes() / 2**20)
+
+    def _job_mb(self, model_size, audio_seconds):
+        family = model_family(model_size) or "medium"
+        return JOB_MEMORY_MB[family] + AUDIO_MEMORY_MB_PER_SECOND * (audio_seconds or DEFAULT_AUDIO_SECONDS)
+
+    def estimated_wait(self, model_size):
+        """Seconds until the jobs already admitted on this model are transcribed"""
+        now = time.monotonic()
+        rtf = real_time_factor(model_size)
+        return sum(
+            max(0.0, (job.audio_seconds or DEFAULT_AUDIO_SECONDS) * rtf - (now - job.started))
+            for job in self._jobs.values()
+            if job.model_size == model_size
+        )
+
+    def _candidates(self, requested_model, allow_downgrade):
+        """The requested model, then the smaller sizes allowed as fallbacks"""
+        family = model_family(requested_model)
+        if not (allow_downgrade and self.auto_downgrade) or family is None:
+            return [requested_model]
+        floor = MODEL_LADDER.index(model_family(self.min_model) or "tiny")
+        smaller = MODEL_LADDER[floor:MODEL_LADDER.index(family)]
+        return [requested_model] + list(reversed(smaller))
+
+    def _plan(self, requested_model, audio_seconds, copies, allow_downgrade):
+        """
+        Pick the model to run, or None to wait
+
+        Returns:
+            tuple: (model_size, memory_mb, loads_model, reason) or None
+        """
+        resident = model_registry.resident_models()
+        available = set(resident) | self._loading(resident)
+        if copies > 1:
+            # Track jobs run on the worker pool of their size, loaded or not
+            pools = track_transcription.resident_pools()
+            available = set(pools) | set(self._starting_pools(pools))
+        committed = self.committed_mb()
+        fitting = []
+        for model_size in self._candidates(requested_model, allow_downgrade):
+            loads_model = model_size not in available
+            memory_mb = copies * self._job_mb(model_size, audio_seconds)
+            cost = memory_mb + (copies * self._model_mb(model_size, resident) if loads_model else 0)
+            if committed + cost <= self.budget_mb:
+                fitting.append((model_size, memory_mb, loads_model))
+
+        if fitting:
+            # Memory forced the downgrade unless the requested model fitted
+            pressure = "queue" if fitting[0][0] == requested_model else "memory"
+            for model_size, memory_mb, loads_model in fitting:
+                if self.estimated_wait(model_size) <= self.max_queue_seconds:
+                    return model_size, memory_mb, loads_model, None if model_size == requested_model else pressure
+            model_size, memory_mb, loads_model = fitting[0]
+            return model_size, memory_mb, loads_model, None if model_size == requested_model else "memory"
+
+        if not self._jobs:
+            # Nothing to wait for: run the smallest allowed model anyway
+            model_size = self._candidates(requested_model, allow_downgrade)[-1]
+            memory_mb = copies * self._job_mb(model_size, audio_seconds)
+            return model_size, memory_mb, True, None if model_size == requested_model else "memory"
+        return None
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def select_model(self, requested_model, audio_seconds=None):
+        """
+        Model a job would run with right now, without reserving anything
+        (used to pick the model of long-lived sessions up front)
+        """
+        plan = self._plan(requested_model, audio_seconds, 1, True)
+        return plan[0] if plan else self._candidates(requested_model, True)[-1]
+
+    @asynccontextmanager
+    async def admit(self, requested_model, audio_seconds=None, copies=1, allow_downgrade=True):
+        """
+        Wait until a job fits and reserve its memory for the duration of the block
+
+        Args:
+            requested_model: Whisper size asked for by the client
+            audio_seconds: Length of the audio if known (memory and queue estimates)
+            copies: Model copies the job loads (worker processes of track jobs)
+            allow_downgrade: False to keep the requested model (e.g. to finish a
+                             transcript started with it)
+
+        Yields:
+            Job: job.model_size is the model to use
+        """
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        async with self._changed:
+            plan = self._plan(requested_model, audio_seconds, copies, allow_downgrade)
+            if plan is None:
+                self.counters['queued'] += 1
+                self._waiting += 1
+                try:
+                    while plan is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.counters['timed_out'] += 1
+                            raise AdmissionTimeout(
+                                f"No memory for a Whisper job within {self.timeout:.0f} s"
+                            )
+                        try:
+                            await asyncio.wait_for(self._changed.wait(), timeout=min(remaining, 5.0))
+                        except asyncio.TimeoutError:
+                            pass  # re-check: RSS may have dropped without a release
+                        plan = self._plan(requested_model, audio_seconds, copies, allow_downgrade)
+                finally:
+                    self._waiting -= 1
+
+            job = self._reserve(requested_model, audio_seconds, plan, started, copies)
+
+        try:
+            yield job
+        finally:
+            await self._release(job)
+
+    @asynccontextmanager
+    async def try_admit(self, model_size, audio_seconds=None):
+        """
+        Reserve memory for a job on `model_size` only if it fits right now
+
+        For work that can be skipped and done later (the next upload chunk,
+        or finalize, catches up): never waits, never downgrades, and gives
+        way to jobs already waiting in admit().
+
+        Yields:
+            Job or None: None when the job was deferred
+        """
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+
+        started = time.monotonic()
+        async with self._changed:
+            plan = None if self._waiting else self._plan(model_size, audio_seconds, 1, False)
+            if plan is None:
+                self.counters['deferred'] += 1
+            else:
+                job = self._reserve(model_size, audio_seconds, plan, started)
+
+        if plan is None:
+            yield None
+            return
+        try:
+            yield job
+        finally:
+            await self._release(job)
+
+    def _reserve(self, requested_model, audio_seconds, plan, started, copies=1):
+        """Record an admitted job (condition held)"""
+        model_size, memory_mb, loads_model, reason = plan
+        job = Job(next(self._ids), requested_model, model_size, memory_mb, loads_model,
+                  audio_seconds, time.monotonic() - started, reason, copies)
+        self._jobs[job.job_id] = job
+        self.counters['admitted'] += 1
+        if job.downgraded:
+            self.counters['downgraded'] += 1
+            print(f"⚠ Whisper {requested_model} → {model_size} ({reason} pressure)")
+        return job
+
+    async def _release(self, job):
+        async with self._changed:
+            self._jobs.pop(job.job_id, None)
+            self._changed.notify_all()
+
+    def stats(self):
+        return {
+            'budget_mb': round(self.budget_mb, 1),
+            'committed_mb': round(self.committed_mb(), 1),
+            'active_jobs': len(self._jobs),
+            'waiting_jobs': self._waiting,
+            **self.counters,
+        }
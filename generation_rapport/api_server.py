@@ -2,33 +2,114 @@
 FastAPI server for the Meeting Report Generator.
 Exposes endpoints for audio upload / text submission → PDF report generation.
 Runs inside the Docker container on port 8000.
-"""
-
-# ── Monkey-patch torch.load BEFORE any whisper import ──────────────
-# Recent versions of openai-whisper call torch.load(weights_only=True),
-# but the model checkpoint files are not compatible with that flag.
-# We force weights_only=False since the Whisper models are trusted.
-import torch
-_original_torch_load = torch.load
 
-def _patched_torch_load(*args, **kwargs):
-    kwargs["weights_only"] = False
-    return _original_torch_load(*args, **kwargs)
+SERVICE_ROLE selects which endpoints this instance serves, so that text and
+audio workloads can be scaled independently:
+    all   - every endpoint (default)
+    text  - text → report only; never imports torch / whisper
+    audio - transcription and audio → report
+"""
 
-torch.load = _patched_torch_load
-# ────────────────────────────────────────────────────────────────────
+import time
+_IMPORT_STARTED = time.perf_counter()
 
+import asyncio
 import os
 import uuid
+import hmac
+import json
+import re
 import traceback
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
+from typing import List, Optional
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import (
+    APIRouter, FastAPI, UploadFile, File, Form, Header, HTTPException, Query, Request,
+    WebSocket, WebSocketDisconnect,
+)
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+import admission
+import audio_io
+import cancellation
+import chunked_uploads
+import cpu_topology
+import decoding_tiers
+import gemini_dispatcher
+import medical_lexicon
+import meetings_sync
+import model_registry
+import process_stats
+import prompt_cache
+import report_views
+import request_dedup
+import request_profiling
+import scheduling
+import search_index
+import segment_store
+import track_transcription
+import tracing
+
+SERVICE_ROLES = ("all", "text", "audio")
+SERVICE_ROLE = os.getenv("SERVICE_ROLE", "all").strip().lower()
+if SERVICE_ROLE not in SERVICE_ROLES:
+    raise RuntimeError(f"SERVICE_ROLE must be one of {SERVICE_ROLES}, got {SERVICE_ROLE!r}")
+SERVES_AUDIO = SERVICE_ROLE in ("all", "audio")
+SERVES_TEXT = SERVICE_ROLE in ("all", "text")
+
+# Whisper model sizes loaded and warmed at startup (comma-separated, empty = none)
+PRELOAD_MODELS = [
+    size.strip()
+    for size in os.getenv("WHISPER_PRELOAD_MODELS", "small").split(",")
+    if size.strip()
+] if SERVES_AUDIO else []
+WARMUP_ENABLED = os.getenv("WHISPER_WARMUP", "1") != "0"
+
+# Token for admin endpoints (profiling toggle); empty = admin endpoints disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Rolling window of live meeting transcription (seconds of audio per Whisper call)
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", "30"))
+
+# Filled in once the app has started (see lifespan / GET /health)
+STARTUP_STATS = {}
 
-app = FastAPI(title="OncoCollab Report Generator API")
+# Set by serve.py in forked workers that share the parent's models
+WORKER_ID = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The event loop (and the threadpool threads it starts) keep the api
+    # cores; Whisper, decoding and rendering move to their own (cpu_topology.py)
+    cpu_topology.pin("api")
+    # Load in the background so /health answers immediately while /ready
+    # keeps reporting 503 until every configured model is warm.
+    if PRELOAD_MODELS:
+        model_registry.preload_in_background(PRELOAD_MODELS, warm=WARMUP_ENABLED)
+    idempotency_store.purge_expired()
+    upload_store.purge_expired()
+
+    STARTUP_STATS.update(
+        role=SERVICE_ROLE,
+        startup_seconds=round(time.perf_counter() - _IMPORT_STARTED, 3),
+        **process_stats.snapshot(),
+    )
+    print(f"✓ Report generator started (role={SERVICE_ROLE}): {STARTUP_STATS}")
+    yield
+    # Reports not yet attached to their meeting get a few seconds to go out
+    await meetings_sync.aclose()
+
+
+app = FastAPI(title="OncoCollab Report Generator API", lifespan=lifespan)
+text_router = APIRouter()
+audio_router = APIRouter()
 
 # Allow cross-origin requests from the visio-app frontend
 app.add_middleware(
@@ -37,17 +118,123 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser read the ids / offsets returned alongside file responses
+    expose_headers=[
+        "X-Transcript-Id", "X-Report-Id", "X-Meeting-Sync", "Upload-Offset", "Idempotent-Replayed",
+        "X-Whisper-Model", "X-Whisper-Model-Requested", "X-Decoding-Tier", "X-Request-Id", "X-Profile-Id",
+    ],
 )
 
-OUTPUT_DIR = Path("/app/output")
+OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "/app/output"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-UPLOAD_DIR = Path("/app/uploads")
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "/app/uploads"))
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+upload_store = chunked_uploads.UploadStore(UPLOAD_DIR / "resumable")
+
+TRANSCRIPT_DIR = OUTPUT_DIR / "transcripts"
+TRANSCRIPT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Full-text index over every generated report and its transcript
+report_index = search_index.ReportIndex(OUTPUT_DIR / "search" / "reports.db")
+
+# Opt-in per-request profiles (X-Profile header or admin toggle)
+profiling_control = request_profiling.ProfilingControl(OUTPUT_DIR / "profiles")
+
+# Trace spans of every request (TRACE_EXPORTER / TRACE_FILE, see tracing.py)
+tracing.configure(OUTPUT_DIR / "traces" / "spans.jsonl")
+
+# Whisper jobs are admitted against an RSS budget and may be moved to a
+# smaller model under memory or queue pressure (see admission.py)
+admission_controller = admission.AdmissionController()
+
+# Identical concurrent requests share one pipeline run; results of requests
+# sent with an Idempotency-Key are kept so that retries replay them
+single_flight = request_dedup.SingleFlight()
+idempotency_store = request_dedup.IdempotencyStore(OUTPUT_DIR / "idempotency")
+
+
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """
+    Tag every response with X-Request-Id (the client's, or a new one), run
+    the request in its root trace span and profile it when asked to (see
+    tracing.py and request_profiling.py).
+    """
+    request_id = request.headers.get("x-request-id", "")
+    if not _REQUEST_ID_RE.match(request_id):
+        request_id = uuid.uuid4().hex
+
+    # Profiling costs CPU (stack sampler, torch profiler) and disk: admins only,
+    # and the header is ignored altogether when no ADMIN_TOKEN is configured
+    wants_profile = (
+        request.headers.get("x-profile", "").lower() in ("1", "true", "yes")
+        and _is_admin(request.headers.get("x-admin-token"))
+    )
+
+    with tracing.request_span(
+        request_id, f"{request.method} {request.url.path}",
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path},
+    ) as span:
+        if not profiling_control.should_profile(wants_profile):
+            response = await call_next(request)
+        else:
+            with profiling_control.profile(request_id) as profile:
+                response = await call_next(request)
+            await run_in_threadpool(profile.save, response.status_code, request.url.path)
+            response.headers["X-Profile-Id"] = request_id
+        span.set(**{"http.status_code": response.status_code})
+        if response.status_code >= 500:
+            span.fail(f"HTTP {response.status_code}")
+    response.headers["X-Request-Id"] = request_id
+    return response
+
+
+def _is_admin(token: Optional[str]):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest((token or "").encode(), ADMIN_TOKEN.encode())
+
+
+def _check_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set).")
+    if not _is_admin(token):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+@app.exception_handler(chunked_uploads.UploadError)
+async def upload_error_handler(request: Request, exc: chunked_uploads.UploadError):
+    # Always tell the client where to resume from
+    headers = {"Upload-Offset": str(exc.offset)} if exc.offset is not None else None
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "offset": exc.offset},
+        headers=headers,
+    )
+
+
+@app.exception_handler(admission.AdmissionTimeout)
+async def admission_timeout_handler(request: Request, exc: admission.AdmissionTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "30"})
+
+
+@app.exception_handler(cancellation.Cancelled)
+async def cancelled_handler(request: Request, exc: cancellation.Cancelled):
+    # 499 Client Closed Request (nginx): nobody is usually left to read it
+    return JSONResponse(status_code=499, content={"detail": str(exc)})
+
+
+@app.exception_handler(gemini_dispatcher.QuotaTimeout)
+async def gemini_quota_handler(request: Request, exc: gemini_dispatcher.QuotaTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "60"})
+
 
 def _get_gemini_key() -> str:
-    key = os.getenv("GEMINI_API_KEY", "")
+    key = os.getenv("GEMINI_API_KEY", "") or next(iter(gemini_dispatcher.API_KEYS), "")
     if not key:
         raise HTTPException(
             status_code=500,
@@ -56,167 +243,1210 @@ def _get_gemini_key() -> str:
     return key
 
 
+def _resolve_tier(tier, whisper_model):
+    """(tier name, model size, Whisper decoding options) of a request; 400 on an unknown tier"""
+    try:
+        return decoding_tiers.resolve(tier, whisper_model)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+async def _read_audio_upload(audio: UploadFile, sample_rate=None, channels=None):
+    """
+    Read an uploaded audio file into memory (no temp file).
+
+    Returns (payload, pcm) where pcm describes headerless PCM uploads
+    (audio/L16 content type or .pcm/.raw file) and is None otherwise.
+    Explicit sample_rate / channels form fields override the content type.
+    """
+    with tracing.span("upload", filename=audio.filename, content_type=audio.content_type) as span:
+        data = await audio.read()
+        span.set(bytes=len(data))
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty audio upload.")
+    return data, _pcm_options(audio.filename, audio.content_type, sample_rate, channels)
+
+
+def _schedule(priority, tier, whisper_model, uploads, stages=scheduling.STAGES):
+    """
+    Scheduling job of an audio request (priority class and expected cost per
+    stage), from the audio length probed in the upload headers; 400 on an
+    unknown priority
+    """
+    with tracing.span("probe") as span:
+        durations = [audio_io.probe_duration(upload["audio"], upload["pcm"]) for upload in uploads]
+        known = [seconds for seconds in durations if seconds is not None]
+        # Tracks are transcribed concurrently: the longest one sets the cost
+        audio_seconds = max(known) if known else None
+        try:
+            priority_class = scheduling.classify(priority, tier, audio_seconds)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        job = scheduling.schedule(
+            priority_class, audio_seconds,
+            scheduling.estimate(audio_seconds, admission.real_time_factor(whisper_model), stages),
+        )
+        span.set(priority=priority_class, audio_seconds=round(audio_seconds or 0.0, 1),
+                 expected_seconds=job.expected_seconds)
+    return job
+
+
+async def _decode_audio(data, pcm=None):
+    """Decode an upload to 16 kHz samples in the thread pool (400 if it is not audio)."""
+    def decode():
+        with tracing.span("decode", bytes=len(data), pcm=pcm is not None) as span:
+            with cpu_topology.stage("whisper"):
+                samples = audio_io.load_audio(data, pcm=pcm)
+            span.set(audio_seconds=round(len(samples) / audio_io.SAMPLE_RATE, 1))
+            return samples
+
+    try:
+        return await run_in_threadpool(decode)
+    except audio_io.AudioDecodeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _save_transcript(segments, **meta):
+    """Persist segments as a memory-mapped segment store; returns its id."""
+    transcript_id = uuid.uuid4().hex
+    meta.setdefault("created_at", datetime.now().isoformat(timespec="seconds"))
+    store = segment_store.SegmentStore.write(
+        segment_store.transcript_path(TRANSCRIPT_DIR, transcript_id), segments, meta=meta
+    )
+    store.close()
+    return transcript_id
+
+
+def _open_transcript(transcript_id: str) -> segment_store.SegmentStore:
+    try:
+        path = segment_store.transcript_path(TRANSCRIPT_DIR, transcript_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"Unknown transcript: {transcript_id}")
+    return segment_store.SegmentStore(path)
+
+
+def _report_data_path(report_id: str) -> Path:
+    if not report_id or not report_id.isalnum():
+        raise HTTPException(status_code=400, detail=f"Invalid report id: {report_id!r}")
+    return OUTPUT_DIR / f"report_{report_id}.json"
+
+
+def _save_report_data(report_id, structured_data, **meta):
+    """
+    Persist the structured data next to the PDF (report_<id>.json) so the
+    report can be re-rendered after edits without calling Gemini again.
+    """
+    record = dict(meta, report_id=report_id, structured_data=structured_data)
+    record.setdefault("created_at", datetime.now().isoformat(timespec="seconds"))
+    path = _report_data_path(report_id)
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return record
+
+
+def _load_report_data(report_id: str) -> dict:
+    path = _report_data_path(report_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=f"Unknown report: {report_id}")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=16)
+def _pdf_renderer(organization_name: str):
+    """One MeetingReportPDF (and its stylesheet) per organization name."""
+    from cedric_file3 import MeetingReportPDF
+
+    return MeetingReportPDF(organization_name=organization_name)
+
+
+def _check_meeting_id(meeting_id):
+    if meeting_id is None:
+        return None
+    try:
+        return meetings_sync.check_meeting_id(meeting_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _attach_to_meeting(meeting_id, report_id, structured_data, **fields):
+    """
+    Attach a freshly generated report to its meeting in rest-api, in the
+    background (see meetings_sync.py). Returns the response headers telling
+    whether it was queued.
+    """
+    if meeting_id is None:
+        return {}
+    queued = meetings_sync.push_report(meeting_id, report_id, structured_data, **fields)
+    return {"X-Meeting-Sync": "queued" if queued else "disabled"}
+
+
+async def _index_report(report_id, result, **fields):
+    """
+    Add a freshly generated report to the search index. Indexing problems
+    are logged, never turned into a failed report.
+    """
+    try:
+        await run_in_threadpool(
+            report_index.add_report, report_id, result.get("structured_data"), **fields
+        )
+    except Exception as exc:
+        print(f"⚠ Could not index report {report_id}: {exc}")
+
+
+def _file_result(pdf_filename, **headers):
+    """Replayable description of a PDF response (see _respond)."""
+    return {"file": pdf_filename, "headers": headers}
+
+
+def _json_result(content, **headers):
+    return {"content": content, "headers": headers}
+
+
+def _text_result(text, media_type, **headers):
+    return {"text": text, "media_type": media_type, "headers": headers}
+
+
+def _resolve_format(output_format, accept, default="pdf"):
+    """Report format of a request (`format` field, then Accept); 400 / 406 when impossible"""
+    try:
+        return report_views.negotiate(accept, output_format, default=default)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except LookupError as exc:
+        raise HTTPException(status_code=406, detail=str(exc))
+
+
+def _report_result(output_format, report_id, structured_data, report_title=None,
+                   organization_name="", **headers):
+    """
+    Replayable response for a generated report: the PDF, or the JSON / HTML /
+    Markdown view of the same data (see report_views.py)
+
+    Raises:
+        HTTPException 422: structured_data does not have the report's shape
+    """
+    headers = dict(headers, **{"X-Report-Id": report_id, "Vary": "Accept"})
+    if output_format == "pdf":
+        return _file_result(f"report_{report_id}.pdf", **headers)
+    try:
+        view = report_views.build_view(structured_data, report_title, organization_name)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Could not render report: {exc}")
+    if output_format == "json":
+        return _json_result(view, **headers)
+    text, media_type = report_views.render_text(view, output_format)
+    return _text_result(text, media_type, **headers)
+
+
+def _respond(result, replayed=False):
+    headers = dict(result["headers"])
+    if replayed:
+        headers["Idempotent-Replayed"] = "true"
+    if "file" in result:
+        return FileResponse(
+            path=str(OUTPUT_DIR / result["file"]),
+            filename=result["file"],
+            media_type="application/pdf",
+            headers=headers,
+        )
+    if "text" in result:
+        return Response(content=result["text"], media_type=result["media_type"], headers=headers)
+    return JSONResponse(content=result["content"], headers=headers)
+
+
+async def _run_once(request, request_fingerprint, idempotency_key, compute, *args, **kwargs):
+    """
+    Run `compute(*args, **kwargs)` (a coroutine function returning a
+    _file_result / _json_result) at most once per request:
+    - a retry carrying an already answered Idempotency-Key gets the
+      recorded result back
+    - identical requests arriving while it runs wait for it and share it
+    - the run is cancelled once every request waiting for it has
+      disconnected or been cancelled (see cancellation.py)
+    """
+    if idempotency_key is not None:
+        try:
+            recorded = idempotency_store.get(idempotency_key, request_fingerprint)
+        except request_dedup.IdempotencyKeyMismatch as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        # Replay unless the PDF it points to has been cleaned up since
+        if recorded is not None and (
+            "file" not in recorded or (OUTPUT_DIR / recorded["file"]).exists()
+        ):
+            return _respond(recorded, replayed=True)
+
+    span = tracing.current_span()
+    request_id = span.request_id if span is not None else uuid.uuid4().hex
+    # With an Idempotency-Key the client comes back for the result: keep going
+    run = cancellation.registry.join(request_fingerprint, request_id,
+                                     detach_on_disconnect=idempotency_key is None)
+    watcher = asyncio.ensure_future(_watch_disconnect(request, run, request_id))
+    try:
+        with cancellation.bind(run.token):
+            result, _ = await single_flight.do(run.key, compute, *args, **kwargs)
+    except (HTTPException, chunked_uploads.UploadError, admission.AdmissionTimeout,
+            gemini_dispatcher.QuotaTimeout, cancellation.Cancelled):
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(exc))
+    finally:
+        watcher.cancel()
+        cancellation.registry.leave(request_fingerprint, run, request_id)
+
+    if idempotency_key is not None:
+        idempotency_store.save(idempotency_key, request_fingerprint, result)
+    return _respond(result)
+
+
+async def _watch_disconnect(request, run, request_id):
+    """Tell the registry when the client of a waiting request goes away"""
+    # The body has been read by now: the next ASGI message is the disconnect.
+    # (request.is_disconnected() only polls, and cannot see it through the
+    # HTTP middleware's wrapped receive)
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+    cancellation.registry.disconnected(run, request_id)
+
+
+def _pcm_options(filename=None, content_type=None, sample_rate=None, channels=None):
+    """PCM description for headerless PCM uploads, None for encoded audio; 400 when invalid."""
+    try:
+        pcm = audio_io.parse_pcm_content_type(content_type)
+        if pcm is None and audio_io.is_pcm_upload(filename):
+            pcm = {"rate": audio_io.SAMPLE_RATE, "channels": 1, "pcm_format": "s16le"}
+        if pcm is not None:
+            if sample_rate is not None:
+                pcm["rate"] = sample_rate
+            if channels is not None:
+                pcm["channels"] = channels
+            audio_io.check_pcm(pcm)
+        elif sample_rate is not None or channels is not None:
+            # Containers carry their own rate and layout: do not silently ignore these
+            raise HTTPException(
+                status_code=400,
+                detail=f"sample_rate / channels only apply to raw PCM uploads, "
+                       f"not to {content_type or filename or 'this audio format'}",
+            )
+    except audio_io.AudioDecodeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return pcm
+
+
 # ------------------------------------------------------------------
 # Health check
 # ------------------------------------------------------------------
 @app.get("/health")
 async def health():
-    return {"status": "ok", "service": "generation_rapport"}
+    return {
+        "status": "ok",
+        "service": "generation_rapport",
+        "role": SERVICE_ROLE,
+        "startup": STARTUP_STATS,
+        "process": process_stats.snapshot(),
+        "dedup": single_flight.stats(),
+        "admission": admission_controller.stats(),
+        "tracing": tracing.stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "gemini": gemini_dispatcher.stats(),
+        "cancellation": cancellation.stats(),
+        "scheduler": scheduling.stats(),
+        "cpu": cpu_topology.stats(),
+        "lexicon": medical_lexicon.stats(),
+        "meetings": meetings_sync.stats(),
+        "worker": {
+            "id": WORKER_ID,
+            "pid": os.getpid(),
+            **process_stats.memory_breakdown(),
+        },
+    }
+
+
+# ------------------------------------------------------------------
+# Readiness check (models resident and warmed up)
+# ------------------------------------------------------------------
+@app.get("/ready")
+async def ready():
+    state = model_registry.readiness()
+    return JSONResponse(
+        status_code=200 if state["ready"] else 503,
+        content={
+            "status": state["status"],
+            "service": "generation_rapport",
+            "models": state["models"],
+        },
+    )
 
 
 # ------------------------------------------------------------------
 # Generate report from uploaded audio file
 # ------------------------------------------------------------------
-@app.post("/generate/audio")
+@audio_router.post("/generate/audio")
 async def generate_from_audio(
-    audio: UploadFile = File(...),
+    request: Request,
+    audio: Optional[UploadFile] = File(None),
+    tracks: Optional[List[UploadFile]] = File(None),
+    speakers: Optional[List[str]] = Form(None),
     meeting_type: str = Form("medical"),
     organization_name: str = Form("OncoCollab"),
-    whisper_model: str = Form("small"),
+    whisper_model: Optional[str] = Form(None, description="Overrides the tier's model"),
+    tier: Optional[str] = Form(None, description="Decoding tier: preview, fast, standard (default), archive"),
     language: str = Form("fr"),
+    sample_rate: Optional[int] = Form(None),
+    channels: Optional[int] = Form(None),
+    output_format: Optional[str] = Form(None, alias="format", description="pdf (default), json, html, markdown"),
+    priority: Optional[str] = Form(None, description="interactive or bulk (default: by tier and audio length)"),
+    meeting_id: Optional[str] = Form(None, description="rest-api meeting to attach the report to"),
+    accept: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """
-    Receive an audio file (webm, wav, mp3 …), run Whisper → Gemini → PDF pipeline.
-    Returns the generated PDF.
+    Receive an audio file (webm, wav, mp3 …, or raw 16-bit PCM), run
+    Whisper → Gemini → PDF pipeline. Returns the generated PDF, or the
+    report as JSON / HTML / Markdown (`format` field or Accept header)
+    without rendering the PDF.
+
+    Instead of one mixed recording, a call can be sent as one `tracks` file
+    per participant (with matching `speakers` labels, default: file names):
+    tracks are transcribed concurrently and merged with speaker labels.
+
+    Long recordings are scheduled as bulk work, behind interactive previews
+    (see scheduling.py).
+
+    With a `meeting_id`, the report is also attached to that meeting in
+    rest-api (see meetings_sync.py).
     """
     gemini_key = _get_gemini_key()
-    uid = uuid.uuid4().hex[:10]
+    tier, whisper_model, decoding = _resolve_tier(tier, whisper_model)
+    output_format = _resolve_format(output_format, accept)
+    meeting_id = _check_meeting_id(meeting_id)
+    if (audio is None) == (not tracks):
+        raise HTTPException(status_code=400, detail="Send either one 'audio' file or 'tracks' files.")
+    if speakers and len(speakers) != len(tracks or []):
+        raise HTTPException(status_code=400, detail="Give one 'speakers' label per track.")
 
-    # --- Save uploaded audio to disk ---
-    ext = Path(audio.filename or "audio.webm").suffix or ".webm"
-    audio_path = UPLOAD_DIR / f"audio_{uid}{ext}"
-    with open(audio_path, "wb") as f:
-        f.write(await audio.read())
+    # --- Keep the uploads in memory, they are decoded in-process ---
+    uploads = []
+    for index, upload in enumerate(tracks or [audio]):
+        data, pcm = await _read_audio_upload(upload, sample_rate, channels)
+        speaker = speakers[index] if speakers else Path(upload.filename or f"track{index + 1}").stem
+        uploads.append({"speaker": speaker, "audio": data, "pcm": pcm})
 
+    request_fingerprint = request_dedup.fingerprint(
+        "generate/audio", meeting_type, organization_name, whisper_model, tier, language, output_format, meeting_id,
+        [(upload["speaker"] if tracks else None, upload["pcm"]) for upload in uploads],
+        *[upload["audio"] for upload in uploads],
+    )
+    stages = scheduling.STAGES if output_format == "pdf" else scheduling.STAGES[:-1]
+    with scheduling.bind(_schedule(priority, tier, whisper_model, uploads, stages)):
+        return await _run_once(
+            request, request_fingerprint, idempotency_key, _generate_from_audio,
+            gemini_key, uploads if tracks else uploads[0], meeting_type,
+            organization_name, whisper_model, language, tier, decoding, output_format, meeting_id,
+        )
+
+
+async def _generate_from_audio(gemini_key, audio, meeting_type,
+                               organization_name, whisper_model, language, tier, decoding,
+                               output_format="pdf", meeting_id=None):
+    """`audio` is one upload {'audio', 'pcm'} or a list of participant tracks."""
+    from cedric_complete_integration import CompleteMeetingReportGenerator
+
+    uid = uuid.uuid4().hex[:10]
     pdf_filename = f"report_{uid}.pdf"
     pdf_path = OUTPUT_DIR / pdf_filename
 
-    try:
-        from cedric_complete_integration import CompleteMeetingReportGenerator
+    if isinstance(audio, list):
+        # Tracks are decoded in the worker processes, each loading a model copy
+        audio_seconds = None
+        admit = admission_controller.admit(
+            whisper_model, copies=min(len(audio), track_transcription.worker_count())
+        )
+    else:
+        # Decode first: the audio length drives the memory and queue estimates
+        samples = await _decode_audio(audio["audio"], audio["pcm"])
+        audio_seconds = len(samples) / audio_io.SAMPLE_RATE
+        admit = admission_controller.admit(whisper_model, audio_seconds=audio_seconds)
 
+    # Only transcription holds the Whisper memory reservation: it is released
+    # before the Gemini call (and its quota wait) and the PDF
+    async with admit as job:
         generator = CompleteMeetingReportGenerator(
             gemini_api_key=gemini_key,
             organization_name=organization_name,
-            whisper_model=whisper_model,
+            whisper_model=job.model_size,
         )
+        if isinstance(audio, list):
+            transcription = await run_in_threadpool(
+                generator.transcribe_tracks,
+                audio, language=language, decoding=decoding, tier=tier,
+            )
+        else:
+            transcription = await run_in_threadpool(
+                generator.transcribe,
+                samples, language=language, decoding=decoding, tier=tier,
+            )
 
-        result = generator.generate_report_from_audio(
-            audio_file_path=str(audio_path),
-            output_pdf_filename=str(pdf_path),
-            meeting_type=meeting_type,
-            language=language,
-        )
+    result = await run_in_threadpool(
+        generator.report_from_transcription,
+        transcription,
+        output_pdf_filename=str(pdf_path),
+        meeting_type=meeting_type,
+        render_pdf=output_format == "pdf",
+    )
 
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
 
-        return FileResponse(
-            path=str(pdf_path),
-            filename=pdf_filename,
-            media_type="application/pdf",
-        )
+    if "speakers" in result:
+        # Keep the speaker in the stored / indexed segment text
+        result["segments"] = [
+            dict(segment, text=f"{segment['speaker']}: {segment['text']}")
+            for segment in result["segments"]
+        ]
+    transcript_id = _save_transcript(
+        result["segments"],
+        language=result["language"],
+        whisper_model=job.model_size,
+        tier=tier,
+        speakers=result.get("speakers"),
+    )
+    _save_report_data(
+        uid, result["structured_data"],
+        meeting_type=meeting_type,
+        organization_name=organization_name,
+        report_title=result.get("report_title"),
+        pdf_filename=pdf_filename,
+        transcript_id=transcript_id,
+        whisper_model=job.model_size,
+    )
+    await _index_report(
+        uid, result,
+        segments=result["segments"],
+        meeting_type=meeting_type,
+        organization_name=organization_name,
+        pdf_filename=pdf_filename,
+        transcript_id=transcript_id,
+    )
+    meeting_headers = _attach_to_meeting(
+        meeting_id, uid, result["structured_data"],
+        report_title=result.get("report_title"),
+        meeting_type=meeting_type,
+        transcript_id=transcript_id,
+    )
 
-    except HTTPException:
-        raise
-    except Exception as exc:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        # Clean up uploaded audio
-        if audio_path.exists():
-            audio_path.unlink(missing_ok=True)
+    return _report_result(
+        output_format, uid, result["structured_data"], result.get("report_title"), organization_name,
+        **{"X-Transcript-Id": transcript_id, "X-Decoding-Tier": tier},
+        **meeting_headers,
+        **job.headers(),
+    )
 
 
 # ------------------------------------------------------------------
 # Generate report from raw text (skip Whisper)
 # ------------------------------------------------------------------
-@app.post("/generate/text")
+@text_router.post("/generate/text")
 async def generate_from_text(
+    request: Request,
     text: str = Form(...),
     meeting_type: str = Form("medical"),
     organization_name: str = Form("OncoCollab"),
+    output_format: Optional[str] = Form(None, alias="format", description="pdf (default), json, html, markdown"),
+    meeting_id: Optional[str] = Form(None, description="rest-api meeting to attach the report to"),
+    accept: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
 ):
     """
     Receive raw meeting text, run Gemini → PDF pipeline.
-    Returns the generated PDF.
+    Returns the generated PDF, or the report as JSON / HTML / Markdown
+    (`format` field or Accept header) without rendering the PDF.
+    With a `meeting_id`, the report is also attached to that meeting.
     """
     gemini_key = _get_gemini_key()
-    uid = uuid.uuid4().hex[:10]
+    output_format = _resolve_format(output_format, accept)
+    meeting_id = _check_meeting_id(meeting_id)
+
+    request_fingerprint = request_dedup.fingerprint(
+        "generate/text", meeting_type, organization_name, output_format, meeting_id, text
+    )
+    return await _run_once(
+        request, request_fingerprint, idempotency_key, _generate_from_text,
+        gemini_key, text, meeting_type, organization_name, output_format, meeting_id,
+    )
+
 
+async def _generate_from_text(gemini_key, text, meeting_type, organization_name, output_format="pdf",
+                              meeting_id=None):
+    from cedric_complete_integration import CompleteMeetingReportGenerator
+
+    uid = uuid.uuid4().hex[:10]
     pdf_filename = f"report_{uid}.pdf"
     pdf_path = OUTPUT_DIR / pdf_filename
 
-    try:
-        from cedric_complete_integration import CompleteMeetingReportGenerator
+    generator = CompleteMeetingReportGenerator(
+        gemini_api_key=gemini_key,
+        organization_name=organization_name,
+    )
 
-        generator = CompleteMeetingReportGenerator(
-            gemini_api_key=gemini_key,
-            organization_name=organization_name,
-        )
+    result = await run_in_threadpool(
+        generator.generate_report_from_text,
+        raw_text=text,
+        output_pdf_filename=str(pdf_path),
+        meeting_type=meeting_type,
+        render_pdf=output_format == "pdf",
+    )
+
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+
+    _save_report_data(
+        uid, result["structured_data"],
+        meeting_type=meeting_type,
+        organization_name=organization_name,
+        report_title=result.get("report_title"),
+        pdf_filename=pdf_filename,
+        transcript=text,
+    )
+    await _index_report(
+        uid, result,
+        transcript=text,
+        meeting_type=meeting_type,
+        organization_name=organization_name,
+        pdf_filename=pdf_filename,
+    )
+    meeting_headers = _attach_to_meeting(
+        meeting_id, uid, result["structured_data"],
+        report_title=result.get("report_title"),
+        meeting_type=meeting_type,
+    )
+
+    return _report_result(
+        output_format, uid, result["structured_data"], result.get("report_title"), organization_name,
+        **meeting_headers,
+    )
 
-        result = generator.generate_report_from_text(
-            raw_text=text,
-            output_pdf_filename=str(pdf_path),
-            meeting_type=meeting_type,
+
+# ------------------------------------------------------------------
+# Decoding tiers (latency / quality trade-offs, see decoding_tiers.py)
+# ------------------------------------------------------------------
+@audio_router.get("/tiers")
+async def list_tiers():
+    return decoding_tiers.describe()
+
+
+# ------------------------------------------------------------------
+# Transcribe only (return text, no PDF)
+# ------------------------------------------------------------------
+@audio_router.post("/transcribe")
+async def transcribe_audio(
+    request: Request,
+    audio: UploadFile = File(...),
+    whisper_model: Optional[str] = Form(None, description="Overrides the tier's model"),
+    tier: Optional[str] = Form(None, description="Decoding tier: preview, fast, standard (default), archive"),
+    language: str = Form("fr"),
+    sample_rate: Optional[int] = Form(None),
+    channels: Optional[int] = Form(None),
+    word_timestamps: bool = Form(False),
+    priority: Optional[str] = Form(None, description="interactive or bulk (default: by tier and audio length)"),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Transcribe audio with Whisper and return the text (useful for preview).
+    Accepts encoded audio or raw 16-bit PCM (audio/L16, .pcm).
+    The timestamped segments are kept in a segment store (see /transcripts).
+    Short audio and the preview tier are scheduled as interactive work.
+    """
+    tier, whisper_model, decoding = _resolve_tier(tier, whisper_model)
+    audio_data, pcm = await _read_audio_upload(audio, sample_rate, channels)
+
+    request_fingerprint = request_dedup.fingerprint(
+        "transcribe", whisper_model, tier, language, word_timestamps, pcm, audio_data
+    )
+    job = _schedule(priority, tier, whisper_model, [{"audio": audio_data, "pcm": pcm}], ("decode", "whisper"))
+    with scheduling.bind(job):
+        return await _run_once(
+            request, request_fingerprint, idempotency_key, _transcribe_audio,
+            audio_data, pcm, whisper_model, language, word_timestamps, tier, decoding,
         )
 
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
 
-        return FileResponse(
-            path=str(pdf_path),
-            filename=pdf_filename,
-            media_type="application/pdf",
+async def _transcribe_audio(audio_data, pcm, whisper_model, language, word_timestamps, tier, decoding):
+    from cedric_file1 import MeetingTranscriber
+
+    samples = await _decode_audio(audio_data, pcm)
+    audio_seconds = len(samples) / audio_io.SAMPLE_RATE
+    async with admission_controller.admit(whisper_model, audio_seconds=audio_seconds) as job:
+        transcriber = MeetingTranscriber(model_size=job.model_size)
+        result = await run_in_threadpool(
+            transcriber.transcribe_audio_file,
+            samples, language=language, word_timestamps=word_timestamps, decoding=decoding,
         )
 
-    except HTTPException:
-        raise
+    if not result.get("success"):
+        raise HTTPException(status_code=500, detail=result.get("error", "Transcription failed"))
+
+    transcript_id = _save_transcript(
+        result["full_result"].get("segments", []),
+        language=result.get("language"),
+        whisper_model=job.model_size,
+        tier=tier,
+    )
+
+    return _json_result({
+        "success": True,
+        "transcription": result["transcription"],
+        "language": result.get("language", "unknown"),
+        "transcript_id": transcript_id,
+        "whisper_model": job.model_size,
+        "requested_whisper_model": job.requested_model,
+        "tier": tier,
+    }, **{"X-Decoding-Tier": tier}, **job.headers())
+
+
+# ------------------------------------------------------------------
+# Re-render a report from (edited) structured data - no Gemini call
+# ------------------------------------------------------------------
+class RenderRequest(BaseModel):
+    structured_data: dict
+    organization_name: Optional[str] = None
+    report_title: Optional[str] = None
+    # Re-render this stored report in place (JSON, PDF and search index)
+    report_id: Optional[str] = None
+    # pdf (default), json, html or markdown; overrides the Accept header
+    format: Optional[str] = None
+
+
+@text_router.post("/render")
+async def render_report(body: RenderRequest, accept: Optional[str] = Header(None)):
+    """
+    Build the PDF straight from structured data, as returned by
+    GET /reports/{report_id} and edited by the user. Returns the PDF, or
+    the JSON / HTML / Markdown view for a preview (the PDF is then
+    rendered on download, GET /reports/{report_id}/pdf).
+    """
+    output_format = _resolve_format(body.format, accept)
+    previous = _load_report_data(body.report_id) if body.report_id else {}
+    organization_name = body.organization_name or previous.get("organization_name") or "OncoCollab"
+    report_title = body.report_title or previous.get("report_title")
+    uid = body.report_id or uuid.uuid4().hex[:10]
+    pdf_filename = f"report_{uid}.pdf"
+
+    # Build the response first: data that cannot be rendered is rejected
+    # before it replaces the stored report
+    if output_format == "pdf":
+        await _render_pdf(body.structured_data, organization_name, report_title, pdf_filename)
+    result = _report_result(output_format, uid, body.structured_data, report_title, organization_name)
+    if output_format != "pdf":
+        # The data changed: a previous PDF of this report is stale
+        (OUTPUT_DIR / pdf_filename).unlink(missing_ok=True)
+
+    record = _save_report_data(
+        uid, body.structured_data,
+        meeting_type=previous.get("meeting_type"),
+        organization_name=organization_name,
+        report_title=report_title,
+        pdf_filename=pdf_filename,
+        transcript_id=previous.get("transcript_id"),
+        whisper_model=previous.get("whisper_model"),
+        transcript=previous.get("transcript"),
+        created_at=previous.get("created_at"),
+        rendered_at=datetime.now().isoformat(timespec="seconds"),
+    )
+
+    # Re-indexing replaces the report's chunks: keep its transcript searchable
+    segments = None
+    if record["transcript_id"]:
+        with _open_transcript(record["transcript_id"]) as store:
+            segments = store.time_range()
+    await _index_report(
+        uid, record,
+        segments=segments,
+        transcript=record["transcript"],
+        meeting_type=record["meeting_type"],
+        organization_name=organization_name,
+        pdf_filename=pdf_filename,
+        transcript_id=record["transcript_id"],
+        created_at=record["created_at"],
+    )
+
+    return _respond(result)
+
+
+async def _render_pdf(structured_data, organization_name, report_title, pdf_filename):
+    """Render to a temporary file first: concurrent downloads never see a partial PDF"""
+    tmp_path = OUTPUT_DIR / f"{pdf_filename}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        await run_in_threadpool(
+            _pdf_renderer(organization_name).generate_report,
+            structured_data=structured_data,
+            output_filename=str(tmp_path),
+            report_title=report_title,
+        )
+        os.replace(tmp_path, OUTPUT_DIR / pdf_filename)
     except Exception as exc:
+        tmp_path.unlink(missing_ok=True)
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(exc))
+        raise HTTPException(status_code=422, detail=f"Could not render report: {exc}")
 
 
 # ------------------------------------------------------------------
-# Transcribe only (return text, no PDF)
+# Resumable chunked uploads (see chunked_uploads.py for the protocol)
 # ------------------------------------------------------------------
-@app.post("/transcribe")
-async def transcribe_audio(
-    audio: UploadFile = File(...),
+@audio_router.post("/uploads", status_code=201)
+async def create_upload(
+    filename: str = Form("audio.webm"),
+    content_type: Optional[str] = Form(None),
+    total_size: Optional[int] = Form(None),
     whisper_model: str = Form("small"),
     language: str = Form("fr"),
+    sample_rate: Optional[int] = Form(None),
+    channels: Optional[int] = Form(None),
+    transcribe_early: bool = Form(True),
 ):
     """
-    Transcribe audio with Whisper and return the text (useful for preview).
+    Start a resumable upload. Contiguous audio is transcribed in the
+    background while the rest is still uploading (transcribe_early).
+    """
+    session = upload_store.create(
+        filename=filename,
+        content_type=content_type,
+        total_size=total_size,
+        pcm=_pcm_options(filename, content_type, sample_rate, channels),
+        # Long-lived session: pick a model that fits the memory budget now
+        whisper_model=admission_controller.select_model(whisper_model),
+        language=language,
+        transcribe_early=transcribe_early,
+    )
+    return session.status()
+
+
+@audio_router.put("/uploads/{upload_id}")
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: Optional[int] = Query(None),
+    upload_offset: Optional[int] = Header(None),
+):
+    """
+    Append the raw request body at `offset` (query parameter or Upload-Offset
+    header). Answers with the new contiguous offset.
     """
+    start = offset if offset is not None else upload_offset
+    if start is None or start < 0:
+        raise HTTPException(status_code=400, detail="A non-negative chunk offset is required.")
+
+    session = upload_store.get(upload_id)
+    new_offset = await session.write_chunk(start, request.stream())
+    session.start_early_transcription(admission_controller)
+    return JSONResponse(content=session.status(), headers={"Upload-Offset": str(new_offset)})
+
+
+@audio_router.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    """Current offset of an upload: resume by sending the bytes from there."""
+    session = upload_store.get(upload_id)
+    return JSONResponse(content=session.status(), headers={"Upload-Offset": str(session.offset)})
+
+
+@audio_router.delete("/uploads/{upload_id}", status_code=204)
+async def abort_upload(upload_id: str):
+    upload_store.get(upload_id)
+    upload_store.delete(upload_id)
+
+
+@audio_router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(
+    request: Request,
+    upload_id: str,
+    action: str = Form("transcribe"),
+    meeting_type: str = Form("medical"),
+    organization_name: str = Form("OncoCollab"),
+    output_format: Optional[str] = Form(None, alias="format", description="Report format (action=report)"),
+    meeting_id: Optional[str] = Form(None, description="rest-api meeting to attach the report to (action=report)"),
+    accept: Optional[str] = Header(None),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Complete an upload: transcribe the remainder and return the transcript
+    (action=transcribe) or run Gemini → PDF on it (action=report; or the
+    JSON / HTML / Markdown report, see /generate/text).
+    """
+    if action not in ("transcribe", "report"):
+        raise HTTPException(status_code=400, detail="action must be 'transcribe' or 'report'.")
+    gemini_key = _get_gemini_key() if action == "report" else None
+    output_format = _resolve_format(output_format, accept) if action == "report" else None
+    meeting_id = _check_meeting_id(meeting_id) if action == "report" else None
+
+    request_fingerprint = request_dedup.fingerprint(
+        "finalize", upload_id, action, meeting_type, organization_name, output_format, meeting_id
+    )
+    return await _run_once(
+        request, request_fingerprint, idempotency_key, _finalize_upload,
+        upload_id, action, gemini_key, meeting_type, organization_name, output_format, meeting_id,
+    )
+
+
+async def _finalize_upload(upload_id, action, gemini_key, meeting_type, organization_name,
+                           output_format="pdf", meeting_id=None):
+    session = upload_store.get(upload_id)
+    # The transcript was started with this model: finish it with the same one
+    async with admission_controller.admit(session.meta["whisper_model"], allow_downgrade=False):
+        result = await run_in_threadpool(session.transcribe_remaining)
+    segments = result.pop("segments")
+    transcript_id = _save_transcript(
+        segments,
+        language=result["language"],
+        whisper_model=session.meta["whisper_model"],
+    )
+
+    if action == "transcribe":
+        upload_store.delete(upload_id)
+        return _json_result(
+            dict(result, transcript_id=transcript_id, whisper_model=session.meta["whisper_model"])
+        )
+
+    from cedric_complete_integration import CompleteMeetingReportGenerator
+
     uid = uuid.uuid4().hex[:10]
-    ext = Path(audio.filename or "audio.webm").suffix or ".webm"
-    audio_path = UPLOAD_DIR / f"audio_{uid}{ext}"
+    pdf_filename = f"report_{uid}.pdf"
+    pdf_path = OUTPUT_DIR / pdf_filename
+    generator = CompleteMeetingReportGenerator(
+        gemini_api_key=gemini_key,
+        organization_name=organization_name,
+    )
+    report = await run_in_threadpool(
+        generator.generate_report_from_text,
+        raw_text=result["transcription"],
+        output_pdf_filename=str(pdf_path),
+        meeting_type=meeting_type,
+        render_pdf=output_format == "pdf",
+    )
+    if not report.get("success"):
+        raise HTTPException(status_code=500, detail=report.get("error", "Unknown error"))
+
+    _save_report_data(
+        uid, report["structured_data"],
+        meeting_type=meeting_type,
+        organization_name=organization_name,
+        report_title=report.get("report_title"),
+        pdf_filename=pdf_filename,
+        transcript_id=transcript_id,
+    )
+    await _index_report(
+        uid, report,
+        segments=segments,
+        meeting_type=meeting_type,
+        organization_name=organization_name,
+        pdf_filename=pdf_filename,
+        transcript_id=transcript_id,
+    )
+
+    meeting_headers = _attach_to_meeting(
+        meeting_id, uid, report["structured_data"],
+        report_title=report.get("report_title"),
+        meeting_type=meeting_type,
+        transcript_id=transcript_id,
+    )
+
+    upload_store.delete(upload_id)
+    return _report_result(
+        output_format, uid, report["structured_data"], report.get("report_title"), organization_name,
+        **{"X-Transcript-Id": transcript_id},
+        **meeting_headers,
+    )
+
+
+# ------------------------------------------------------------------
+# Live meeting ingest: audio frames over a WebSocket during the call
+# ------------------------------------------------------------------
+@audio_router.websocket("/live")
+async def live_ingest(
+    websocket: WebSocket,
+    upload_id: Optional[str] = Query(None, description="Resume this live session after a reconnect"),
+    whisper_model: str = Query("small"),
+    language: str = Query("fr"),
+    content_type: str = Query("audio/L16;rate=16000;channels=1"),
+    sample_rate: Optional[int] = Query(None),
+    channels: Optional[int] = Query(None),
+):
+    """
+    Receive the meeting audio while it happens and transcribe it on a
+    rolling window (LIVE_WINDOW_SECONDS) with the shared Whisper model.
+
+    Protocol (JSON text messages, audio as binary messages):
+        server → {"type": "session", "upload_id", "offset", ...}
+        client → binary audio frames (raw PCM recommended; ~0.5-1 s each)
+        server → {"type": "segments", "segments": [...], "transcribed_seconds"}
+        client → {"type": "stop"}
+        server → {"type": "stopped", ...} and closes
+
+    The live session is a resumable upload: at hang-up, POST
+    /uploads/{upload_id}/finalize (action=report) only has the last
+    window left to transcribe before Gemini runs.
+    """
+    await websocket.accept()
+    try:
+        if upload_id:
+            session = upload_store.get(upload_id)
+        else:
+            session = upload_store.create(
+                filename="live",
+                content_type=content_type,
+                pcm=_pcm_options(None, content_type, sample_rate, channels),
+                whisper_model=admission_controller.select_model(whisper_model),
+                language=language,
+                window_seconds=LIVE_WINDOW_SECONDS,
+            )
+    except chunked_uploads.UploadError as exc:
+        await websocket.close(code=4404 if exc.status_code == 404 else 4400, reason=str(exc))
+        return
+    except HTTPException as exc:  # invalid PCM parameters
+        await websocket.close(code=4400, reason=exc.detail)
+        return
+
+    await websocket.send_json(dict(session.status(), type="session"))
+    sent = len(session.transcriber.segments) if session.transcriber else 0
+
+    async def frame(data):
+        yield data
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                await session.write_chunk(session.offset, frame(message["bytes"]))
+                session.start_early_transcription(admission_controller)
+            elif message.get("text") and _live_command(message["text"]) == "stop":
+                if session.early_task is not None:
+                    await asyncio.wait([session.early_task])
+                await _send_new_segments(websocket, session, sent)
+                await websocket.send_json(dict(session.status(), type="stopped"))
+                await websocket.close()
+                return
+
+            sent = await _send_new_segments(websocket, session, sent)
+    except WebSocketDisconnect:
+        pass  # the session stays on disk: reconnect with ?upload_id= to resume
+    except chunked_uploads.UploadError as exc:
+        await websocket.close(code=4409, reason=str(exc))
 
-    with open(audio_path, "wb") as f:
-        f.write(await audio.read())
 
+def _live_command(text):
     try:
-        from cedric_file1 import MeetingTranscriber
+        return json.loads(text).get("type")
+    except (ValueError, AttributeError):
+        return None
 
-        transcriber = MeetingTranscriber(model_size=whisper_model)
-        result = transcriber.transcribe_audio_file(str(audio_path), language=language)
 
-        if not result.get("success"):
-            raise HTTPException(status_code=500, detail=result.get("error", "Transcription failed"))
+async def _send_new_segments(websocket, session, sent):
+    """Push segments committed by the rolling transcription since `sent`."""
+    segments = session.transcriber.segments if session.transcriber else []
+    if len(segments) > sent:
+        await websocket.send_json({
+            "type": "segments",
+            "segments": segments[sent:],
+            "transcribed_seconds": round(session.transcriber.transcribed_until, 2),
+        })
+    return len(segments)
 
-        return JSONResponse(
-            content={
-                "success": True,
-                "transcription": result["transcription"],
-                "language": result.get("language", "unknown"),
-            }
+
+# ------------------------------------------------------------------
+# Stored reports (structured data + PDF)
+# ------------------------------------------------------------------
+@app.get("/reports/{report_id}")
+async def report_data(
+    report_id: str,
+    output_format: Optional[str] = Query(None, alias="format", description="json (default), html, markdown, pdf"),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Structured data of a generated report, editable and re-renderable via
+    /render; or its HTML / Markdown view (`format` or Accept header).
+    """
+    output_format = _resolve_format(output_format, accept, default="json")
+    record = _load_report_data(report_id)
+    if output_format == "json":
+        return record
+    if output_format == "pdf":
+        return await report_pdf(report_id)
+    return _respond(_report_result(
+        output_format, report_id, record["structured_data"], record.get("report_title"),
+        record.get("organization_name") or "",
+    ))
+
+
+@app.get("/reports/{report_id}/pdf")
+async def report_pdf(report_id: str):
+    """The report's PDF, rendered now if it was only previewed so far (or cleaned up)"""
+    record = _load_report_data(report_id)
+    pdf_path = OUTPUT_DIR / record["pdf_filename"]
+    if not pdf_path.exists():
+        # Simultaneous downloads share one rendering
+        await single_flight.do(
+            request_dedup.fingerprint("reports/pdf", report_id), _render_pdf,
+            record["structured_data"], record.get("organization_name") or "OncoCollab",
+            record.get("report_title"), record["pdf_filename"],
         )
+    return FileResponse(
+        path=str(pdf_path),
+        filename=record["pdf_filename"],
+        media_type="application/pdf",
+        headers={"X-Report-Id": report_id},
+    )
 
-    except HTTPException:
-        raise
-    except Exception as exc:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        if audio_path.exists():
-            audio_path.unlink(missing_ok=True)
+
+# ------------------------------------------------------------------
+# Cancelling abandoned work (see cancellation.py)
+# ------------------------------------------------------------------
+@app.post("/requests/{request_id}/cancel", status_code=202)
+async def cancel_request(request_id: str):
+    """
+    Cancel the work of a running request, identified by the X-Request-Id it
+    was sent with. It stops at its next cancellation point (next Whisper
+    window, before Gemini, before the PDF) and the request answers 499.
+    """
+    if not cancellation.registry.cancel_request(request_id):
+        raise HTTPException(status_code=404, detail=f"No running request {request_id}")
+    return {"request_id": request_id, "cancelled": True}
+
+
+# ------------------------------------------------------------------
+# Per-request traces and profiles
+# ------------------------------------------------------------------
+@app.post("/admin/profiling")
+async def configure_profiling(
+    enabled: bool = Form(...),
+    requests: Optional[int] = Form(None, ge=1, description="Only profile the next N requests"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Profile every request (or the next N) until switched off."""
+    _check_admin(x_admin_token)
+    return profiling_control.configure(enabled, requests)
+
+
+@app.get("/admin/profiling")
+async def profiling_status(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    return profiling_control.status()
+
+
+def _profile_directory(request_id: str) -> Path:
+    try:
+        directory = profiling_control.directory(request_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not (directory / "summary.json").exists():
+        raise HTTPException(status_code=404, detail=f"No profile for request {request_id}")
+    return directory
+
+
+@app.get("/traces/{request_id}")
+async def request_trace(request_id: str):
+    """Spans of a recent request in start order, with offsets from the request start."""
+    spans = tracing.recent_trace(request_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail=f"No recent trace for request {request_id}")
+    started = min(span['start_ns'] for span in spans)
+    return {
+        "request_id": request_id,
+        "trace_id": spans[0]['trace_id'],
+        "spans": [dict(span, offset_ms=round((span['start_ns'] - started) / 1e6, 3)) for span in spans],
+    }
+
+
+@app.get("/profiles/{request_id}")
+async def profile_summary(request_id: str):
+    """Stage timings and hottest functions of a profiled request."""
+    with open(_profile_directory(request_id) / "summary.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@app.get("/profiles/{request_id}/{filename}")
+async def profile_file(request_id: str, filename: str):
+    """cpu.folded (speedscope / flamegraph.pl), whisper_trace.json (Perfetto), ..."""
+    directory = _profile_directory(request_id)
+    with open(directory / "summary.json", encoding="utf-8") as f:
+        files = json.load(f)["files"]
+    if filename not in files:
+        raise HTTPException(status_code=404, detail=f"No {filename} in profile {request_id}")
+    return FileResponse(path=str(directory / filename), filename=f"{request_id}_{filename}")
+
+
+# ------------------------------------------------------------------
+# Stored transcripts (memory-mapped segment stores)
+# ------------------------------------------------------------------
+@app.get("/transcripts/{transcript_id}")
+async def transcript_info(transcript_id: str):
+    with _open_transcript(transcript_id) as store:
+        return dict(store.summary(), transcript_id=transcript_id)
+
+
+@app.get("/transcripts/{transcript_id}/segments")
+async def transcript_segments(
+    transcript_id: str,
+    start: Optional[float] = Query(None, description="Seconds; segments ending after this"),
+    end: Optional[float] = Query(None, description="Seconds; segments starting before this"),
+    words: bool = Query(False, description="Include per-word timings when stored"),
+):
+    """Segments overlapping the [start, end] time range."""
+    with _open_transcript(transcript_id) as store:
+        return {
+            "transcript_id": transcript_id,
+            "segments": store.time_range(start, end, with_words=words),
+        }
+
+
+@app.get("/transcripts/{transcript_id}/search")
+async def transcript_search(
+    transcript_id: str,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Segments containing `q` (case and accent insensitive)."""
+    with _open_transcript(transcript_id) as store:
+        return {
+            "transcript_id": transcript_id,
+            "query": q,
+            "segments": store.search(q, limit=limit),
+        }
+
+
+# ------------------------------------------------------------------
+# Full-text search over generated reports and their transcripts
+# ------------------------------------------------------------------
+@app.get("/search")
+async def search_reports(
+    q: str = Query(..., min_length=1, description="Words to find; word* for prefix search"),
+    limit: int = Query(20, ge=1, le=100),
+    kind: Optional[str] = Query(None, description=f"Only match in one of: {', '.join(search_index.KINDS)}"),
+    meeting_type: Optional[str] = Query(None),
+):
+    """
+    Reports containing every word of `q` (case and accent insensitive),
+    best first, each with the sections / transcript timestamps that match.
+    """
+    try:
+        return await run_in_threadpool(
+            report_index.search, q, limit=limit, kind=kind, meeting_type=meeting_type
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+# ------------------------------------------------------------------
+# Role-dependent routes
+# ------------------------------------------------------------------
+if SERVES_TEXT:
+    app.include_router(text_router)
+if SERVES_AUDIO:
+    app.include_router(audio_router)
@@ -0,0 +1,348 @@
+"""
+AUDIO DECODING MODULE - Cedric's Meeting Report Generator
+Decodes uploaded audio in-process into the 16 kHz mono float32 buffer Whisper expects
+
+Features:
+- Accepts file paths, raw bytes, file-like objects and NumPy buffers
+- Raw PCM (s16le / f32le) and WAV are decoded with NumPy / the wave module,
+  and resampled to 16 kHz band-limited (SciPy's polyphase filter when
+  installed, else a windowed-sinc low-pass in NumPy) so that 44.1 / 48 kHz
+  input does not alias
+- Compressed formats (WebM/Opus, MP3, M4A, ...) are decoded with PyAV (libav
+  linked into the process) - no temp file and no ffmpeg subprocess
+- Falls back to piping bytes through ffmpeg when PyAV is not installed
+- Probes the length of an upload from its header, without decoding it
+
+Requirements:
+    pip install numpy av
+    pip install scipy  (optional: faster, sharper resampling)
+"""
+
+import io
+import math
+import os
+import subprocess
+import wave
+
+
+SAMPLE_RATE = 16000  # Whisper's native rate
+
+# Upload content types / extensions treated as headerless PCM
+PCM_CONTENT_TYPES = ("audio/l16", "audio/pcm", "audio/x-raw", "application/octet-stream+pcm")
+PCM_EXTENSIONS = (".pcm", ".raw")
+PCM_FORMATS = {"s16le": "<i2", "f32le": "<f4"}
+PCM_FORMATS_BYTES = {"s16le": 2, "f32le": 4}
+# Duration estimate of compressed uploads whose header has none (MediaRecorder
+# WebM/Opus and typical MP3 are around 128 kbit/s)
+COMPRESSED_BYTES_PER_SECOND = 16000
+# Anti-aliasing low-pass of the NumPy resampler: taps, and cutoff as a
+# fraction of the target rate's Nyquist frequency
+RESAMPLE_FILTER_TAPS = 101
+RESAMPLE_CUTOFF = 0.9
+# Samples filtered per np.convolve call (bounds the temporary arrays)
+RESAMPLE_BLOCK = 1 << 20
+
+
+class AudioDecodeError(ValueError):
+    """Raised when an upload cannot be decoded to audio samples"""
+
+
+def _positive_int(name, value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise AudioDecodeError(f"Invalid PCM {name}: {value!r}") from None
+    if number <= 0:
+        raise AudioDecodeError(f"Invalid PCM {name}: {value!r} (must be a positive integer)")
+    return number
+
+
+def check_pcm(pcm):
+    """
+    Validate a PCM description (rate and channels positive integers)
+
+    Raises:
+        AudioDecodeError: invalid rate or channel count
+    """
+    pcm['rate'] = _positive_int("rate", pcm.get('rate', SAMPLE_RATE))
+    pcm['channels'] = _positive_int("channels", pcm.get('channels', 1))
+    return pcm
+
+
+def parse_pcm_content_type(content_type):
+    """
+    Parse an RFC 2586 style content type such as ``audio/L16;rate=16000;channels=1``
+
+    Returns:
+        dict or None: {'rate': int, 'channels': int, 'pcm_format': str}
+                      when the content type denotes raw PCM, else None
+
+    Raises:
+        AudioDecodeError: rate or channels not a positive integer
+    """
+    if not content_type:
+        return None
+    media_type, *params = [part.strip() for part in content_type.split(";")]
+    if media_type.lower() not in PCM_CONTENT_TYPES:
+        return None
+
+    options = {'rate': SAMPLE_RATE, 'channels': 1, 'pcm_format': "s16le"}
+    for param in params:
+        key, _, value = param.partition("=")
+        key = key.strip().lower()
+        if key == "rate":
+            options['rate'] = _positive_int("rate", value)
+        elif key == "channels":
+            options['channels'] = _positive_int("channels", value)
+        elif key == "format" and value.strip().lower() in PCM_FORMATS:
+            options['pcm_format'] = value.strip().lower()
+    return options
+
+
+def is_pcm_upload(filename=None, content_type=None):
+    """True when an upload should be interpreted as headerless PCM"""
+    if parse_pcm_content_type(content_type) is not None:
+        return True
+    return os.path.splitext(filename or "")[1].lower() in PCM_EXTENSIONS
+
+
+def load_audio(source, sample_rate=SAMPLE_RATE, pcm=None, allow_truncated=False):
+    """
+    Decode audio from memory (or a path) into a mono float32 NumPy array
+
+    Args:
+        source: str/PathLike path, bytes-like, binary file-like object, or a
+                NumPy array already at `sample_rate` (int16 or float32,
+                shape (n,) or (n, channels))
+        sample_rate: Output sample rate (16 kHz for Whisper)
+        pcm: Optional dict {'rate', 'channels', 'pcm_format'} (see
+             parse_pcm_content_type) - when given, bytes are interpreted
+             as headerless PCM
+        allow_truncated: Return the samples decoded so far instead of failing
+                         when a compressed stream ends abruptly (partial uploads)
+
+    Returns:
+        numpy.ndarray: float32 samples in [-1, 1]
+    """
+    import numpy as np
+
+    if isinstance(source, np.ndarray):
+        return _normalize_array(source)
+
+    if isinstance(source, (str, os.PathLike)):
+        if pcm is not None:
+            with open(source, "rb") as f:
+                return _decode_pcm(f.read(), sample_rate, **pcm)
+        return _decode_compressed(os.fspath(source), sample_rate, allow_truncated)
+
+    if hasattr(source, "read"):
+        source = source.read()
+    data = bytes(source)
+    if not data:
+        raise AudioDecodeError("Empty audio payload")
+
+    if pcm is not None:
+        return _decode_pcm(data, sample_rate, **pcm)
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            return _decode_wav(data, sample_rate)
+        except (wave.Error, AudioDecodeError):
+            pass  # e.g. WAVE_FORMAT_EXTENSIBLE / compressed WAV: let libav handle it
+    return _decode_compressed(data, sample_rate, allow_truncated)
+
+
+def probe_duration(data, pcm=None):
+    """
+    Length in seconds of an upload, read from its header without decoding
+
+    Raw PCM and WAV are measured exactly; compressed containers use the
+    duration libav reads from the header, else a typical bitrate
+    (COMPRESSED_BYTES_PER_SECOND). Used to schedule work before decoding.
+
+    Returns:
+        float or None: None when nothing can be said (empty payload)
+    """
+    if not data:
+        return None
+    if pcm is not None:
+        frame_bytes = PCM_FORMATS_BYTES.get(pcm.get("pcm_format", "s16le"), 2) * pcm.get("channels", 1)
+        return len(data) / (frame_bytes * pcm.get("rate", SAMPLE_RATE))
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                return wav.getnframes() / wav.getframerate()
+        except (wave.Error, EOFError, ZeroDivisionError):
+            pass
+    try:
+        import av
+    except ImportError:
+        av = None
+    if av is not None:
+        try:
+            with av.open(io.BytesIO(data), mode="r") as container:
+                if container.duration:
+                    return container.duration / av.time_base
+        except av.error.FFmpegError:
+            pass
+    return len(data) / COMPRESSED_BYTES_PER_SECOND
+
+
+def _normalize_array(samples):
+    """Convert an in-memory buffer to mono float32 in [-1, 1]"""
+    import numpy as np
+
+    if samples.ndim not in (1, 2):
+        raise AudioDecodeError(f"Expected a 1-D or (n, channels) array, got shape {samples.shape}")
+
+    if samples.dtype == np.int16:
+        samples = samples.astype(np.float32) / 32768.0
+    elif samples.dtype.kind in ("i", "u"):
+        raise AudioDecodeError(f"Unsupported integer sample type: {samples.dtype}")
+    else:
+        samples = samples.astype(np.float32, copy=False)
+
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    return samples
+
+
+def _decode_pcm(data, sample_rate, rate=SAMPLE_RATE, channels=1, pcm_format="s16le"):
+    import numpy as np
+
+    if pcm_format not in PCM_FORMATS:
+        raise AudioDecodeError(f"Unsupported PCM format: {pcm_format}")
+
+    dtype = np.dtype(PCM_FORMATS[pcm_format])
+    frame_bytes = dtype.itemsize * channels
+    usable = len(data) - len(data) % frame_bytes
+    samples = np.frombuffer(data[:usable], dtype=dtype)
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    return _resample(_normalize_array(samples), rate, sample_rate)
+
+
+def _decode_wav(data, sample_rate):
+    import numpy as np
+
+    with wave.open(io.BytesIO(data)) as wav:
+        width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        source_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width != 2:
+        raise AudioDecodeError(f"Unsupported WAV sample width: {width * 8} bits")
+    samples = np.frombuffer(frames, dtype="<i2")
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    return _resample(_normalize_array(samples), source_rate, sample_rate)
+
+
+def _low_pass(samples, cutoff):
+    """Windowed-sinc (Blackman) FIR low-pass; `cutoff` in cycles per sample"""
+    import numpy as np
+
+    taps = np.arange(RESAMPLE_FILTER_TAPS) - (RESAMPLE_FILTER_TAPS - 1) / 2
+    kernel = (np.sinc(2 * cutoff * taps) * np.blackman(RESAMPLE_FILTER_TAPS)).astype(np.float32)
+    kernel /= kernel.sum()
+    half = (RESAMPLE_FILTER_TAPS - 1) // 2
+    padded = np.pad(samples, (half, half))
+    filtered = np.empty(len(samples), dtype=np.float32)
+    for start in range(0, len(samples), RESAMPLE_BLOCK):
+        end = min(start + RESAMPLE_BLOCK, len(samples))
+        filtered[start:end] = np.convolve(padded[start:end + 2 * half], kernel, mode="valid")
+    return filtered
+
+
+def _resample(samples, source_rate, target_rate):
+    """
+    Band-limited resampling (only used for PCM/WAV off 16 kHz): polyphase
+    with SciPy when installed, else low-pass filtering below the target
+    Nyquist frequency followed by linear interpolation
+    """
+    import numpy as np
+
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    try:
+        from scipy.signal import resample_poly
+    except ImportError:
+        pass
+    else:
+        divisor = math.gcd(source_rate, target_rate)
+        return resample_poly(samples, target_rate // divisor, source_rate // divisor).astype(np.float32)
+
+    if target_rate < source_rate:
+        samples = _low_pass(samples, RESAMPLE_CUTOFF * 0.5 * target_rate / source_rate)
+    duration = len(samples) / source_rate
+    target_length = int(round(duration * target_rate))
+    positions = np.linspace(0, len(samples) - 1, num=target_length, dtype=np.float64)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def _decode_compressed(source, sample_rate, allow_truncated=False):
+    """
+    Decode any container/codec libav understands
+
+    `source` is a path or bytes. Uses PyAV in-process when available, else
+    streams the bytes through an ffmpeg pipe (still no temp file).
+    """
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return _decode_with_ffmpeg_pipe(source, sample_rate, allow_truncated)
+    return _decode_with_av(source, sample_rate, allow_truncated)
+
+
+def _decode_with_av(source, sample_rate, allow_truncated=False):
+    import av
+    import numpy as np
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    chunks = []
+    try:
+        with av.open(source, mode="r") as container:
+            if not container.streams.audio:
+                raise AudioDecodeError("No audio stream found in upload")
+            stream = container.streams.audio[0]
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+            # Flush samples buffered inside the resampler
+            for resampled in resampler.resample(None):
+                chunks.append(resampled.to_ndarray().reshape(-1))
+    except av.error.FFmpegError as e:
+        if not (allow_truncated and chunks):
+            raise AudioDecodeError(f"Could not decode audio: {e}") from e
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(chunks).astype(np.float32) / 32768.0
+
+
+def _decode_with_ffmpeg_pipe(source, sample_rate, allow_truncated=False):
+    import numpy as np
+
+    if isinstance(source, (bytes, bytearray)):
+        input_arg, stdin_data = "pipe:0", bytes(source)
+    else:
+        input_arg, stdin_data = source, None
+
+    cmd = ["ffmpeg", "-hide_banner"]
+    if stdin_data is None:
+        cmd.append("-nostdin")
+    cmd += [
+        "-threads", "0",
+        "-i", input_arg,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "-loglevel", "error",
+        "pipe:1",
+    ]
+    completed = subprocess.run(cmd, input=stdin_data, capture_output=True)
+    out = completed.stdout
+    if completed.returncode != 0 and not (allow_truncated and out):
+        raise AudioDecodeError(f"Could not decode audio: {completed.stderr.decode(errors='replace')}")
+    return np.frombuffer(out, dtype=np.int16).astype(np.float32) / 32768.0
@@ -0,0 +1,111 @@
+"""
+ENCODER BENCHMARK - Cedric's Meeting Report Generator
+Eager versus compiled Whisper encoder throughput on CPU
+
+Each measurement runs in a fresh interpreter (compilation caches in memory
+would otherwise hide the restart cost). For every mode of encoder_compile.py
+we report:
+- startup cost: compile / load time plus the first encoder call, with an
+  empty artifact cache (cold) and again with the cache filled (restart)
+- steady-state time per 30-second window and windows per second
+- the largest difference to the eager encoder's output (sanity check)
+
+Usage:
+    python bench_encoder.py                         # base: off, trace, compile
+    python bench_encoder.py --model small --windows 20 --threads 4
+
+Requirements:
+    pip install openai-whisper torch
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+# Runs inside the child interpreter; prints one JSON line
+_CHILD_CODE = r"""
+import json, statistics, sys, time
+import torch
+import model_registry, encoder_compile
+
+mode, model_size, cache_dir, windows, threads = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])
+if threads:
+    torch.set_num_threads(threads)
+model_registry._patch_torch_load()
+import whisper
+
+model = whisper.load_model(model_size, device="cpu")
+torch.manual_seed(0)
+mel = torch.randn(1, model.dims.n_mels, encoder_compile.N_FRAMES)
+with torch.no_grad():
+    reference = model.encoder(mel)
+
+started = time.perf_counter()
+info = encoder_compile.compile_encoder(model, model_size, "cpu", mode=mode, cache_dir=cache_dir)
+with torch.no_grad():
+    output = model.encoder(mel)
+    startup = time.perf_counter() - started
+    timings = []
+    for _ in range(windows):
+        t = time.perf_counter()
+        model.encoder(mel)
+        timings.append(time.perf_counter() - t)
+
+print(json.dumps(dict(
+    startup_seconds=startup,
+    cached=bool(info and info['cached']),
+    window_ms=statistics.median(timings) * 1000,
+    max_abs_diff=float((output - reference).abs().max()),
+    threads=torch.get_num_threads(),
+)))
+"""
+
+
+def run(mode, model_size, cache_dir, windows, threads):
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHILD_CODE, mode, model_size, cache_dir, str(windows), str(threads)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, TRACE_CONSOLE="0"),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"mode={mode} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--modes", nargs="+", default=["off", "trace", "compile"])
+    parser.add_argument("--windows", type=int, default=10, help="Timed encoder calls per mode")
+    parser.add_argument("--threads", type=int, default=0, help="torch threads (0 = torch default)")
+    args = parser.parse_args()
+
+    rows = []
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold = run(mode, args.model, cache_dir, args.windows, args.threads)
+            # Second process on the same cache: what a restart pays
+            warm = run(mode, args.model, cache_dir, args.windows, args.threads) if mode != "off" else cold
+        rows.append((mode, cold, warm))
+
+    eager_ms = next((cold['window_ms'] for mode, cold, _ in rows if mode == "off"), None)
+    print(f"model={args.model} threads={rows[0][1]['threads']}")
+    print(f"{'mode':<8} {'cold_s':>7} {'restart_s':>9} {'ms/window':>10} {'win/s':>7} {'speedup':>8} {'max_diff':>9}")
+    for mode, cold, warm in rows:
+        window_ms = statistics.median([cold['window_ms'], warm['window_ms']])
+        speedup = f"{eager_ms / window_ms:.2f}x" if eager_ms else "-"
+        print(
+            f"{mode:<8} {cold['startup_seconds']:>7.2f} {warm['startup_seconds']:>9.2f} {window_ms:>10.1f} "
+            f"{1000 / window_ms:>7.2f} {speedup:>8} {warm['max_abs_diff']:>9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+LOAD TEST - Cedric's Meeting Report Generator
+Drives the report API with concurrent traffic to find what one container sustains
+
+A server (uvicorn api_server:app, or serve.py with N workers) is started
+against a local fake Gemini (fake_gemini.py) whose latency, jitter and
+error rates are tunable; --url targets a server that is already running
+instead. Each scenario sends one kind of request, with synthetic audio
+and transcripts made unique per request (identical requests would be
+deduplicated):
+    transcribe   POST /transcribe       synthetic clip
+    text         POST /generate/text    synthetic transcript
+    audio        POST /generate/audio   synthetic clip, full pipeline
+
+Load is closed-loop (`concurrency` clients sending back to back) or, with
+a `rate`, open-loop (Poisson arrivals at `rate` requests per second,
+latency counted from the scheduled send time so a saturated server shows
+up as latency, not as a lower offered load).
+
+Per scenario we report throughput, latency p50 / p95 / p99 of successful
+requests, errors by status and error rate, the peak memory of the server
+processes (RSS and PSS sampled from /proc; with --url, the peak RSS that
+/health reports) and the Gemini calls the fake received. The started
+server inherits the environment, including the Gemini quotas of the
+dispatcher (GEMINI_RPM=10 by default): raise them to measure the container
+rather than the quota.
+
+Scenarios take per-scenario overrides of the command-line defaults:
+    python bench_load.py --scenarios text transcribe audio --concurrency 8 --duration 60
+    python bench_load.py --scenarios text:rate=5 text:rate=10 --gemini-latency 2 --gemini-error-rate 0.05
+    python bench_load.py --scenarios "audio:concurrency=2,seconds=600,requests=10" --model small
+    python bench_load.py --url http://127.0.0.1:8000 --scenarios text --no-fake-gemini
+
+Only uses the standard library (the server needs the api_server requirements).
+"""
+
+import argparse
+import collections
+import json
+import os
+import random
+import statistics
+import struct
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_gemini
+import process_stats
+from bench_workers import _children, start_server, synth_wav, wait_ready
+
+
+ENDPOINTS = {"transcribe": "/transcribe", "text": "/generate/text", "audio": "/generate/audio"}
+# Scenario settings that can be overridden per scenario (name:key=value,...)
+SCENARIO_KEYS = {"concurrency": int, "rate": float, "duration": float, "requests": int,
+                 "seconds": float, "words": int, "format": str}
+MEMORY_SAMPLE_SECONDS = 0.5
+
+_WORDS = (
+    "patient tumeur chimiothérapie radiothérapie biopsie scanner IRM métastase protocole "
+    "traitement dose cycle tolérance bilan réponse marqueur chirurgie exérèse ganglion "
+    "récidive surveillance oncologue radiologue pathologiste décision dossier réunion"
+).split()
+_SPEAKERS = ("Dr Martin", "Dr Bernard", "Dr Petit", "Infirmière Laurent")
+
+
+def synth_transcript(words, seed=0):
+    """A meeting-like French transcript of about `words` words"""
+    rng = random.Random(seed)
+    lines = []
+    while sum(len(line.split()) for line in lines) < words:
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 18)))
+        lines.append(f"{rng.choice(_SPEAKERS)} : {sentence.capitalize()}.")
+    return "\n".join(lines)
+
+
+def _unique_audio(wav, index):
+    """The same clip with its last samples replaced by `index` (defeats deduplication)"""
+    return wav[:-4] + struct.pack("<I", index & 0xFFFFFFFF)
+
+
+def _encode_form(fields, files=()):
+    """multipart/form-data body of text `fields` and (name, filename, bytes) `files`"""
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for name, value in fields.items():
+        body += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    for name, filename, payload in files:
+        body += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        body += payload + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return bytes(body), f"multipart/form-data; boundary={boundary}"
+
+
+class Scenario:
+    """One kind of request and the load to send"""
+
+    def __init__(self, spec, defaults):
+        name, _, overrides = spec.partition(":")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown scenario {name!r} (choose from {', '.join(ENDPOINTS)})")
+        self.name = name
+        self.label = spec
+        settings = {key: getattr(defaults, key) for key in SCENARIO_KEYS}
+        for item in filter(None, overrides.split(",")):
+            key, _, value = item.partition("=")
+            if key not in SCENARIO_KEYS:
+                raise ValueError(f"Unknown setting {key!r} in {spec!r} (choose from {', '.join(SCENARIO_KEYS)})")
+            settings[key] = SCENARIO_KEYS[key](value)
+        self.__dict__.update(settings)
+        self.model = defaults.model
+        self._wav = synth_wav(self.seconds) if name != "text" else None
+
+    def request(self, base_url, index):
+        """urllib Request number `index` of this scenario"""
+        fields = {"language": "fr"}
+        if self.name == "text":
+            fields.update(text=synth_transcript(self.words, seed=index), format=self.format)
+            body, content_type = _encode_form(fields)
+        else:
+            fields["whisper_model"] = self.model
+            if self.name == "audio":
+                fields["format"] = self.format
+            body, content_type = _encode_form(fields, [("audio", f"load{index}.wav", _unique_audio(self._wav, index))])
+        return urllib.request.Request(f"{base_url}{ENDPOINTS[self.name]}", data=body,
+                                      headers={"Content-Type": content_type})
+
+
+def _send(request, timeout):
+    """(status, seconds); status 0 = no HTTP response (connection error / timeout)"""
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - started
+
+
+class MemorySampler(threading.Thread):
+    """Peak memory of the server processes while a scenario runs"""
+
+    def __init__(self, server_pid=None, base_url=None):
+        super().__init__(daemon=True)
+        self.server_pid = server_pid
+        self.base_url = base_url
+        self.peak = {'rss_mb': 0.0, 'pss_mb': 0.0}
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        if self.server_pid is not None:
+            processes = [self.server_pid] + _children(self.server_pid)
+            stats = [process_stats.memory_breakdown(pid) for pid in processes]
+            return {
+                'rss_mb': sum(s.get('rss_mb', 0.0) for s in stats),
+                'pss_mb': sum(s.get('pss_mb', 0.0) for s in stats),
+            }
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/health", timeout=5) as response:
+                process = json.load(response)["process"]
+            return {'rss_mb': process.get('peak_rss_mb', 0.0)}
+        except (urllib.error.URLError, OSError, KeyError, ValueError):
+            return {}
+
+    def run(self):
+        while not self._stop_event.is_set():
+            for key, value in self.sample().items():
+                self.peak[key] = max(self.peak.get(key, 0.0), value)
+            self._stop_event.wait(MEMORY_SAMPLE_SECONDS)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return {key: round(value, 1) for key, value in self.peak.items() if value}
+
+
+def run_closed(scenario, base_url, timeout, first_index):
+    """`concurrency` clients back to back until `requests` or `duration` is reached"""
+    results = []
+    counter = iter(range(first_index, first_index + scenario.requests if scenario.requests else 2**62))
+    lock = threading.Lock()
+    deadline = time.monotonic() + scenario.duration
+
+    def client():
+        while time.monotonic() < deadline:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            results.append(_send(scenario.request(base_url, index), timeout))
+
+    threads = [threading.Thread(target=client) for _ in range(scenario.concurrency)]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    return results
+
+
+def run_open(scenario, base_url, timeout, first_index, max_in_flight):
+    """Poisson arrivals at `rate` per second until `requests` or `duration` is reached"""
+    rng = random.Random(first_index)
+    results = []
+
+    def timed(request, scheduled):
+        status, _ = _send(request, timeout)
+        # From the scheduled send time: waiting for a free client counts
+        results.append((status, time.perf_counter() - scheduled))
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        started = time.perf_counter()
+        next_send = started
+        for sent, index in enumerate(range(first_index, first_index + 2**62)):
+            if (scenario.requests and sent >= scenario.requests) or next_send - started >= scenario.duration:
+                break
+            time.sleep(max(0.0, next_send - time.perf_counter()))
+            pool.submit(timed, scenario.request(base_url, index), next_send)
+            next_send += rng.expovariate(scenario.rate)
+    return results
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def run_scenario(scenario, base_url, args, server_pid, fake, first_index):
+    for index in range(args.warmup):
+        _send(scenario.request(base_url, first_index - 1 - index), args.timeout)
+
+    gemini_before = fake.stats() if fake is not None else None
+    sampler = MemorySampler(server_pid, base_url)
+    sampler.start()
+    started = time.perf_counter()
+    if scenario.rate:
+        results = run_open(scenario, base_url, args.timeout, first_index, args.max_in_flight)
+    else:
+        results = run_closed(scenario, base_url, args.timeout, first_index)
+    elapsed = time.perf_counter() - started
+    memory = sampler.stop()
+
+    latencies = sorted(seconds for status, seconds in results if status == 200)
+    errors = collections.Counter(str(status) for status, _ in results if status != 200)
+    report = {
+        'scenario': scenario.label,
+        'mode': f"rate {scenario.rate:g}/s" if scenario.rate else f"{scenario.concurrency} clients",
+        'requests': len(results),
+        'ok': len(latencies),
+        'errors': dict(errors),
+        'error_rate': round(1 - len(latencies) / len(results), 4) if results else None,
+        'req_per_s': round(len(latencies) / elapsed, 3),
+        'p50_s': round(statistics.median(latencies), 3) if latencies else None,
+        'p95_s': round(_percentile(latencies, 0.95), 3) if latencies else None,
+        'p99_s': round(_percentile(latencies, 0.99), 3) if latencies else None,
+        'peak_rss_mb': memory.get('rss_mb'),
+        'peak_pss_mb': memory.get('pss_mb'),
+    }
+    if scenario.name != "text":
+        report['audio_x_realtime'] = round(len(latencies) * scenario.seconds / elapsed, 2)
+    if fake is not None:
+        gemini_after = fake.stats()
+        report['gemini'] = {key: gemini_after[key] - gemini_before[key]
+                            for key in ("generate_calls", "errors", "rate_limited")}
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--scenarios", nargs="+", default=["text", "transcribe", "audio"],
+                        help="name[:key=value,...] with name in transcribe, text, audio")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients of closed-loop scenarios")
+    parser.add_argument("--rate", type=float, default=0.0, help="Requests per second (open loop; 0 = closed loop)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per scenario")
+    parser.add_argument("--requests", type=int, default=0, help="Requests per scenario (0 = until --duration)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Length of the synthetic clip")
+    parser.add_argument("--words", type=int, default=1500, help="Length of the synthetic transcript")
+    parser.add_argument("--format", default="json", help="Report format of text / audio scenarios")
+    parser.add_argument("--model", default="base", help="Whisper model of audio scenarios")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured requests before each scenario")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Client threads of open-loop scenarios")
+    parser.add_argument("--url", help="Load this running server instead of starting one")
+    parser.add_argument("--server", default="uvicorn:1", help="Server to start: uvicorn:N or serve:N workers")
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--no-fake-gemini", action="store_true", help="Use the real Gemini API (GEMINI_API_KEY)")
+    parser.add_argument("--gemini-port", type=int, default=8089)
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="Fake Gemini seconds per call")
+    parser.add_argument("--gemini-jitter", type=float, default=0.5, help="Extra random seconds per call, up to")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0, help="Fraction of calls failing with 500")
+    parser.add_argument("--gemini-rate-limit-rate", type=float, default=0.0,
+                        help="Fraction of calls failing with 429")
+    parser.add_argument("--json", action="store_true", help="Print the full results as JSON")
+    args = parser.parse_args()
+
+    scenarios = [Scenario(spec, args) for spec in args.scenarios]
+
+    fake = gemini_server = None
+    env = dict(os.environ)
+    if not args.no_fake_gemini:
+        gemini_server, fake = fake_gemini.serve(
+            port=args.gemini_port, base_latency=args.gemini_latency, jitter=args.gemini_jitter,
+            error_rate=args.gemini_error_rate, rate_limit_rate=args.gemini_rate_limit_rate,
+        )
+        env.update(GEMINI_API_ENDPOINT=f"http://127.0.0.1:{args.gemini_port}",
+                   GEMINI_API_KEY=env.get("GEMINI_API_KEY", "fake"))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        base_url = args.url.rstrip("/") if args.url else f"http://127.0.0.1:{args.port}"
+        try:
+            if not args.url:
+                env.update(OUTPUT_DIR=os.path.join(tmp, "output"), UPLOAD_DIR=os.path.join(tmp, "uploads"))
+                audio = any(scenario.name != "text" for scenario in scenarios)
+                server, workers = start_server(args.server, args.port, args.model if audio else "", env)
+                wait_ready(base_url, workers, args.startup_timeout)
+            for number, scenario in enumerate(scenarios):
+                print(f"▶ {scenario.label} ...", flush=True)
+                results.append(run_scenario(scenario, base_url, args, server.pid if server else None,
+                                            fake, first_index=(number + 1) * 10**6))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+            if gemini_server is not None:
+                gemini_server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<24} {'mode':<12} {'ok':>9} {'err%':>6} {'req/s':>7} {'p50_s':>7} {'p95_s':>7} "
+          f"{'p99_s':>7} {'rss_mb':>8} {'pss_mb':>8}")
+    for r in results:
+        error_rate = f"{100 * r['error_rate']:.1f}" if r['error_rate'] is not None else "-"
+        print(
+            f"{r['scenario']:<24} {r['mode']:<12} {r['ok']:>4}/{r['requests']:<4} {error_rate:>6} "
+            f"{r['req_per_s']:>7} {r['p50_s']!s:>7} {r['p95_s']!s:>7} {r['p99_s']!s:>7} "
+            f"{r['peak_rss_mb']!s:>8} {r['peak_pss_mb']!s:>8}"
+        )
+        if r['errors']:
+            print(f"{'':<24} errors by status: {r['errors']}  (0 = no response)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+STARTUP BENCHMARK - Cedric's Meeting Report Generator
+Measures startup time and memory of the API server for each SERVICE_ROLE
+
+Each role is started in a fresh interpreter so imports are not shared
+between measurements. For every role we report:
+- import time of api_server (all endpoint modules the role needs)
+- time until the configured Whisper models are loaded and warm (audio roles)
+- resident / peak memory and which heavy modules ended up imported
+
+Usage:
+    python bench_startup.py                      # all roles, no model preload
+    python bench_startup.py --preload small      # also load + warm 'small'
+    python bench_startup.py --roles text --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+# Runs inside the child interpreter; prints one JSON line
+_CHILD_CODE = r"""
+import json, time
+started = time.perf_counter()
+import api_server
+imported = time.perf_counter()
+
+import model_registry, process_stats
+if api_server.PRELOAD_MODELS:
+    model_registry.preload(api_server.PRELOAD_MODELS, warm=api_server.WARMUP_ENABLED)
+ready = time.perf_counter()
+
+# Import the pipeline modules the role's endpoints would use on first request
+if api_server.SERVES_TEXT:
+    import cedric_complete_integration
+first_request_ready = time.perf_counter()
+
+print(json.dumps(dict(
+    import_seconds=imported - started,
+    ready_seconds=ready - started,
+    first_request_seconds=first_request_ready - started,
+    **process_stats.snapshot(),
+)))
+"""
+
+
+def run_role(role, preload, runs):
+    """Start a fresh interpreter `runs` times for this role and collect stats"""
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            SERVICE_ROLE=role,
+            WHISPER_PRELOAD_MODELS=preload,
+            OUTPUT_DIR=os.path.join(tmp, "output"),
+            UPLOAD_DIR=os.path.join(tmp, "uploads"),
+        )
+        for _ in range(runs):
+            completed = subprocess.run(
+                [sys.executable, "-c", _CHILD_CODE],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f"role={role} failed:\n{completed.stderr}")
+            samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def summarize(role, samples):
+    def median(key):
+        return statistics.median(sample[key] for sample in samples)
+
+    return {
+        'role': role,
+        'runs': len(samples),
+        'import_s': round(median('import_seconds'), 3),
+        'ready_s': round(median('ready_seconds'), 3),
+        'first_request_s': round(median('first_request_seconds'), 3),
+        'rss_mb': round(median('rss_mb'), 1),
+        'peak_rss_mb': round(median('peak_rss_mb'), 1),
+        'heavy_modules': samples[-1]['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--roles", nargs="+", default=["text", "audio", "all"])
+    parser.add_argument("--preload", default="", help="WHISPER_PRELOAD_MODELS for audio roles")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'role':<6} {'import_s':>9} {'ready_s':>8} {'1st_req_s':>9} {'rss_mb':>8} {'peak_mb':>8}  heavy modules")
+    for role in args.roles:
+        stats = summarize(role, run_role(role, args.preload, args.runs))
+        print(
+            f"{stats['role']:<6} {stats['import_s']:>9} {stats['ready_s']:>8} "
+            f"{stats['first_request_s']:>9} {stats['rss_mb']:>8} {stats['peak_rss_mb']:>8}  "
+            f"{', '.join(stats['heavy_modules']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+DECODING TIER BENCHMARK - Cedric's Meeting Report Generator
+Real-time factor and word error rate of each Whisper decoding tier
+
+Runs every tier of decoding_tiers.py over a set of recordings with reference
+transcripts and reports, per tier:
+- RTF: processing seconds per audio second (lower is faster; < 1 is faster
+  than real time), measured after a warm-up inference
+- WER: word error rate against the references, after normalisation
+  (lowercase, punctuation removed, accents kept)
+- TER: error rate on the oncology terms of the references (lexicon words
+  missing from the transcript)
+- both again after the lexicon correction pass (medical_lexicon.py), and
+  the time that pass takes: compare e.g. preview + correction with archive
+
+The data directory holds pairs of files with the same stem:
+    rcp_01.wav   rcp_01.txt
+    rcp_02.webm  rcp_02.txt
+
+Usage:
+    python bench_tiers.py --data recordings/
+    python bench_tiers.py --data recordings/ --tiers fast standard --language fr
+
+Requirements:
+    pip install openai-whisper numpy
+"""
+
+import argparse
+import collections
+import json
+import re
+import time
+import unicodedata
+from pathlib import Path
+
+import audio_io
+import decoding_tiers
+import medical_lexicon
+import model_registry
+
+
+_WORD_RE = re.compile(r"[\w'-]+", re.UNICODE)
+
+
+def normalize(text):
+    """Words of a transcript for WER scoring"""
+    text = unicodedata.normalize("NFC", text.lower()).replace("’", "'")
+    return _WORD_RE.findall(text)
+
+
+def edit_distance(reference, hypothesis):
+    """Word-level Levenshtein distance (substitutions + deletions + insertions)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(
+                previous[j] + 1,                            # deletion
+                current[j - 1] + 1,                         # insertion
+                previous[j - 1] + (ref_word != hyp_word),   # substitution
+            ))
+        previous = current
+    return previous[-1]
+
+
+def term_errors(reference, hypothesis, lexicon):
+    """(lexicon terms of the reference missing from the hypothesis, terms in the reference)"""
+    terms = collections.Counter(word for word in reference if word in lexicon)
+    found = collections.Counter(hypothesis)
+    return sum(max(0, count - found[word]) for word, count in terms.items()), sum(terms.values())
+
+
+def load_dataset(data_dir):
+    """[(name, samples, reference_text)] for every audio file with a .txt reference"""
+    items = []
+    for reference_path in sorted(Path(data_dir).glob("*.txt")):
+        audio_paths = [p for p in reference_path.parent.glob(f"{reference_path.stem}.*") if p.suffix != ".txt"]
+        if not audio_paths:
+            continue
+        samples = audio_io.load_audio(str(audio_paths[0]))
+        items.append((reference_path.stem, samples, reference_path.read_text(encoding="utf-8")))
+    if not items:
+        raise SystemExit(f"No audio / .txt pairs found in {data_dir}")
+    return items
+
+
+def bench_tier(tier, items, language, whisper_model=None):
+    from cedric_file1 import MeetingTranscriber
+
+    tier, model_size, decoding = decoding_tiers.resolve(tier, whisper_model)
+    model_registry.warm_up(model_size)
+    transcriber = MeetingTranscriber(model_size=model_size)
+    lexicon = medical_lexicon.for_prompt(transcriber.MEDICAL_PROMPT)
+
+    audio_seconds = processing_seconds = correction_seconds = 0.0
+    errors = corrected_errors = reference_words = 0
+    term_misses = corrected_term_misses = reference_terms = 0
+    files = []
+    for name, samples, reference in items:
+        started = time.perf_counter()
+        result = transcriber.transcribe_audio_file(samples, language=language, decoding=decoding,
+                                                   correct_terms=False)
+        seconds = time.perf_counter() - started
+        if not result['success']:
+            raise RuntimeError(f"{tier} / {name}: {result['error']}")
+        started = time.perf_counter()
+        corrected, _ = lexicon.correct(result['transcription'])
+        correction_seconds += time.perf_counter() - started
+
+        ref_words = normalize(reference)
+        hyp_words, corrected_words = normalize(result['transcription']), normalize(corrected)
+        distance = edit_distance(ref_words, hyp_words)
+        corrected_distance = edit_distance(ref_words, corrected_words)
+        misses, terms = term_errors(ref_words, hyp_words, lexicon)
+        corrected_misses, _ = term_errors(ref_words, corrected_words, lexicon)
+        duration = len(samples) / audio_io.SAMPLE_RATE
+        audio_seconds += duration
+        processing_seconds += seconds
+        errors += distance
+        corrected_errors += corrected_distance
+        reference_words += len(ref_words)
+        term_misses += misses
+        corrected_term_misses += corrected_misses
+        reference_terms += terms
+        files.append({
+            'file': name,
+            'rtf': round(seconds / duration, 3),
+            'wer': round(distance / max(1, len(ref_words)), 4),
+            'wer_corrected': round(corrected_distance / max(1, len(ref_words)), 4),
+            'ter': round(misses / max(1, terms), 4),
+            'ter_corrected': round(corrected_misses / max(1, terms), 4),
+        })
+
+    return {
+        'tier': tier,
+        'model': model_size,
+        'audio_seconds': round(audio_seconds, 1),
+        'rtf': round(processing_seconds / audio_seconds, 3),
+        'wer': round(errors / max(1, reference_words), 4),
+        'wer_corrected': round(corrected_errors / max(1, reference_words), 4),
+        'ter': round(term_misses / max(1, reference_terms), 4),
+        'ter_corrected': round(corrected_term_misses / max(1, reference_terms), 4),
+        'correction_ms': round(correction_seconds * 1000, 1),
+        'files': files,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--data", required=True, help="Directory of audio files with .txt references")
+    parser.add_argument("--tiers", nargs="+", default=list(decoding_tiers.TIERS))
+    parser.add_argument("--language", default="fr")
+    parser.add_argument("--whisper-model", help="Run every tier with this model instead of the tier's")
+    parser.add_argument("--json", action="store_true", help="Print the full results as JSON")
+    args = parser.parse_args()
+
+    items = load_dataset(args.data)
+    results = [bench_tier(tier, items, args.language, args.whisper_model) for tier in args.tiers]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(items)} files, {results[0]['audio_seconds']} s of audio")
+    print(f"{'tier':<9} {'model':<8} {'rtf':>7} {'wer':>7} {'ter':>7}   "
+          f"{'wer+lex':>7} {'ter+lex':>7} {'lex_ms':>7}")
+    for r in results:
+        print(f"{r['tier']:<9} {r['model']:<8} {r['rtf']:>7} {r['wer'] * 100:>6.1f}% {r['ter'] * 100:>6.1f}%   "
+              f"{r['wer_corrected'] * 100:>6.1f}% {r['ter_corrected'] * 100:>6.1f}% {r['correction_ms']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+CPU TOPOLOGY BENCHMARK - Cedric's Meeting Report Generator
+Throughput and latency of CPU_TOPOLOGY settings under mixed Whisper / PDF / API load
+
+For every topology a server is started (uvicorn api_server:app, or serve.py
+with N workers) against the fake Gemini, with CPU_TOPOLOGY set, and loaded
+with three kinds of traffic at the same time:
+    transcribe  closed-loop POST /transcribe clients (decoding + Whisper)
+    report      closed-loop POST /generate/text clients, format=pdf (Gemini + ReportLab)
+    probe       GET /health every --probe-interval seconds: how fast the event loop answers
+
+Per topology we report the Whisper throughput (audio seconds per second)
+and latency, the report throughput and latency, and the probe latency;
+the first topology (`off`, the default, unless told otherwise) is the
+baseline the others are compared with. GEMINI_RPM defaults to 6000 in the
+started servers so that the Gemini quota does not cap the report traffic.
+
+Usage:
+    python bench_topology.py --topologies off auto "api=0;whisper=1-6;render=7" --duration 120
+    python bench_topology.py --server serve:2 --topologies off auto --model small --transcribe-clients 4
+
+Only uses the standard library (the server needs the api_server requirements).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_gemini
+from bench_load import Scenario, _percentile, _send, run_closed
+from bench_workers import start_server, wait_ready
+
+
+def probe(base_url, interval, duration, timeout):
+    """Latencies of GET /health sent every `interval` seconds for `duration` seconds"""
+    latencies = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        status, seconds = _send(urllib.request.Request(f"{base_url}/health"), timeout)
+        if status == 200:
+            latencies.append(seconds)
+        time.sleep(interval)
+    return latencies
+
+
+def _latencies(results):
+    return sorted(seconds for status, seconds in results if status == 200)
+
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
+
+
+def bench(topology, args, env):
+    with tempfile.TemporaryDirectory() as tmp:
+        server_env = dict(env, CPU_TOPOLOGY=topology,
+                          OUTPUT_DIR=os.path.join(tmp, "output"), UPLOAD_DIR=os.path.join(tmp, "uploads"))
+        server, workers = start_server(args.server, args.port, args.model, server_env)
+        base_url = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(base_url, workers, args.startup_timeout)
+            with urllib.request.urlopen(f"{base_url}/health", timeout=10) as response:
+                cpu = json.load(response).get("cpu")
+
+            transcribe = Scenario(f"transcribe:concurrency={args.transcribe_clients}", args)
+            report = Scenario(f"text:concurrency={args.report_clients},format=pdf", args)
+            # First-call costs (model warm-up per worker, fonts, caches) are not throughput
+            for index in range(workers):
+                _send(transcribe.request(base_url, index), args.timeout)
+                _send(report.request(base_url, index), args.timeout)
+
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                started = time.perf_counter()
+                transcribed = pool.submit(run_closed, transcribe, base_url, args.timeout, 10**6)
+                reported = pool.submit(run_closed, report, base_url, args.timeout, 2 * 10**6)
+                probed = pool.submit(probe, base_url, args.probe_interval, args.duration, args.timeout)
+                transcribed, reported, probed = transcribed.result(), reported.result(), probed.result()
+                elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    whisper = _latencies(transcribed)
+    reports = _latencies(reported)
+    return {
+        'topology': topology,
+        'cpu': cpu,
+        'transcribe_ok': f"{len(whisper)}/{len(transcribed)}",
+        'audio_x_realtime': round(len(whisper) * args.seconds / elapsed, 2),
+        'transcribe_p50_s': _round(statistics.median(whisper) if whisper else None),
+        'transcribe_p95_s': _round(_percentile(whisper, 0.95)),
+        'report_ok': f"{len(reports)}/{len(reported)}",
+        'reports_per_s': round(len(reports) / elapsed, 3),
+        'report_p50_s': _round(statistics.median(reports) if reports else None),
+        'report_p95_s': _round(_percentile(reports, 0.95)),
+        'probe_p50_ms': _round(statistics.median(probed) * 1000 if probed else None, 1),
+        'probe_p99_ms': _round(_percentile(probed, 0.99) * 1000 if probed else None, 1),
+    }
+
+
+def _change(value, baseline):
+    if value is None or not baseline:
+        return "-"
+    return f"{100 * (value - baseline) / baseline:+.0f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--topologies", nargs="+", default=["off", "auto"],
+                        help="CPU_TOPOLOGY values to compare, the first is the baseline")
+    parser.add_argument("--server", default="uvicorn:1", help="Server to start: uvicorn:N or serve:N workers")
+    parser.add_argument("--model", default="base", help="Whisper model of the transcriptions")
+    parser.add_argument("--transcribe-clients", type=int, default=2)
+    parser.add_argument("--report-clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load per topology")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Length of the synthetic clip")
+    parser.add_argument("--words", type=int, default=1500, help="Length of the synthetic transcript")
+    parser.add_argument("--probe-interval", type=float, default=0.2)
+    parser.add_argument("--timeout", type=float, default=900.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--port", type=int, default=8797)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--gemini-port", type=int, default=8089)
+    parser.add_argument("--gemini-latency", type=float, default=1.0, help="Fake Gemini seconds per call")
+    parser.add_argument("--json", action="store_true", help="Print the full results as JSON")
+    # Scenario settings fixed by this benchmark (see bench_load.Scenario)
+    parser.set_defaults(concurrency=1, rate=0.0, requests=0, format="pdf")
+    args = parser.parse_args()
+
+    gemini_server, _ = fake_gemini.serve(port=args.gemini_port, base_latency=args.gemini_latency)
+    env = dict(os.environ, GEMINI_API_ENDPOINT=f"http://127.0.0.1:{args.gemini_port}",
+               GEMINI_API_KEY=os.environ.get("GEMINI_API_KEY", "fake"),
+               GEMINI_RPM=os.environ.get("GEMINI_RPM", "6000"))
+    results = []
+    try:
+        for topology in args.topologies:
+            print(f"▶ CPU_TOPOLOGY={topology} ...", flush=True)
+            results.append(bench(topology, args, env))
+    finally:
+        gemini_server.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = results[0]
+    print(f"{'topology':<28} {'x_rt':>6} {'vs':>5} {'tr_p50':>7} {'tr_p95':>7} {'rep/s':>7} {'vs':>5} "
+          f"{'rep_p50':>7} {'rep_p95':>7} {'api_p50':>8} {'api_p99':>8}")
+    for r in results:
+        print(
+            f"{r['topology']:<28} {r['audio_x_realtime']:>6} {_change(r['audio_x_realtime'], baseline['audio_x_realtime']):>5} "
+            f"{r['transcribe_p50_s']!s:>7} {r['transcribe_p95_s']!s:>7} "
+            f"{r['reports_per_s']:>7} {_change(r['reports_per_s'], baseline['reports_per_s']):>5} "
+            f"{r['report_p50_s']!s:>7} {r['report_p95_s']!s:>7} {r['probe_p50_ms']!s:>8} {r['probe_p99_ms']!s:>8}"
+        )
+        if r['cpu'] and r['cpu'].get('cores'):
+            print(f"{'':<28} cores: {r['cpu']['cores']}, {r['cpu']['whisper_threads']} Whisper threads")
+    print("x_rt: audio seconds transcribed per second; tr / rep: transcribe / report latency (s); "
+          "api: GET /health latency (ms)")
+
+
+if __name__ == "__main__":
+    main()
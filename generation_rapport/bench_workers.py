@@ -0,0 +1,219 @@
+"""
+WORKER BENCHMARK - Cedric's Meeting Report Generator
+Compares memory and throughput of single- and multi-worker serving
+
+For every configuration a server is started, waited for until /ready, and
+loaded with concurrent POST /transcribe requests. We report:
+- throughput (requests and audio seconds per second) and latency p50 / p95
+- memory of the server processes: RSS (counts shared pages in every
+  process), PSS (shared pages split between their sharers - the sum is the
+  real footprint) and USS (private pages) per worker
+
+Configurations:
+    serve:1   serve.py with one worker (the single-worker setup)
+    serve:N   serve.py with N forked workers sharing the preloaded weights
+    uvicorn:N uvicorn --workers N (every worker loads its own models)
+
+Usage:
+    python bench_workers.py --model small --configs serve:1 serve:4 uvicorn:4
+    python bench_workers.py --audio meeting.wav --requests 40 --concurrency 8
+
+Only uses the standard library (the servers need the api_server requirements).
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import process_stats
+
+
+def synth_wav(seconds, sample_rate=16000):
+    """A WAV clip of gliding tones (no speech, but Whisper still runs the full decode)"""
+    frames = bytearray()
+    for i in range(int(seconds * sample_rate)):
+        t = i / sample_rate
+        value = 0.3 * math.sin(2 * math.pi * (220 + 40 * math.sin(t)) * t)
+        frames += struct.pack("<h", int(value * 32767))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(frames))
+    return buffer.getvalue()
+
+
+def _multipart(fields, filename, payload):
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for name, value in fields.items():
+        body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n').encode()
+    body += (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="{filename}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    body += payload + f"\r\n--{boundary}--\r\n".encode()
+    return bytes(body), f"multipart/form-data; boundary={boundary}"
+
+
+def _children(pid):
+    """Worker pids of a server process (Linux)"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def start_server(config, port, model, env):
+    kind, workers = config.split(":")
+    if kind == "serve":
+        command = [sys.executable, "serve.py", "--workers", workers, "--port", str(port), "--log-level", "warning"]
+    elif kind == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "api_server:app", "--workers", workers,
+                   "--port", str(port), "--log-level", "warning"]
+    else:
+        raise ValueError(f"Unknown configuration {config!r} (serve:N or uvicorn:N)")
+    return subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(env, WHISPER_PRELOAD_MODELS=model, TRACE_CONSOLE="0"),
+        stdout=subprocess.DEVNULL,
+    ), int(workers)
+
+
+def wait_ready(base_url, workers, timeout):
+    """Wait until /ready answers 200 from `workers` distinct worker processes"""
+    deadline = time.monotonic() + timeout
+    ready_pids = set()
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=5) as response:
+                if response.status == 200:
+                    with urllib.request.urlopen(f"{base_url}/health", timeout=5) as health:
+                        ready_pids.add(json.load(health)["worker"]["pid"])
+                    if len(ready_pids) >= workers:
+                        return
+        except (urllib.error.URLError, OSError, KeyError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server not ready within {timeout} s")
+
+
+def run_load(base_url, payload, filename, model, requests, concurrency):
+    body, content_type = _multipart({"whisper_model": model, "language": "fr"}, filename, payload)
+
+    def one(_):
+        request = urllib.request.Request(
+            f"{base_url}/transcribe", data=body, headers={"Content-Type": content_type}
+        )
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=3600) as response:
+                response.read()
+                ok = response.status == 200
+        except urllib.error.HTTPError:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    return time.perf_counter() - started, results
+
+
+def memory(server_pid):
+    processes = {"parent": process_stats.memory_breakdown(server_pid)}
+    for i, pid in enumerate(_children(server_pid)):
+        processes[f"worker{i}"] = process_stats.memory_breakdown(pid)
+    workers = [stats for name, stats in processes.items() if name != "parent" and stats]
+    return {
+        'total_rss_mb': round(sum(stats.get('rss_mb', 0) for stats in processes.values()), 1),
+        'total_pss_mb': round(sum(stats.get('pss_mb', 0) for stats in processes.values()), 1),
+        'worker_rss_mb': round(statistics.mean(s['rss_mb'] for s in workers), 1) if workers else None,
+        'worker_uss_mb': round(statistics.mean(s['uss_mb'] for s in workers), 1) if workers else None,
+        'processes': processes,
+    }
+
+
+def bench(config, args, payload, filename, audio_seconds, port):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, OUTPUT_DIR=os.path.join(tmp, "output"), UPLOAD_DIR=os.path.join(tmp, "uploads"))
+        server, workers = start_server(config, port, args.model, env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_ready(base_url, workers, args.startup_timeout)
+            # One request per worker first: first-call costs are not throughput
+            run_load(base_url, payload, filename, args.model, workers, workers)
+            seconds, results = run_load(base_url, payload, filename, args.model, args.requests, args.concurrency)
+            mem = memory(server.pid)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        'config': config,
+        'ok': sum(ok for ok, _ in results),
+        'requests': len(results),
+        'req_per_s': round(len(results) / seconds, 3),
+        'audio_x_realtime': round(len(results) * audio_seconds / seconds, 2),
+        'p50_s': round(statistics.median(latencies), 2),
+        'p95_s': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+        **mem,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--configs", nargs="+", default=["serve:1", "serve:4", "uvicorn:4"])
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--audio", help="Audio file to send (default: a synthetic clip)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Length of the synthetic clip")
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--json", action="store_true", help="Print the full results as JSON")
+    args = parser.parse_args()
+
+    if args.audio:
+        with open(args.audio, "rb") as f:
+            payload = f.read()
+        filename = os.path.basename(args.audio)
+        import audio_io
+        audio_seconds = len(audio_io.load_audio(payload)) / audio_io.SAMPLE_RATE
+    else:
+        payload, filename, audio_seconds = synth_wav(args.seconds), "bench.wav", args.seconds
+
+    results = [bench(config, args, payload, filename, audio_seconds, args.port) for config in args.configs]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'config':<11} {'ok':>5} {'req/s':>7} {'x_rt':>6} {'p50_s':>7} {'p95_s':>7} "
+          f"{'rss_sum':>8} {'pss_sum':>8} {'wrk_rss':>8} {'wrk_uss':>8}")
+    for r in results:
+        print(
+            f"{r['config']:<11} {r['ok']:>2}/{r['requests']:<2} {r['req_per_s']:>7} {r['audio_x_realtime']:>6} "
+            f"{r['p50_s']:>7} {r['p95_s']:>7} {r['total_rss_mb']:>8} {r['total_pss_mb']:>8} "
+            f"{r['worker_rss_mb']!s:>8} {r['worker_uss_mb']!s:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
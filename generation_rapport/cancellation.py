@@ -0,0 +1,184 @@
+"""
+CANCELLATION MODULE - Cedric's Meeting Report Generator
+Cooperative cancellation of pipeline runs nobody is waiting for any more
+
+When the user closes the report dialog or navigates away, the request's
+connection is closed but the pipeline kept transcribing and calling Gemini
+for a response nobody would read. Each pipeline run now carries a
+CancelToken, visible to the code it runs through a context variable (also
+inside the threadpool), and checked at cooperative points:
+- before every 30-second Whisper window (a wrapper around model.decode)
+- before the Gemini call
+- before the PDF rendering
+
+A run is cancelled when all the requests waiting for it have gone: their
+client disconnected, or POST /requests/{request_id}/cancel was called.
+Identical requests share one run (request_dedup.SingleFlight), so a
+disconnect only cancels it when no other request still waits; requests
+sent with an Idempotency-Key keep their run going on disconnect, since the
+client will come back for the result.
+
+Only uses the standard library.
+"""
+
+import contextvars
+import functools
+import itertools
+import threading
+from contextlib import contextmanager
+
+
+class Cancelled(Exception):
+    """Raised at a cancellation point of a cancelled run"""
+
+    def __init__(self, stage, reason):
+        super().__init__(f"Cancelled before {stage} ({reason})")
+        self.stage = stage
+        self.reason = reason
+
+    def __reduce__(self):
+        # Raised in track worker processes and sent back to the request
+        return Cancelled, (self.stage, self.reason)
+
+
+class CancelToken:
+    """Cancellation flag of one pipeline run (safe to read from any thread)"""
+
+    def __init__(self, event=None, reason=None):
+        self.reason = reason
+        self.stage = None  # where the run stopped
+        # A multiprocessing Event shares the flag with worker processes
+        self._event = threading.Event() if event is None else event
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+
+_current = contextvars.ContextVar("cancel_token", default=None)
+
+
+@contextmanager
+def bind(token):
+    """Make `token` the current one (tasks and threadpool calls started inside inherit it)"""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def current():
+    """Token of the current run, None outside a run"""
+    return _current.get()
+
+
+def check(stage):
+    """Raise Cancelled if the current run was cancelled; no-op outside a run"""
+    token = _current.get()
+    if token is not None and token.cancelled:
+        if token.stage is None:
+            token.stage = stage
+            registry.record_stage(stage)
+        raise Cancelled(stage, token.reason)
+
+
+def cancellable(fn, stage):
+    """`fn` with a cancellation check before each call"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        check(stage)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+class Run:
+    """One pipeline run and the requests waiting for it"""
+
+    def __init__(self, key):
+        self.key = key          # single-flight key of this run
+        self.token = CancelToken()
+        self.waiters = {}       # request_id -> cancel on disconnect
+
+
+class CancellationRegistry:
+    """
+    Pipeline runs by request fingerprint, and the requests waiting for them
+
+    Used from the event loop only (the tokens are read from worker threads).
+    """
+
+    def __init__(self):
+        self._runs = {}         # fingerprint -> Run
+        self._generations = itertools.count(1)
+        self.counters = {'cancelled_runs': 0, 'disconnected': 0, 'cancel_requests': 0}
+        self.stages = {}        # stage -> runs stopped there
+        self._lock = threading.Lock()
+
+    def join(self, fingerprint, request_id, detach_on_disconnect=True):
+        """
+        Run a request waits for: the one in progress for the same fingerprint,
+        or a new one (also when the one in progress is already cancelled)
+        """
+        run = self._runs.get(fingerprint)
+        if run is None or run.token.cancelled:
+            run = self._runs[fingerprint] = Run(f"{fingerprint}#{next(self._generations)}")
+        run.waiters[request_id] = detach_on_disconnect
+        return run
+
+    def leave(self, fingerprint, run, request_id):
+        """The request got its response (or gave up)"""
+        run.waiters.pop(request_id, None)
+        if not run.waiters and self._runs.get(fingerprint) is run:
+            del self._runs[fingerprint]
+
+    def _detach(self, run, request_id, reason):
+        run.waiters.pop(request_id, None)
+        if not run.waiters and not run.token.cancelled:
+            run.token.cancel(reason)
+            self.counters['cancelled_runs'] += 1
+            print(f"⚠ Pipeline run cancelled ({reason})")
+
+    def disconnected(self, run, request_id):
+        """The client of `request_id` went away: cancel the run if nobody else waits"""
+        if run.waiters.get(request_id):
+            self.counters['disconnected'] += 1
+            self._detach(run, request_id, "client disconnected")
+
+    def cancel_request(self, request_id):
+        """
+        Explicit cancellation (POST /requests/{id}/cancel)
+
+        Returns:
+            bool: False when no run is waited for by this request
+        """
+        found = False
+        for run in list(self._runs.values()):
+            if request_id in run.waiters:
+                found = True
+                self.counters['cancel_requests'] += 1
+                self._detach(run, request_id, "cancelled by client")
+        return found
+
+    def record_stage(self, stage):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0) + 1
+
+    def stats(self):
+        return {
+            'active_runs': len(self._runs),
+            **self.counters,
+            'stopped_before': dict(self.stages),
+        }
+
+
+registry = CancellationRegistry()
+
+
+def stats():
+    return registry.stats()
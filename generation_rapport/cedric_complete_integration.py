@@ -14,6 +14,9 @@ Complete Pipeline:
 import os
 from datetime import datetime
 
+import cancellation
+import tracing
+
 # Import the three modules
 from cedric_file1 import MeetingTranscriber
 from cedric_file2 import MeetingTextStructurer
@@ -34,14 +37,125 @@ class CompleteMeetingReportGenerator:
             organization_name: Organization name for PDF header
             whisper_model: Whisper model size (default: 'base')
         """
-        # Initialize all three components
-        self.transcriber = MeetingTranscriber(model_size=whisper_model)
+        # Initialize all three components (the transcriber lazily, so that
+        # text-only pipelines never import torch / whisper)
+        self.whisper_model = whisper_model
+        self._transcriber = None
         self.structurer = MeetingTextStructurer(api_key=gemini_api_key)
         self.pdf_generator = MeetingReportPDF(organization_name=organization_name)
+    
+    @property
+    def transcriber(self):
+        """Whisper transcriber, created on first audio request"""
+        if self._transcriber is None:
+            self._transcriber = MeetingTranscriber(model_size=self.whisper_model)
+        return self._transcriber
+    
+    def _structure(self, raw_text, meeting_type):
+        """Gemini structuring step, traced"""
+        cancellation.check("structure")
+        with tracing.span("structure", meeting_type=meeting_type, characters=len(raw_text)) as span:
+            result = self.structurer.structure_meeting_text(
+                raw_transcription=raw_text,
+                meeting_type=meeting_type
+            )
+            if not result['success']:
+                span.fail(result['error'])
+        return result
+    
+    def _render(self, structured_data, output_pdf_filename, report_title):
+        """PDF step, traced; returns the PDF path"""
+        cancellation.check("render")
+        with tracing.span("render", output=os.path.basename(output_pdf_filename)):
+            return self.pdf_generator.generate_report(
+                structured_data=structured_data,
+                output_filename=output_pdf_filename,
+                report_title=report_title
+            )
+    
+    def transcribe(self, audio_file_path, language="fr", pcm=None, decoding=None, tier=None):
+        """
+        Step 1 alone (traced): Whisper transcription of a recording
+        
+        Callers holding a Whisper memory reservation (api_server.py) release
+        it after this step, before the Gemini call and the PDF.
+        
+        Returns:
+            dict: MeetingTranscriber.transcribe_audio_file result
+        """
+        with tracing.span("transcribe", whisper_model=self.whisper_model, language=language, tier=tier) as span:
+            transcription_result = self.transcriber.transcribe_audio_file(
+                audio_file_path, language=language, pcm=pcm, decoding=decoding
+            )
+            if transcription_result['success']:
+                span.set(characters=len(transcription_result['transcription']),
+                         detected_language=transcription_result['language'])
+            else:
+                span.fail(transcription_result['error'])
+        return transcription_result
+    
+    def transcribe_tracks(self, tracks, language="fr", decoding=None, tier=None):
+        """
+        Step 1 alone (traced) for one audio track per participant
+        
+        Returns:
+            dict: track_transcription.transcribe_tracks result
+        """
+        from track_transcription import transcribe_tracks
+        
+        with tracing.span("transcribe", whisper_model=self.whisper_model, language=language,
+                          tier=tier, tracks=len(tracks)) as span:
+            transcription_result = transcribe_tracks(
+                tracks, model_size=self.whisper_model, language=language, decoding=decoding
+            )
+            if transcription_result['success']:
+                span.set(characters=len(transcription_result['transcription']),
+                         turns=len(transcription_result['segments']))
+            else:
+                span.fail(transcription_result['error'])
+        return transcription_result
+    
+    def report_from_transcription(
+        self,
+        transcription_result,
+        output_pdf_filename=None,
+        meeting_type="general",
+        render_pdf=True
+    ):
+        """
+        Steps 2 and 3 on the result of transcribe() or transcribe_tracks()
         
-        print("="*60)
-        print("Complete Meeting Report Generator - Ready")
-        print("="*60)
+        Returns:
+            dict: Same as generate_report_from_audio; segments carry a
+                  'speaker' and 'speakers' is set for tracks
+        """
+        if not transcription_result['success']:
+            return {
+                'success': False,
+                'error': f"Transcription failed: {transcription_result['error']}"
+            }
+        
+        raw_transcription = transcription_result['transcription']
+        result = self.generate_report_from_text(
+            raw_text=raw_transcription,
+            output_pdf_filename=output_pdf_filename,
+            meeting_type=meeting_type,
+            report_title=f"{meeting_type.title()} Meeting Report",
+            render_pdf=render_pdf
+        )
+        result['transcription'] = raw_transcription
+        if 'speakers' in transcription_result:
+            result.update(
+                segments=transcription_result['segments'],
+                language=transcription_result['language'],
+                speakers=transcription_result['speakers']
+            )
+        elif result['success']:
+            result.update(
+                segments=transcription_result['full_result'].get('segments', []),
+                language=transcription_result['language']
+            )
+        return result
     
     def generate_report_from_audio(
         self,
@@ -49,101 +163,56 @@ class CompleteMeetingReportGenerator:
         output_pdf_filename=None,
         meeting_type="general",
         whisper_model="base",
-        language="fr"
+        language="fr",
+        pcm=None,
+        decoding=None,
+        tier=None,
+        render_pdf=True
     ):
         """
         Complete pipeline: Audio → PDF Report
         
         Args:
-            audio_file_path: Path to audio recording file
+            audio_file_path: Path to audio recording file, or in-memory audio
+                             (bytes, file-like object or 16 kHz NumPy buffer)
             output_pdf_filename: Output PDF filename (auto-generated if None)
             meeting_type: Type of meeting ("general", "medical", "business", "technical")
             whisper_model: Whisper model size ('tiny', 'base', 'small', 'medium', 'large')
+            pcm: Optional raw PCM description {'rate', 'channels', 'pcm_format'}
+            decoding: Optional Whisper decoding settings (see decoding_tiers.py)
+            tier: Name of the decoding tier, for tracing
+            render_pdf: False to stop after structuring (pdf_path is None)
         
         Returns:
             dict: {
                 'success': bool,
                 'pdf_path': str,
                 'transcription': str,
+                'segments': list (Whisper segments with timestamps),
+                'language': str,
                 'structured_data': dict
             }
         """
-        print("\n" + "="*60)
-        print("STEP 1/3: SPEECH-TO-TEXT TRANSCRIPTION")
-        print("="*60)
-        
         # Step 1: Transcribe audio to text using Whisper
-        transcription_result = self.transcriber.transcribe_audio_file(audio_file_path, language=language)
-        
-        if not transcription_result['success']:
-            return {
-                'success': False,
-                'error': f"Transcription failed: {transcription_result['error']}"
-            }
-        
-        raw_transcription = transcription_result['transcription']
-        print(f"✓ Transcription complete: {len(raw_transcription)} characters")
-        
-        # Step 2: Structure text with Gemini AI
-        print("\n" + "="*60)
-        print("STEP 2/3: TEXT STRUCTURING WITH GEMINI AI")
-        print("="*60)
-        
-        structure_result = self.structurer.structure_meeting_text(
-            raw_transcription=raw_transcription,
-            meeting_type=meeting_type
+        transcription_result = self.transcribe(
+            audio_file_path, language=language, pcm=pcm, decoding=decoding, tier=tier
         )
         
-        if not structure_result['success']:
-            return {
-                'success': False,
-                'error': f"Text structuring failed: {structure_result['error']}",
-                'transcription': raw_transcription
-            }
-        
-        structured_data = structure_result['structured_data']
-        print("✓ Text structured successfully")
-        
-        # Step 3: Generate PDF report
-        print("\n" + "="*60)
-        print("STEP 3/3: PDF REPORT GENERATION")
-        print("="*60)
-        
-        if output_pdf_filename is None:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_pdf_filename = f"meeting_report_{timestamp}.pdf"
-        
-        try:
-            pdf_path = self.pdf_generator.generate_report(
-                structured_data=structured_data,
-                output_filename=output_pdf_filename,
-                report_title=f"{meeting_type.title()} Meeting Report"
-            )
-            
-            print("\n" + "="*60)
-            print("✓ COMPLETE - REPORT GENERATED SUCCESSFULLY")
-            print("="*60)
-            
-            return {
-                'success': True,
-                'pdf_path': pdf_path,
-                'transcription': raw_transcription,
-                'structured_data': structured_data
-            }
-        
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f"PDF generation failed: {str(e)}",
-                'transcription': raw_transcription,
-                'structured_data': structured_data
-            }
+        # Steps 2 and 3: Structure with Gemini AI, generate the PDF report
+        return self.report_from_transcription(
+            transcription_result,
+            output_pdf_filename=output_pdf_filename,
+            meeting_type=meeting_type,
+            render_pdf=render_pdf
+        )
     
     def generate_report_from_text(
         self,
         raw_text,
         output_pdf_filename=None,
-        meeting_type="general"
+        meeting_type="general",
+        report_title=None,
+        render_pdf=True
     ):
         """
         Generate report from already transcribed text (skip Step 1)
@@ -152,19 +221,14 @@ class CompleteMeetingReportGenerator:
             raw_text: Raw meeting transcription text
             output_pdf_filename: Output PDF filename
             meeting_type: Type of meeting
+            report_title: Optional PDF title
+            render_pdf: False to stop after structuring (pdf_path is None)
         
         Returns:
             dict: Result dictionary
         """
-        print("\n" + "="*60)
-        print("STEP 1/2: TEXT STRUCTURING WITH GEMINI AI")
-        print("="*60)
-        
         # Structure text with Gemini
-        structure_result = self.structurer.structure_meeting_text(
-            raw_transcription=raw_text,
-            meeting_type=meeting_type
-        )
+        structure_result = self._structure(raw_text, meeting_type)
         
         if not structure_result['success']:
             return {
@@ -174,33 +238,74 @@ class CompleteMeetingReportGenerator:
         
         structured_data = structure_result['structured_data']
         
-        # Generate PDF
-        print("\n" + "="*60)
-        print("STEP 2/2: PDF REPORT GENERATION")
-        print("="*60)
+        if not render_pdf:
+            return {
+                'success': True,
+                'pdf_path': None,
+                'structured_data': structured_data,
+                'report_title': report_title
+            }
         
+        # Generate PDF
         if output_pdf_filename is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_pdf_filename = f"meeting_report_{timestamp}.pdf"
         
         try:
-            pdf_path = self.pdf_generator.generate_report(
-                structured_data=structured_data,
-                output_filename=output_pdf_filename
-            )
+            pdf_path = self._render(structured_data, output_pdf_filename, report_title)
             
             return {
                 'success': True,
                 'pdf_path': pdf_path,
-                'structured_data': structured_data
+                'structured_data': structured_data,
+                'report_title': report_title
             }
         
+        except cancellation.Cancelled:
+            raise
         except Exception as e:
             return {
                 'success': False,
                 'error': f"PDF generation failed: {str(e)}"
             }
 
+    def generate_report_from_tracks(
+        self,
+        tracks,
+        output_pdf_filename=None,
+        meeting_type="general",
+        language="fr",
+        decoding=None,
+        tier=None,
+        render_pdf=True
+    ):
+        """
+        Pipeline for calls recorded with one audio track per participant:
+        tracks are transcribed concurrently, merged by timestamp with speaker
+        labels, then structured and rendered like a text report
+        
+        Args:
+            tracks: list of {'speaker': str, 'audio': bytes/path, 'pcm': dict or None}
+            output_pdf_filename: Output PDF filename (auto-generated if None)
+            meeting_type: Type of meeting
+            language: Language code (None = auto-detect)
+            decoding: Optional Whisper decoding settings (see decoding_tiers.py)
+            tier: Name of the decoding tier, for tracing
+            render_pdf: False to stop after structuring (pdf_path is None)
+        
+        Returns:
+            dict: Same as generate_report_from_audio, segments carry a 'speaker'
+        """
+        transcription_result = self.transcribe_tracks(
+            tracks, language=language, decoding=decoding, tier=tier
+        )
+        return self.report_from_transcription(
+            transcription_result,
+            output_pdf_filename=output_pdf_filename,
+            meeting_type=meeting_type,
+            render_pdf=render_pdf
+        )
+
 
 # ===========================
 # USAGE EXAMPLES
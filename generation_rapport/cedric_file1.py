@@ -7,6 +7,7 @@ Features:
 - Transcribes audio using OpenAI Whisper
 - Multiple model sizes for accuracy/speed tradeoff
 - Returns transcribed text with high accuracy
+- Corrects oncology terms against a lexicon (medical_lexicon.py)
 
 Requirements:
     pip install openai-whisper
@@ -17,10 +18,19 @@ Requirements:
     - Mac: brew install ffmpeg
 """
 
-import whisper
 import os
+import time
 from datetime import datetime
 
+import audio_io
+import cancellation
+import cpu_topology
+import medical_lexicon
+import model_registry
+import request_profiling
+import scheduling
+import tracing
+
 
 class MeetingTranscriber:
     """
@@ -42,22 +52,17 @@ class MeetingTranscriber:
         """
         self.model_size = model_size
         # Resolve "auto" to an actual device string torch understands
-        if device == "auto":
-            import torch
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        else:
-            self.device = device
+        self.device = model_registry.resolve_device(device)
         self.model = None
         print(f"✓ Meeting Transcriber initialized with Whisper model: {model_size}")
     
     def _load_model(self):
         """
-        Load Whisper model (lazy loading)
+        Load Whisper model (lazy loading, resident across requests)
         """
         if self.model is None:
-            print(f"🎤 Loading Whisper model ({self.model_size}) on {self.device}...")
-            self.model = whisper.load_model(self.model_size, device=self.device)
-            print("✓ Whisper model loaded successfully")
+            # Shared with every other transcriber using the same size/device
+            self.model = model_registry.get_model(self.model_size, device=self.device)
         return self.model
     
     # Medical vocabulary prompt to guide Whisper for French oncology meetings
@@ -75,15 +80,85 @@ class MeetingTranscriber:
         "pathologiste, infirmier, infirmière."
     )
 
-    def transcribe_audio_file(self, audio_file_path, language=None, task="transcribe", initial_prompt=None):
+    def _prepare_audio(self, audio, pcm=None):
+        """
+        Decode audio in-process into the 16 kHz float32 buffer Whisper accepts
+        directly, so Whisper never spawns its own ffmpeg subprocess
+        
+        Args:
+            audio: Path, bytes, file-like object or NumPy buffer (see audio_io.load_audio)
+            pcm: Optional raw PCM description {'rate', 'channels', 'pcm_format'}
+        """
+        if isinstance(audio, (str, os.PathLike)) and not os.path.exists(audio):
+            raise FileNotFoundError(f'Audio file not found: {audio}')
+        with cpu_topology.stage("whisper"):
+            return audio_io.load_audio(audio, pcm=pcm)
+
+    def _run_whisper(self, model, audio, transcribe_options):
+        """
+        Run Whisper on the shared model (one inference at a time per model)
+        and record its speed for load-adaptive model selection
+        """
+        audio_seconds = len(audio) / audio_io.SAMPLE_RATE
+        with tracing.span("whisper", model=self.model_size, audio_seconds=round(audio_seconds, 1)) as span:
+            waited = time.perf_counter()
+            # Same model, same speed: the audio length orders the waiting jobs
+            lock = model_registry.inference_lock(self.model_size, self.device)
+            with lock.claim(audio_seconds, audio_seconds=audio_seconds):
+                started = time.perf_counter()
+                job = scheduling.current()
+                span.set(lock_wait_ms=round((started - waited) * 1000, 1),
+                         priority=job.priority_class if job else scheduling.classify(audio_seconds=audio_seconds))
+                with request_profiling.torch_trace("whisper"), cpu_topology.stage("whisper"):
+                    result = model.transcribe(audio, **transcribe_options)
+                if request_profiling.active() is None:  # the torch profiler slows inference down
+                    model_registry.record_inference(self.model_size, audio_seconds, time.perf_counter() - started)
+        return result
+
+    def _correct_terms(self, result):
+        """
+        Correct the oncology terms of a French Whisper result in place, in its
+        segments and text (see medical_lexicon.py)
+
+        Returns:
+            list: (original, correction) pairs
+        """
+        if result.get('language') != 'fr':
+            return []
+        lexicon = medical_lexicon.for_prompt(self.MEDICAL_PROMPT)
+        with tracing.span("lexicon") as span:
+            segments = result.get('segments') or []
+            corrections = []
+            for segment in segments:
+                segment['text'], fixed = lexicon.correct(segment['text'])
+                corrections += fixed
+            if segments:
+                # Whisper's text is the concatenation of its segments
+                result['text'] = "".join(segment['text'] for segment in segments)
+            else:
+                result['text'], corrections = lexicon.correct(result['text'])
+            span.set(corrections=len(corrections))
+        medical_lexicon.record(corrections)
+        return corrections
+
+    def transcribe_audio_file(self, audio_file_path, language=None, task="transcribe", initial_prompt=None, pcm=None,
+                              word_timestamps=False, decoding=None, correct_terms=None):
         """
         Transcribe audio file to text using OpenAI Whisper
         
         Args:
-            audio_file_path: Path to audio file (supports all formats: MP3, WAV, M4A, WebM, etc.)
+            audio_file_path: Path to audio file (supports all formats: MP3, WAV, M4A, WebM, etc.),
+                             or in-memory audio: bytes, file-like object, or a 16 kHz
+                             float32/int16 NumPy buffer
             language: Optional language code (e.g., 'en', 'es', 'fr'). Auto-detected if None.
             task: Either 'transcribe' or 'translate' (translate to English)
             initial_prompt: Optional text prompt to condition the model (improves domain-specific accuracy)
+            pcm: Optional raw PCM description when audio_file_path holds headerless PCM
+            word_timestamps: Also compute per-word timings (slower)
+            decoding: Optional Whisper decoding settings (temperature, beam_size, best_of,
+                      condition_on_previous_text, ...), see decoding_tiers.py
+            correct_terms: Correct oncology terms in French transcripts
+                           (default: LEXICON_CORRECTION, on)
         
         Returns:
             dict: {
@@ -94,34 +169,36 @@ class MeetingTranscriber:
             }
         """
         try:
-            # Check if file exists
-            if not os.path.exists(audio_file_path):
+            # Decode audio (also checks that the file exists)
+            try:
+                audio = self._prepare_audio(audio_file_path, pcm=pcm)
+            except FileNotFoundError as e:
                 return {
                     'success': False,
-                    'error': f'Audio file not found: {audio_file_path}'
+                    'error': str(e)
                 }
             
             # Load model
             model = self._load_model()
             
-            # Transcribe using Whisper
-            print(f"🎤 Transcribing audio with Whisper ({self.model_size})...")
-            
             # Transcribe options
-            transcribe_options = {'task': task}
+            transcribe_options = {'task': task, 'fp16': self.device == "cuda"}
+            if word_timestamps:
+                transcribe_options['word_timestamps'] = True
             if language:
                 transcribe_options['language'] = language
             # Use medical prompt by default if none provided
             transcribe_options['initial_prompt'] = initial_prompt or self.MEDICAL_PROMPT
+            if decoding:
+                transcribe_options.update(decoding)
             
-            result = model.transcribe(audio_file_path, **transcribe_options)
+            result = self._run_whisper(model, audio, transcribe_options)
+            if medical_lexicon.CORRECTION_ENABLED if correct_terms is None else correct_terms:
+                self._correct_terms(result)
             
             transcription = result['text'].strip()
             detected_language = result.get('language', 'unknown')
             
-            print(f"✓ Transcription complete: {len(transcription)} characters")
-            print(f"  Detected language: {detected_language}")
-            
             return {
                 'success': True,
                 'transcription': transcription,
@@ -129,20 +206,22 @@ class MeetingTranscriber:
                 'full_result': result  # Includes segments, timestamps, etc.
             }
         
+        except cancellation.Cancelled:
+            raise
         except Exception as e:
-            print(f"✗ Whisper transcription error: {e}")
             return {
                 'success': False,
                 'error': f'Whisper transcription error: {str(e)}'
             }
     
-    def transcribe_with_timestamps(self, audio_file_path, language=None):
+    def transcribe_with_timestamps(self, audio_file_path, language=None, pcm=None):
         """
         Transcribe audio and return detailed segments with timestamps
         
         Args:
-            audio_file_path: Path to audio file
+            audio_file_path: Path to audio file, or in-memory audio (see transcribe_audio_file)
             language: Optional language code
+            pcm: Optional raw PCM description when audio_file_path holds headerless PCM
         
         Returns:
             dict: {
@@ -153,23 +232,25 @@ class MeetingTranscriber:
             }
         """
         try:
-            # Check if file exists
-            if not os.path.exists(audio_file_path):
+            # Decode audio (also checks that the file exists)
+            try:
+                audio = self._prepare_audio(audio_file_path, pcm=pcm)
+            except FileNotFoundError as e:
                 return {
                     'success': False,
-                    'error': f'Audio file not found: {audio_file_path}'
+                    'error': str(e)
                 }
             
             # Load model
             model = self._load_model()
             
-            print(f"🎤 Transcribing with timestamps...")
-            
-            transcribe_options = {}
+            transcribe_options = {'fp16': self.device == "cuda"}
             if language:
                 transcribe_options['language'] = language
             
-            result = model.transcribe(audio_file_path, **transcribe_options)
+            result = self._run_whisper(model, audio, transcribe_options)
+            if medical_lexicon.CORRECTION_ENABLED:
+                self._correct_terms(result)
             
             # Format segments with timestamps
             segments = []
@@ -180,7 +261,9 @@ class MeetingTranscriber:
                     'text': seg['text'].strip()
                 })
             
-            print(f"✓ Transcription complete: {len(segments)} segments")
+            span = tracing.current_span()
+            if span is not None:
+                span.set(segments=len(segments), detected_language=result.get('language', 'unknown'))
             
             return {
                 'success': True,
@@ -189,6 +272,8 @@ class MeetingTranscriber:
                 'language': result.get('language', 'unknown')
             }
         
+        except cancellation.Cancelled:
+            raise
         except Exception as e:
             return {
                 'success': False,
@@ -6,6 +6,12 @@ Features:
 - Takes raw transcription text from Whisper
 - Structures text into organized paragraphs/sections using Gemini AI
 - Returns structured JSON output suitable for report generation
+- The static instructions, JSON schema, oncology glossary and worked
+  example are sent once as Gemini cached context (see prompt_cache.py);
+  only the date and transcript are per call. Together they stay above the
+  model's minimum cacheable size (1024 tokens for gemini-2.5-flash).
+- Calls are spread over the configured keys / models within their quotas
+  (see gemini_dispatcher.py)
 
 Requirements:
     pip install google-generativeai
@@ -18,6 +24,94 @@ import json
 from datetime import datetime
 import os
 
+import cancellation
+import gemini_dispatcher
+import medical_lexicon
+import prompt_cache
+import tracing
+
+
+# Local stand-in for the Gemini API (e.g. fake_gemini.py); empty = Google
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+
+# Report languages the prompt can ask for
+LANGUAGE_NAMES = {
+    'fr': 'français',
+    'en': 'anglais',
+    'es': 'espagnol',
+    'de': 'allemand',
+    'it': 'italien',
+}
+
+# Correct spellings Gemini restores in the report (Whisper often misspells them)
+GLOSSARY = ", ".join(sorted(set(medical_lexicon.ONCOLOGY_TERMS)))
+
+# Worked example of the expected output, part of the cached prompt prefix
+STRUCTURING_EXAMPLE = """
+Exemple de transcription brute :
+"Bon, on commence. Docteur Martin, oncologue, docteur Leroy, chirurgien, et madame Petit,
+infirmière de coordination. Premier dossier, madame D., 64 ans, adenocarcinome pulmonaire
+t2 n1 m0, mutation EGFR retrouvée en immunohistochimie et biologie moléculaire. Le scanner
+de contrôle montre une réponse partielle après trois cures de carbo platine pémétrexed.
+Docteur Leroy, vous la trouvez opérable ? Oui, une lobectomie est envisageable si la TEP
+ne montre pas d'autre fixation. D'accord, on demande une TEP-scan et on la revoit en RCP
+dans trois semaines. Madame Petit, vous organisez le rendez-vous ? Oui je m'en occupe.
+On note aussi la neutropénie de grade deux après la troisième cure, donc on réduit la dose."
+
+Exemple de réponse attendue :
+{
+    "meeting_metadata": {
+        "date": "14/03/2025",
+        "type": "medical",
+        "duration_estimate": "5 minutes"
+    },
+    "participants": [
+        "Dr Martin (oncologue)",
+        "Dr Leroy (chirurgien)",
+        "Mme Petit (infirmière de coordination)"
+    ],
+    "summary": "Discussion du dossier de Mme D., 64 ans, atteinte d'un adénocarcinome pulmonaire T2N1M0 avec mutation EGFR, en réponse partielle après trois cures de carboplatine-pémétrexed. Une lobectomie est envisagée sous réserve d'une TEP-scan.",
+    "sections": [
+        {
+            "title": "Présentation du dossier",
+            "content": "Mme D., 64 ans, adénocarcinome pulmonaire T2N1M0, mutation EGFR retrouvée en immunohistochimie et en biologie moléculaire. Le scanner de contrôle montre une réponse partielle après trois cures de carboplatine-pémétrexed.",
+            "timestamp": "début de réunion"
+        },
+        {
+            "title": "Discussion chirurgicale",
+            "content": "Le Dr Leroy juge une lobectomie envisageable si la TEP-scan ne montre pas d'autre fixation.",
+            "timestamp": ""
+        },
+        {
+            "title": "Tolérance du traitement",
+            "content": "Neutropénie de grade 2 après la troisième cure : la dose est réduite.",
+            "timestamp": "fin de réunion"
+        }
+    ],
+    "key_points": [
+        "Réponse partielle après trois cures de carboplatine-pémétrexed",
+        "Lobectomie envisageable selon le résultat de la TEP-scan",
+        "Neutropénie de grade 2"
+    ],
+    "action_items": [
+        {
+            "task": "Organiser la TEP-scan de Mme D.",
+            "responsible": "Mme Petit",
+            "deadline": "Avant la prochaine RCP"
+        },
+        {
+            "task": "Représenter le dossier en RCP",
+            "responsible": "À définir",
+            "deadline": "Dans trois semaines"
+        }
+    ],
+    "decisions": [
+        "Demande d'une TEP-scan avant décision chirurgicale",
+        "Réduction de dose de la chimiothérapie"
+    ]
+}
+"""
+
 
 class MeetingTextStructurer:
     """
@@ -43,62 +137,130 @@ class MeetingTextStructurer:
             )
         
         # Configure Gemini API
-        genai.configure(api_key=self.api_key)
+        if GEMINI_API_ENDPOINT:
+            genai.configure(api_key=self.api_key, transport="rest",
+                            client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        else:
+            genai.configure(api_key=self.api_key)
         
-        # Initialize the model
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # Initialize the model (calls go through the dispatcher's key / model pool)
+        self.model = genai.GenerativeModel(gemini_dispatcher.MODELS[0])
+        self.dispatcher = gemini_dispatcher.for_key(self.api_key)
         
         print("✓ Gemini API initialized successfully")
     
-    def structure_meeting_text(self, raw_transcription, meeting_type="general"):
+    def structure_meeting_text(self, raw_transcription, meeting_type="general", language="fr"):
         """
         Structure raw meeting transcription into organized JSON format
         
         Args:
             raw_transcription: Raw text from speech-to-text transcription
             meeting_type: Type of meeting ("general", "medical", "business", "technical")
+            language: Language of the report content (see LANGUAGE_NAMES)
         
         Returns:
             dict: Structured meeting data in JSON format
         """
-        # Build the prompt for Gemini
-        prompt = self._build_structuring_prompt(raw_transcription, meeting_type)
-        
         try:
-            print("🤖 Structuring text with Gemini AI...")
-            
             # Generate structured content
-            response = self.model.generate_content(prompt)
+            response = self._generate(raw_transcription, meeting_type, language)
             
             # Parse the JSON response
-            structured_data = self._parse_gemini_response(response.text)
+            with tracing.span("parse", response_characters=len(response.text)):
+                structured_data = self._parse_gemini_response(response.text)
             
-            print("✓ Text successfully structured")
             return {
                 'success': True,
                 'structured_data': structured_data,
                 'raw_response': response.text
             }
         
+        except (gemini_dispatcher.QuotaTimeout, cancellation.Cancelled):
+            raise
         except Exception as e:
-            print(f"✗ Error structuring text: {e}")
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def _build_structuring_prompt(self, transcription, meeting_type):
+    def _generate(self, transcription, meeting_type, language):
+        """
+        Call Gemini on a key / model with quota left, waiting for one if needed
+        """
+        static_prompt = self._static_prompt(meeting_type, language)
+        call_prompt = self._call_prompt(transcription)
+        estimated_tokens = (gemini_dispatcher.estimate_tokens(static_prompt + call_prompt)
+                            + gemini_dispatcher.EXPECTED_OUTPUT_TOKENS)
+
+        response, lane, waited = self.dispatcher.call(
+            lambda lane: self._generate_on(lane, meeting_type, language, static_prompt, call_prompt),
+            estimated_tokens,
+        )
+        span = tracing.current_span()
+        if span is not None:
+            span.set(gemini_lane=lane.name, quota_wait_ms=round(waited * 1000, 1))
+        return response
+    
+    def _generate_on(self, lane, meeting_type, language, static_prompt, call_prompt):
+        """
+        Call Gemini with the static prompt prefix from the context cache,
+        or with the whole prompt inline when no cache entry is available
+        """
+        span = tracing.current_span()
+
+        # Cached contents belong to the key genai.configure() was called with
+        cache = prompt_cache.for_model(lane.model)
+        cached = cache.get(meeting_type, language, static_prompt) if lane.primary else None
+        if cached is not None:
+            try:
+                model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+                response = model.generate_content(call_prompt)
+                self._record_usage(span, response, "cached")
+                return response
+            except Exception as e:
+                if gemini_dispatcher.is_rate_limited(e):
+                    raise  # the dispatcher retries on another lane
+                # Expired or deleted meanwhile: retry inline, recreate next time
+                print(f"⚠ Cached Gemini context rejected ({e}); using the inline prompt")
+                cache.invalidate(cached)
+
+        model = lane.model_instance(genai.GenerativeModel(lane.model))
+        response = model.generate_content(static_prompt + call_prompt)
+        self._record_usage(span, response, "inline")
+        return response
+    
+    @staticmethod
+    def _record_usage(span, response, prompt_mode):
+        if span is None:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        span.set(
+            prompt_mode=prompt_mode,
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            cached_tokens=getattr(usage, "cached_content_token_count", None),
+        )
+    
+    def _build_structuring_prompt(self, transcription, meeting_type, language="fr"):
         """
         Build the prompt for Gemini to structure the meeting text
         
         Args:
             transcription: Raw meeting transcription
             meeting_type: Type of meeting
+            language: Language of the report content
         
         Returns:
-            str: Complete prompt for Gemini
+            str: Complete prompt for Gemini (static part + per-call part)
         """
-        prompt = f"""
+        return self._static_prompt(meeting_type, language) + self._call_prompt(transcription)
+    
+    def _static_prompt(self, meeting_type, language="fr"):
+        """
+        Instructions and JSON schema: identical for every call with the same
+        meeting type and language, so they can be cached by Gemini
+        """
+        language_name = LANGUAGE_NAMES.get(language, language)
+        return f"""
 Tu es un assistant IA spécialisé dans la structuration de comptes-rendus de réunions médicales.
 À partir de la transcription brute ci-dessous, organise le contenu dans un format JSON structuré.
 
@@ -112,10 +274,28 @@ Instructions :
 5. Rédige un résumé concis
 6. Retourne UNIQUEMENT un JSON valide (aucun texte supplémentaire)
 
+Règles de rédaction :
+- La transcription vient d'une reconnaissance vocale : corrige l'orthographe des
+  termes médicaux d'après le glossaire ci-dessous ("adenocarcinome" -> "adénocarcinome",
+  "carbo platine" -> "carboplatine") sans changer leur sens
+- Écris les stades TNM sans espaces et en majuscules ("t2 n1 m0" -> "T2N1M0")
+- N'invente rien : un participant, une échéance ou un responsable qui n'est pas
+  mentionné reste "À définir" (ou est omis pour les participants)
+- Désigne les patients comme dans la transcription (initiales, âge), sans ajouter
+  d'informations d'identification
+- Regroupe les échanges par dossier ou par thème plutôt que par ordre de parole
+- Une décision est ce que l'équipe a convenu ; une action est une tâche à réaliser
+  ensuite, avec son responsable et son échéance si elles sont dites
+- Garde les doses, grades de toxicité, résultats d'examens et marqueurs tels qu'ils
+  sont énoncés
+
+Glossaire oncologique (orthographe de référence) :
+{GLOSSARY}
+
 Structure JSON attendue :
 {{
     "meeting_metadata": {{
-        "date": "La date du jour au format JJ/MM/AAAA (ex: {datetime.now().strftime('%d/%m/%Y')})",
+        "date": "La date du jour au format JJ/MM/AAAA (indiquée après les instructions)",
         "type": "{meeting_type}",
         "duration_estimate": "durée estimée en minutes"
     }},
@@ -149,12 +329,18 @@ Structure JSON attendue :
     ]
 }}
 
+{STRUCTURING_EXAMPLE}
+Retourne UNIQUEMENT la structure JSON ci-dessus, sans aucune explication ni texte supplémentaire. Rédige tout le contenu en {language_name}.
+"""
+    
+    def _call_prompt(self, transcription):
+        """Per-call part of the prompt: today's date and the transcript"""
+        return f"""
+Date du jour : {datetime.now().strftime('%d/%m/%Y')}
+
 Transcription brute :
 {transcription}
-
-Retourne UNIQUEMENT la structure JSON ci-dessus, sans aucune explication ni texte supplémentaire. Rédige tout le contenu en français.
 """
-        return prompt
     
     def _parse_gemini_response(self, response_text):
         """
@@ -187,7 +373,9 @@ Retourne UNIQUEMENT la structure JSON ci-dessus, sans aucune explication ni text
             return structured_data
         
         except json.JSONDecodeError as e:
-            print(f"⚠ Warning: Could not parse JSON response: {e}")
+            span = tracing.current_span()
+            if span is not None:
+                span.set(json_error=str(e))
             # Return a basic structure with the raw text
             return {
                 "error": "Failed to parse JSON",
@@ -212,10 +400,11 @@ Retourne UNIQUEMENT la structure JSON ci-dessus, sans aucune explication ni text
             str: Gemini's response
         """
         try:
-            print("🤖 Generating custom structured output...")
-            response = self.model.generate_content(custom_prompt)
+            response, _, _ = self.dispatcher.call(
+                lambda lane: lane.model_instance(genai.GenerativeModel(lane.model)).generate_content(custom_prompt),
+                gemini_dispatcher.estimate_tokens(custom_prompt) + gemini_dispatcher.EXPECTED_OUTPUT_TOKENS,
+            )
             
-            print("✓ Custom output generated")
             return {
                 'success': True,
                 'response': response.text
@@ -6,6 +6,7 @@ Features:
 - Generates professional PDF reports from structured meeting data
 - Includes meeting metadata, participants, summary, sections, and action items
 - Customizable styling and formatting
+- Lays out the same report view as the HTML / Markdown outputs (report_views.py)
 
 Requirements:
     pip install reportlab
@@ -21,6 +22,10 @@ from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY, TA_RIGHT
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib import colors
 
+import cpu_topology
+import report_views
+import tracing
+
 
 class MeetingReportPDF:
     """
@@ -153,10 +158,8 @@ class MeetingReportPDF:
         Returns:
             str: Path to generated PDF file
         """
-        # Set default title
-        if report_title is None:
-            meeting_type = structured_data.get('meeting_metadata', {}).get('type', 'Général')
-            report_title = f"Compte-Rendu de Réunion - {meeting_type.title()}"
+        # Defaults (title, date, labels) are shared with the other formats
+        view = report_views.build_view(structured_data, report_title, self.organization_name)
         
         # Create PDF document
         output_path = Path(output_filename)
@@ -173,33 +176,36 @@ class MeetingReportPDF:
         story = []
         
         # Add header
-        story.extend(self._build_header(report_title))
+        story.extend(self._build_header(view['title']))
         
         # Add metadata section
-        story.extend(self._build_metadata_section(structured_data))
+        story.extend(self._build_metadata_section(view))
         
         # Add participants section
-        story.extend(self._build_participants_section(structured_data))
+        story.extend(self._build_participants_section(view))
         
         # Add summary section
-        story.extend(self._build_summary_section(structured_data))
+        story.extend(self._build_summary_section(view))
         
         # Add main content sections
-        story.extend(self._build_content_sections(structured_data))
+        story.extend(self._build_content_sections(view))
         
         # Add key points section
-        story.extend(self._build_key_points_section(structured_data))
+        story.extend(self._build_key_points_section(view))
         
         # Add action items section
-        story.extend(self._build_action_items_section(structured_data))
+        story.extend(self._build_action_items_section(view))
         
         # Add decisions section
-        story.extend(self._build_decisions_section(structured_data))
+        story.extend(self._build_decisions_section(view))
         
-        # Build PDF
-        doc.build(story)
+        # Build PDF (on the render cores, away from Whisper's threads)
+        with cpu_topology.stage("render"):
+            doc.build(story)
         
-        print(f"✓ PDF report generated: {output_path}")
+        span = tracing.current_span()
+        if span is not None:
+            span.set(output_path=str(output_path))
         return str(output_path)
     
     def _build_header(self, report_title):
@@ -219,38 +225,32 @@ class MeetingReportPDF:
         
         return elements
     
-    def _build_metadata_section(self, data):
+    def _build_metadata_section(self, view):
         """Build meeting metadata section"""
         elements = []
+        labels = view['labels']
         
-        metadata = data.get('meeting_metadata', {})
-        
-        # Meeting date - handle literal placeholder or missing date
-        meeting_date = metadata.get('date', '')
-        if not meeting_date or 'AAAA' in meeting_date or 'aaaa' in meeting_date:
-            meeting_date = datetime.now().strftime('%d/%m/%Y')
-        elements.append(Paragraph(f"<b>Date :</b> {meeting_date}", self.styles['MetadataText']))
+        # Meeting date (placeholder or missing date already replaced by today)
+        elements.append(Paragraph(f"<b>{labels['date']} :</b> {view['date']}", self.styles['MetadataText']))
         
         # Meeting type
-        meeting_type = metadata.get('type', 'Réunion générale')
-        elements.append(Paragraph(f"<b>Type :</b> {meeting_type}", self.styles['MetadataText']))
+        elements.append(Paragraph(f"<b>{labels['type']} :</b> {view['type']}", self.styles['MetadataText']))
         
         # Duration estimate
-        duration = metadata.get('duration_estimate', 'N/A')
-        elements.append(Paragraph(f"<b>Durée estimée :</b> {duration}", self.styles['MetadataText']))
+        elements.append(Paragraph(f"<b>{labels['duration']} :</b> {view['duration']}", self.styles['MetadataText']))
         
         elements.append(Spacer(1, 0.5*cm))
         
         return elements
     
-    def _build_participants_section(self, data):
+    def _build_participants_section(self, view):
         """Build participants section"""
         elements = []
         
-        participants = data.get('participants', [])
+        participants = view['participants']
         
         if participants:
-            elements.append(Paragraph("<b>Participants</b>", self.styles['SectionHeader']))  # Same in French
+            elements.append(Paragraph(f"<b>{view['labels']['participants']}</b>", self.styles['SectionHeader']))
             
             for participant in participants:
                 elements.append(Paragraph(f"• {participant}", self.styles['BulletText']))
@@ -259,32 +259,32 @@ class MeetingReportPDF:
         
         return elements
     
-    def _build_summary_section(self, data):
+    def _build_summary_section(self, view):
         """Build meeting summary section"""
         elements = []
         
-        summary = data.get('summary', '')
+        summary = view['summary']
         
         if summary:
-            elements.append(Paragraph("<b>Résumé de la réunion</b>", self.styles['SectionHeader']))
+            elements.append(Paragraph(f"<b>{view['labels']['summary']}</b>", self.styles['SectionHeader']))
             elements.append(Paragraph(summary, self.styles['BodyText']))
             elements.append(Spacer(1, 0.3*cm))
         
         return elements
     
-    def _build_content_sections(self, data):
+    def _build_content_sections(self, view):
         """Build main content sections"""
         elements = []
         
-        sections = data.get('sections', [])
+        sections = view['sections']
         
         if sections:
-            elements.append(Paragraph("<b>Contenu de la réunion</b>", self.styles['SectionHeader']))
+            elements.append(Paragraph(f"<b>{view['labels']['sections']}</b>", self.styles['SectionHeader']))
             
             for section in sections:
-                title = section.get('title', 'Section sans titre')
-                content = section.get('content', '')
-                timestamp = section.get('timestamp', '')
+                title = section['title']
+                content = section['content']
+                timestamp = section['timestamp']
                 
                 # Section title with optional timestamp
                 if timestamp:
@@ -298,14 +298,14 @@ class MeetingReportPDF:
         
         return elements
     
-    def _build_key_points_section(self, data):
+    def _build_key_points_section(self, view):
         """Build key points section"""
         elements = []
         
-        key_points = data.get('key_points', [])
+        key_points = view['key_points']
         
         if key_points:
-            elements.append(Paragraph("<b>Points clés</b>", self.styles['SectionHeader']))
+            elements.append(Paragraph(f"<b>{view['labels']['key_points']}</b>", self.styles['SectionHeader']))
             
             for point in key_points:
                 elements.append(Paragraph(f"• {point}", self.styles['BulletText']))
@@ -314,23 +314,21 @@ class MeetingReportPDF:
         
         return elements
     
-    def _build_action_items_section(self, data):
+    def _build_action_items_section(self, view):
         """Build action items section"""
         elements = []
         
-        action_items = data.get('action_items', [])
+        action_items = view['action_items']
+        labels = view['labels']
         
         if action_items:
-            elements.append(Paragraph("<b>Actions à mener</b>", self.styles['SectionHeader']))
+            elements.append(Paragraph(f"<b>{labels['action_items']}</b>", self.styles['SectionHeader']))
             
             # Create table for action items
-            table_data = [['Tâche', 'Responsable', 'Échéance']]
+            table_data = [[labels['task'], labels['responsible'], labels['deadline']]]
             
             for item in action_items:
-                task = item.get('task', 'N/A')
-                responsible = item.get('responsible', 'À définir')
-                deadline = item.get('deadline', 'À définir')
-                table_data.append([task, responsible, deadline])
+                table_data.append([item['task'], item['responsible'], item['deadline']])
             
             # Create table
             action_table = Table(table_data, colWidths=[8*cm, 4*cm, 3*cm])
@@ -352,14 +350,14 @@ class MeetingReportPDF:
         
         return elements
     
-    def _build_decisions_section(self, data):
+    def _build_decisions_section(self, view):
         """Build decisions section"""
         elements = []
         
-        decisions = data.get('decisions', [])
+        decisions = view['decisions']
         
         if decisions:
-            elements.append(Paragraph("<b>Décisions prises</b>", self.styles['SectionHeader']))
+            elements.append(Paragraph(f"<b>{view['labels']['decisions']}</b>", self.styles['SectionHeader']))
             
             for i, decision in enumerate(decisions, 1):
                 elements.append(Paragraph(f"{i}. {decision}", self.styles['BodyText']))
@@ -0,0 +1,441 @@
+"""
+RESUMABLE UPLOADS MODULE - Cedric's Meeting Report Generator
+Chunked, resumable audio uploads with transcription of the part already received
+
+Protocol (see the /uploads endpoints in api_server.py):
+    1. POST   /uploads                 -> create an upload, returns its id
+    2. PUT    /uploads/{id}?offset=N   -> append a chunk at byte offset N
+    3. GET    /uploads/{id}            -> current offset, to resume after a failure
+    4. POST   /uploads/{id}/finalize   -> reassemble and transcribe / generate the report
+
+Live meetings use the same sessions: audio frames arriving over the /live
+WebSocket are appended like chunks and transcribed on a short rolling window,
+so that finalize only has the last few seconds left at hang-up.
+
+Features:
+- Chunks are written straight into one file per upload; a chunk interrupted
+  mid-transfer still counts up to the last byte written, so clients resume
+  from the offset the server reports
+- Upload metadata is persisted next to the data, so uploads survive a restart
+- While the upload is still in progress, complete windows of the contiguous
+  audio already received are transcribed in the background; finalize only
+  has to transcribe the remainder
+- Background steps reserve their Whisper memory with the admission
+  controller (admission.py) and are deferred to a later chunk when it
+  has none to spare
+- Deleting an upload stops its transcription at the next window
+- Uploads idle for UPLOAD_TTL_SECONDS (abandoned by their client) are
+  deleted with their files by a sweep at startup and on upload creation
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import audio_io
+import cancellation
+
+
+# Audio transcribed per background step (seconds). Compressed uploads are
+# decoded from the start on every step, so larger windows mean fewer decodes.
+EARLY_WINDOW_SECONDS = float(os.getenv("UPLOAD_EARLY_WINDOW_SECONDS", "300"))
+# Audio kept back from the end of a partial compressed upload (may be cut mid-frame)
+TAIL_GUARD_SECONDS = 5.0
+# Bytes to wait for before the first decode of a compressed upload (bitrate unknown until then)
+FIRST_DECODE_BYTES = 1024 * 1024
+# Segments ending this close to a window's end are re-transcribed with the next window
+CUT_GUARD_SECONDS = 3.0
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(1024 ** 3)))
+# Uploads without a chunk for this long are deleted (default: one day)
+UPLOAD_TTL_SECONDS = float(os.getenv("UPLOAD_TTL_SECONDS", "86400"))
+# Minimum time between two sweeps for expired uploads
+SWEEP_INTERVAL_SECONDS = 600.0
+
+
+class UploadError(Exception):
+    """Raised for protocol errors; carries the HTTP status to answer with"""
+
+    def __init__(self, status_code, message, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+class ProgressiveTranscriber:
+    """
+    Transcribes the contiguous prefix of an upload while it is still arriving
+
+    Committed segments carry absolute timestamps; `transcribed_until` is the
+    point in the audio up to which the transcript is final.
+    """
+
+    def __init__(self, model_size, language, pcm=None, window_seconds=EARLY_WINDOW_SECONDS):
+        self.model_size = model_size
+        self.language = language
+        self.pcm = pcm
+        self.window_seconds = window_seconds
+        self.segments = []
+        self.transcribed_until = 0.0
+        self.detected_language = None
+        self.bytes_per_second = None  # compressed audio: learnt from the first decode
+        if pcm is not None:
+            self.frame_bytes = (4 if pcm.get('pcm_format') == "f32le" else 2) * pcm.get('channels', 1)
+            self.bytes_per_second = self.frame_bytes * pcm.get('rate', audio_io.SAMPLE_RATE)
+        # Set when the upload is deleted; checked between windows
+        self.cancel_token = cancellation.CancelToken()
+        self._lock = threading.Lock()
+
+    @property
+    def text(self):
+        return " ".join(segment['text'] for segment in self.segments if segment['text'])
+
+    def _load(self, data_path, received):
+        """Decode the audio still to transcribe; returns (samples, start_seconds)"""
+        if self.pcm is not None:
+            # Headerless PCM can be sliced exactly: only read what is new
+            start_byte = int(self.transcribed_until * self.bytes_per_second)
+            start_byte -= start_byte % self.frame_bytes
+            with open(data_path, "rb") as f:
+                f.seek(start_byte)
+                data = f.read(received - start_byte)
+            return audio_io.load_audio(data, pcm=self.pcm), start_byte / self.bytes_per_second
+
+        # Compressed containers must be decoded from the beginning
+        with open(data_path, "rb") as f:
+            data = f.read(received)
+        samples = audio_io.load_audio(data, allow_truncated=True)
+        if len(samples):
+            self.bytes_per_second = received / (len(samples) / audio_io.SAMPLE_RATE)
+        return samples, 0.0
+
+    def pending_seconds(self, received):
+        """Estimated untranscribed audio in the first `received` bytes (None if unknown)"""
+        if not self.bytes_per_second:
+            return None
+        return received / self.bytes_per_second - self.transcribed_until
+
+    def _check_cancelled(self):
+        if self.cancel_token.cancelled:
+            raise cancellation.Cancelled("transcribe", self.cancel_token.reason)
+        cancellation.check("transcribe")
+
+    def advance(self, data_path, received, final=False):
+        """
+        Transcribe every complete window available in the first `received`
+        bytes (or everything that is left when `final`)
+
+        Raises:
+            cancellation.Cancelled: the upload was deleted (or the request
+                                    cancelled) before a window
+        """
+        from cedric_file1 import MeetingTranscriber
+
+        with self._lock:
+            self._check_cancelled()
+            samples, base = self._load(data_path, received)
+            available = base + len(samples) / audio_io.SAMPLE_RATE
+            if not final:
+                available -= TAIL_GUARD_SECONDS if self.pcm is None else 0.0
+
+            transcriber = MeetingTranscriber(model_size=self.model_size)
+            while True:
+                remaining = available - self.transcribed_until
+                if final:
+                    if remaining <= 0.1:
+                        break
+                    window_end = available
+                elif remaining < self.window_seconds:
+                    break
+                else:
+                    window_end = self.transcribed_until + self.window_seconds
+
+                self._check_cancelled()
+                window = samples[
+                    int((self.transcribed_until - base) * audio_io.SAMPLE_RATE):
+                    int((window_end - base) * audio_io.SAMPLE_RATE)
+                ]
+                self._transcribe_window(transcriber, window, window_end, final)
+
+    def _transcribe_window(self, transcriber, window, window_end, final):
+        # Carry the end of the transcript over so the next window stays consistent
+        prompt = f"{transcriber.MEDICAL_PROMPT} {self.text[-200:]}".strip()
+        result = transcriber.transcribe_audio_file(window, language=self.language, initial_prompt=prompt)
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        self.detected_language = result.get('language', self.detected_language)
+
+        offset = self.transcribed_until
+        window_length = window_end - offset
+        segments = [
+            {
+                'start': offset + seg['start'],
+                'end': offset + min(seg['end'], window_length),
+                'text': seg['text'].strip(),
+            }
+            for seg in result['full_result'].get('segments', [])
+        ]
+
+        # A segment ending right at the window edge was probably cut mid-word:
+        # leave it to the next window unless this is the last one.
+        committed, until = segments, window_end
+        if not final:
+            kept = [seg for seg in segments if seg['end'] <= window_end - CUT_GUARD_SECONDS]
+            if kept and kept[-1]['end'] > offset + CUT_GUARD_SECONDS:
+                committed, until = kept, kept[-1]['end']
+
+        self.segments.extend(committed)
+        self.transcribed_until = until
+
+
+class UploadSession:
+    """One resumable upload: a data file plus a JSON metadata file"""
+
+    def __init__(self, directory, meta):
+        self.directory = Path(directory)
+        self.meta = meta
+        self.lock = asyncio.Lock()
+        self.transcriber = None
+        self.early_task = None
+        if meta.get('transcribe_early'):
+            self.transcriber = self._new_transcriber()
+
+    def _new_transcriber(self):
+        return ProgressiveTranscriber(
+            model_size=self.meta['whisper_model'],
+            language=self.meta['language'],
+            pcm=self.meta.get('pcm'),
+            window_seconds=self.meta.get('window_seconds') or EARLY_WINDOW_SECONDS,
+        )
+
+    @property
+    def upload_id(self):
+        return self.meta['upload_id']
+
+    @property
+    def data_path(self):
+        return self.directory / "data.part"
+
+    @property
+    def offset(self):
+        return self.meta['offset']
+
+    @property
+    def busy(self):
+        """A chunk is being written or audio transcribed right now"""
+        if self.lock.locked():
+            return True
+        if self.early_task is not None and not self.early_task.done():
+            return True
+        return self.transcriber is not None and self.transcriber._lock.locked()
+
+    def save_meta(self):
+        tmp_path = self.directory / "meta.json.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.directory / "meta.json")
+
+    def status(self):
+        status = {
+            'upload_id': self.upload_id,
+            'offset': self.offset,
+            'total_size': self.meta.get('total_size'),
+            'whisper_model': self.meta['whisper_model'],
+            'finalized': self.meta.get('finalized', False),
+        }
+        if self.transcriber is not None:
+            status['transcribed_seconds'] = round(self.transcriber.transcribed_until, 2)
+        return status
+
+    async def write_chunk(self, offset, chunks):
+        """
+        Write an async iterable of byte chunks at `offset`
+
+        The offset must not be past the contiguous end (no holes); re-sent
+        bytes simply overwrite identical data, so a client re-sending a chunk
+        after a lost response is harmless.
+        """
+        async with self.lock:
+            if self.meta.get('finalized'):
+                raise UploadError(409, "Upload already finalized", self.offset)
+            if offset > self.offset:
+                raise UploadError(409, "Chunk offset is past the received data", self.offset)
+
+            total_size = self.meta.get('total_size')
+            position = offset
+            with open(self.data_path, "r+b") as f:
+                f.seek(offset)
+                try:
+                    async for chunk in chunks:
+                        end = position + len(chunk)
+                        if end > (total_size or MAX_UPLOAD_BYTES):
+                            raise UploadError(413, "Chunk goes past the declared upload size", self.offset)
+                        f.write(chunk)
+                        position = end
+                        if position > self.meta['offset']:
+                            self.meta['offset'] = position
+                finally:
+                    # Keep whatever arrived before a disconnect: it is resumable
+                    f.flush()
+                    self.save_meta()
+            return self.offset
+
+    def start_early_transcription(self, admission=None):
+        """
+        Transcribe newly completed windows in a worker thread, if enough audio
+        arrived since the last step and no step is already running
+
+        Args:
+            admission: AdmissionController to reserve the step's memory with;
+                       the step is skipped when it has none to spare
+        """
+        if self.transcriber is None or self.meta.get('finalized'):
+            return
+        if self.early_task is not None and not self.early_task.done():
+            return
+
+        pending = self.transcriber.pending_seconds(self.offset)
+        if pending is None:
+            if self.offset < FIRST_DECODE_BYTES:
+                return
+        elif pending < self.transcriber.window_seconds + TAIL_GUARD_SECONDS:
+            return
+
+        self.early_task = asyncio.ensure_future(self._early_step(admission, self.offset, pending))
+        self.early_task.add_done_callback(self._log_early_failure)
+
+    async def _early_step(self, admission, received, pending):
+        loop = asyncio.get_running_loop()
+        if admission is None:
+            await loop.run_in_executor(None, self.transcriber.advance, self.data_path, received)
+            return
+        audio_seconds = pending or self.transcriber.window_seconds
+        async with admission.try_admit(self.meta['whisper_model'], audio_seconds=audio_seconds) as job:
+            if job is None:
+                return  # no memory to spare now: a later chunk (or finalize) catches up
+            await loop.run_in_executor(None, self.transcriber.advance, self.data_path, received)
+
+    def _log_early_failure(self, task):
+        if task.cancelled() or isinstance(task.exception(), cancellation.Cancelled):
+            return
+        if task.exception() is not None:
+            print(f"⚠ Early transcription failed for upload {self.upload_id}: {task.exception()}")
+
+    def transcribe_remaining(self):
+        """
+        Blocking: transcribe whatever the background steps have not covered
+        and return the full transcript in MeetingTranscriber's result format
+        """
+        total_size = self.meta.get('total_size')
+        if total_size is not None and self.offset != total_size:
+            raise UploadError(409, f"Upload incomplete: {self.offset}/{total_size} bytes", self.offset)
+        if self.offset == 0:
+            raise UploadError(400, "Upload is empty", 0)
+
+        if self.transcriber is None:
+            self.transcriber = self._new_transcriber()
+        self.transcriber.advance(self.data_path, self.offset, final=True)
+        self.meta['finalized'] = True
+        self.save_meta()
+
+        return {
+            'success': True,
+            'transcription': self.transcriber.text,
+            'segments': self.transcriber.segments,
+            'language': self.transcriber.detected_language or self.meta['language'] or 'unknown',
+        }
+
+
+class UploadStore:
+    """Creates, looks up (also after a restart) and removes upload sessions"""
+
+    def __init__(self, root, ttl=UPLOAD_TTL_SECONDS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._sessions = {}
+        self._last_sweep = 0.0
+
+    def create(self, filename, content_type=None, total_size=None, pcm=None,
+               whisper_model="small", language="fr", transcribe_early=True, window_seconds=None):
+        if total_size is not None and total_size > MAX_UPLOAD_BYTES:
+            raise UploadError(413, f"Upload larger than {MAX_UPLOAD_BYTES} bytes")
+        if time.monotonic() - self._last_sweep > SWEEP_INTERVAL_SECONDS:
+            self.purge_expired()
+
+        upload_id = uuid.uuid4().hex
+        directory = self.root / upload_id
+        directory.mkdir(parents=True)
+        (directory / "data.part").touch()
+
+        session = UploadSession(directory, {
+            'upload_id': upload_id,
+            'filename': filename,
+            'content_type': content_type,
+            'total_size': total_size,
+            'pcm': pcm,
+            'whisper_model': whisper_model,
+            'language': language,
+            'transcribe_early': transcribe_early,
+            'window_seconds': window_seconds,
+            'offset': 0,
+            'created_at': time.time(),
+            'finalized': False,
+        })
+        session.save_meta()
+        self._sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id):
+        session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+
+        # Not in memory: the server restarted since the upload was created
+        directory = self.root / os.path.basename(upload_id)
+        meta_path = directory / "meta.json"
+        if not meta_path.exists():
+            raise UploadError(404, f"Unknown upload: {upload_id}")
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        # Trust the data file over the metadata for the contiguous length
+        meta['offset'] = min(meta['offset'], (directory / "data.part").stat().st_size)
+        session = UploadSession(directory, meta)
+        self._sessions[upload_id] = session
+        return session
+
+    def delete(self, upload_id):
+        session = self._sessions.pop(upload_id, None)
+        if session is not None:
+            if session.transcriber is not None:
+                # The worker thread of a running step stops at its next window
+                session.transcriber.cancel_token.cancel("upload deleted")
+            if session.early_task is not None:
+                session.early_task.cancel()
+        shutil.rmtree(self.root / os.path.basename(upload_id), ignore_errors=True)
+
+    def _idle_seconds(self, directory, now):
+        """Time since the upload last received data (meta.json is rewritten on every chunk)"""
+        try:
+            return now - max(path.stat().st_mtime for path in directory.iterdir())
+        except (OSError, ValueError):
+            return None  # deleted meanwhile, or empty
+
+    def purge_expired(self):
+        """Delete uploads idle for longer than the TTL; returns how many were deleted"""
+        self._last_sweep = time.monotonic()
+        removed = 0
+        now = time.time()
+        for directory in self.root.iterdir():
+            session = self._sessions.get(directory.name)
+            if session is not None and session.busy:
+                continue
+            idle = self._idle_seconds(directory, now)
+            if idle is not None and idle > self.ttl:
+                self.delete(directory.name)
+                removed += 1
+        return removed
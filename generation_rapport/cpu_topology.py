@@ -0,0 +1,280 @@
+"""
+CPU TOPOLOGY MODULE - Cedric's Meeting Report Generator
+Core sets and thread budgets for the event loop, Whisper and PDF rendering
+
+With Whisper, ReportLab and the event loop running at the same time in one
+container, torch's intra-op threads (one per core by default, in every
+process), OpenMP and the Python threads all compete for the same cores:
+the event loop answers late while a transcription runs, and PDF rendering
+preempts Whisper's threads. A topology gives each role its own cores:
+    api      the event loop and light threadpool work (Gemini calls, JSON, I/O)
+    whisper  audio decoding and Whisper inference; torch gets one thread per core
+    render   ReportLab (default: the api cores)
+    tracks   per-participant track workers (default: the whisper cores)
+
+Threads are pinned while they work on a stage (Linux thread affinity):
+the event loop thread at startup, a threadpool thread for the duration of
+its decode / Whisper / render call. torch's worker threads start inside a
+Whisper call, so they inherit the whisper cores. serve.py gives each
+worker its own slice of the whisper cores and a matching torch thread
+count; track workers stay on the tracks cores and share them.
+
+Configuration (CPU_TOPOLOGY):
+    off                                 no pinning, torch picks its thread count (default)
+    auto                                CPU_API_CORES (1) for api and render, the rest for Whisper
+    api=0;whisper=1-6;render=7          explicit core sets (Linux cpu list syntax)
+
+Compare topologies under mixed load with bench_topology.py.
+
+Only uses the standard library.
+"""
+
+import collections
+import os
+import threading
+from contextlib import contextmanager
+
+
+ROLES = ("api", "whisper", "render", "tracks")
+# Roles left out of an explicit topology share the cores of another one
+DEFAULT_ROLE = {"render": "api", "tracks": "whisper"}
+
+CPU_TOPOLOGY = os.getenv("CPU_TOPOLOGY", "off").strip()
+# Cores reserved for the event loop and rendering by CPU_TOPOLOGY=auto
+API_CORES = int(os.getenv("CPU_API_CORES", "1"))
+# auto leaves smaller machines alone: reserving a core would cost Whisper too much
+AUTO_MIN_CORES = 3
+
+# Thread pools sized from these when torch / NumPy load
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def parse_cpu_list(text):
+    """
+    Cores of a Linux cpu list such as ``0-3,6``
+
+    Raises:
+        ValueError: malformed list
+    """
+    cores = set()
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        first, _, last = part.partition("-")
+        try:
+            first, last = int(first), int(last or first)
+        except ValueError:
+            raise ValueError(f"Invalid core range {part!r}") from None
+        if first > last:
+            raise ValueError(f"Invalid core range {part!r}")
+        cores.update(range(first, last + 1))
+    if not cores:
+        raise ValueError(f"Empty core list {text!r}")
+    return tuple(sorted(cores))
+
+
+def format_cpu_list(cores):
+    """Inverse of parse_cpu_list: (0, 1, 2, 5) -> '0-2,5'"""
+    ranges = []
+    for core in sorted(cores):
+        if ranges and core == ranges[-1][1] + 1:
+            ranges[-1][1] = core
+        else:
+            ranges.append([core, core])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+def available_cores():
+    """Cores this process may run on (its affinity, e.g. docker --cpuset-cpus)"""
+    try:
+        return tuple(sorted(os.sched_getaffinity(0)))
+    except AttributeError:
+        return tuple(range(os.cpu_count() or 1))
+
+
+def split(cores, parts, index):
+    """Slice `index` of `cores` cut into `parts` contiguous slices (one core each when too few)"""
+    index %= parts
+    if parts >= len(cores):
+        return (cores[index % len(cores)],)
+    size, extra = divmod(len(cores), parts)
+    start = index * size + min(index, extra)
+    return cores[start:start + size + (index < extra)]
+
+
+class Topology:
+    """Cores of each role (see module docstring) and torch's thread budget"""
+
+    def __init__(self, cores, whisper_threads=None):
+        self.cores = {role: tuple(cores.get(role) or cores[DEFAULT_ROLE[role]]) for role in ROLES}
+        self.whisper_threads = whisper_threads or len(self.cores["whisper"])
+
+    @classmethod
+    def from_spec(cls, spec, available=None):
+        """
+        Topology of a CPU_TOPOLOGY value; None for off (and auto on small machines)
+
+        Raises:
+            ValueError: malformed spec, unknown role or core outside `available`
+        """
+        available = tuple(available or available_cores())
+        spec = spec.strip().lower()
+        if spec in ("", "off", "0", "none"):
+            return None
+        if spec == "auto":
+            if len(available) < AUTO_MIN_CORES:
+                return None
+            reserved = max(1, min(API_CORES, len(available) - 1))
+            return cls({"api": available[:reserved], "whisper": available[reserved:]})
+
+        cores = {}
+        for item in filter(None, (item.strip() for item in spec.split(";"))):
+            role, _, cpu_list = item.partition("=")
+            role = role.strip()
+            if role not in ROLES:
+                raise ValueError(f"Unknown role {role!r} in CPU_TOPOLOGY (choose from {', '.join(ROLES)})")
+            cores[role] = parse_cpu_list(cpu_list)
+            outside = set(cores[role]) - set(available)
+            if outside:
+                raise ValueError(f"Cores {format_cpu_list(outside)} of {role!r} are not available "
+                                 f"(available: {format_cpu_list(available)})")
+        for role in ("api", "whisper"):
+            if role not in cores:
+                raise ValueError(f"CPU_TOPOLOGY needs at least the {role!r} cores")
+        return cls(cores)
+
+    def for_worker(self, index, workers):
+        """Topology of serve.py worker `index`: its own slice of the whisper cores"""
+        return Topology(dict(
+            self.cores,
+            whisper=split(self.cores["whisper"], workers, index),
+            tracks=split(self.cores["tracks"], workers, index),
+        ))
+
+    def for_track_worker(self, workers):
+        """Topology of a track worker: Whisper on the tracks cores, shared by `workers` processes"""
+        cores = self.cores["tracks"]
+        return Topology(dict(self.cores, whisper=cores), whisper_threads=max(1, len(cores) // workers))
+
+    def describe(self):
+        return {role: format_cpu_list(cores) for role, cores in self.cores.items()}
+
+
+class _StageCounts:
+    """Calls pinned per role (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = collections.Counter()
+
+    def add(self, role):
+        with self._lock:
+            self.counts[role] += 1
+
+
+try:
+    _topology = Topology.from_spec(CPU_TOPOLOGY)
+except ValueError as exc:
+    raise RuntimeError(f"Invalid CPU_TOPOLOGY={CPU_TOPOLOGY!r}: {exc}") from exc
+_stages = _StageCounts()
+
+
+def thread_env(threads):
+    """Environment sizing the OpenMP / BLAS pools of a process that has not started them yet"""
+    return {name: str(threads) for name in THREAD_ENV_VARS}
+
+
+if _topology is not None:
+    # torch and NumPy are only imported lazily, after this
+    for _name, _value in thread_env(_topology.whisper_threads).items():
+        os.environ.setdefault(_name, _value)
+
+
+def current():
+    """Topology of this process, None when pinning is off"""
+    return _topology
+
+
+def use_worker(index, workers):
+    """
+    Narrow this (forked) serve.py worker to its slice of the whisper cores
+
+    Returns:
+        int or None: the worker's torch thread budget, None when pinning is off
+    """
+    global _topology
+    if _topology is None:
+        return None
+    _topology = _topology.for_worker(index, workers)
+    return _topology.whisper_threads
+
+
+def use_track_worker(workers):
+    """
+    Move this track worker process (spawned, torch not loaded yet) to the
+    tracks cores, with its share of them as thread budget
+
+    Returns:
+        int or None: the torch thread budget, None when pinning is off
+    """
+    global _topology
+    if _topology is None:
+        return None
+    _topology = _topology.for_track_worker(workers)
+    os.environ.update(thread_env(_topology.whisper_threads))
+    pin("whisper")
+    return _topology.whisper_threads
+
+
+def configure_torch():
+    """
+    Size torch's thread pools to the whisper cores (no-op when pinning is off)
+
+    Called before the first inference: torch's inter-op pool can only be
+    sized before it starts, and Whisper does not use it.
+    """
+    if _topology is None:
+        return
+    import torch
+
+    torch.set_num_threads(_topology.whisper_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already started (set in another module, or a second model size)
+
+
+def pin(role):
+    """Move the calling thread (and threads it starts later) to the cores of `role`"""
+    if _topology is None or not hasattr(os, "sched_setaffinity"):
+        return
+    os.sched_setaffinity(0, _topology.cores[role])
+
+
+@contextmanager
+def stage(role):
+    """Run the calling thread on the cores of `role` for the duration of the block"""
+    if _topology is None or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, _topology.cores[role])
+    _stages.add(role)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+
+def stats():
+    if _topology is None:
+        return {'mode': 'off', 'available': format_cpu_list(available_cores())}
+    import sys
+
+    torch = sys.modules.get("torch")
+    return {
+        'mode': CPU_TOPOLOGY,
+        'available': format_cpu_list(available_cores()),
+        'cores': _topology.describe(),
+        'whisper_threads': _topology.whisper_threads,
+        'torch_threads': torch.get_num_threads() if torch is not None else None,
+        'pinned_calls': dict(_stages.counts),
+    }
@@ -0,0 +1,106 @@
+"""
+DECODING TIERS - Cedric's Meeting Report Generator
+Named latency / quality trade-offs for Whisper decoding
+
+Whisper's default decoding (sampling fallback over six temperatures with
+best-of-5, conditioning on the previous window) is expensive on CPU and not
+needed for a quick preview, while a medico-legal record deserves beam search.
+A tier bundles the model size and the decoding settings:
+
+    preview   base,   greedy, no temperature fallback, no conditioning
+    fast      small,  greedy, short fallback (0.0 / 0.4 / 0.8, best of 3),
+              no conditioning
+    standard  small,  Whisper's own decoding, unchanged (the default)
+    archive   medium, beam search (5), full fallback (best of 5),
+              conditioned on the previous window
+
+The default tier decodes exactly as the service did before tiers existed;
+the cheaper settings are opt-in until bench_tiers.py figures justify them.
+
+An explicit whisper_model still overrides the tier's model (and admission
+control may pick a smaller one under load); the decoding settings follow the
+tier. Measured real-time factor and WER per tier: bench_tiers.py.
+
+Only uses the standard library.
+"""
+
+import os
+
+
+TIERS = {
+    "preview": {
+        "model": "base",
+        "decoding": {
+            "temperature": 0.0,
+            "condition_on_previous_text": False,
+        },
+        "description": "Fast draft: greedy decoding, no retries",
+    },
+    "fast": {
+        "model": "small",
+        "decoding": {
+            "temperature": (0.0, 0.4, 0.8),
+            "best_of": 3,
+            "condition_on_previous_text": False,
+        },
+        "description": "Greedy, retried at higher temperature when a window looks wrong",
+    },
+    "standard": {
+        "model": "small",
+        # Whisper's defaults: the decoding of every request before tiers
+        "decoding": {},
+        "description": "Default: Whisper's own decoding settings",
+    },
+    "archive": {
+        "model": "medium",
+        "decoding": {
+            "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+            "beam_size": 5,
+            "best_of": 5,
+            "patience": 1.0,
+            "condition_on_previous_text": True,
+        },
+        "description": "Final record: beam search, full fallback, conditioned on the previous text",
+    },
+}
+
+DEFAULT_TIER = os.getenv("WHISPER_DEFAULT_TIER", "standard")
+
+
+def resolve(tier=None, whisper_model=None):
+    """
+    Tier name, model size and Whisper transcribe() options for a request
+
+    Args:
+        tier: Tier name (None = DEFAULT_TIER)
+        whisper_model: Explicit model size overriding the tier's model
+
+    Returns:
+        tuple: (tier_name, model_size, decoding_options)
+
+    Raises:
+        ValueError: unknown tier
+    """
+    name = (tier or DEFAULT_TIER).strip().lower()
+    if name not in TIERS:
+        raise ValueError(f"Unknown decoding tier {name!r} (choose from {', '.join(TIERS)})")
+    settings = TIERS[name]
+    return name, whisper_model or settings["model"], dict(settings["decoding"])
+
+
+def describe():
+    """Tiers as listed by GET /tiers"""
+    return {
+        "default": DEFAULT_TIER,
+        "tiers": {
+            name: {
+                "model": settings["model"],
+                "decoding": {
+                    key: list(value) if isinstance(value, tuple) else value
+                    for key, value in settings["decoding"].items()
+                },
+                "description": settings["description"],
+            }
+            for name, settings in TIERS.items()
+        },
+    }
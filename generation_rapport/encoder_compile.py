@@ -0,0 +1,160 @@
+"""
+ENCODER COMPILATION MODULE - Cedric's Meeting Report Generator
+Runs the Whisper audio encoder compiled instead of in eager PyTorch
+
+The encoder processes every 30-second window once and dominates CPU time.
+Its input always has the same shape (1 x n_mels x 3000: Whisper pads every
+window), which makes it a good fit for ahead-of-time compilation:
+
+    WHISPER_COMPILE_ENCODER=trace    TorchScript trace, frozen (weights folded
+                                     in as constants) and optimised for
+                                     inference; the module is saved to the
+                                     cache and simply loaded on restart
+    WHISPER_COMPILE_ENCODER=compile  torch.compile (Inductor); the generated
+                                     kernels go to Inductor's on-disk caches
+                                     under the cache directory, so a restart
+                                     skips code generation and C++ builds
+    WHISPER_COMPILE_ENCODER=off      eager PyTorch (default)
+
+Artifacts live in WHISPER_COMPILE_CACHE_DIR, keyed by model size, checkpoint
+hash, mel bins, device and torch version: a torch upgrade or another
+checkpoint never loads a stale artifact. When compilation fails the model
+keeps its eager encoder. Compare the modes with bench_encoder.py.
+
+Requirements:
+    pip install openai-whisper torch
+"""
+
+import os
+import time
+from pathlib import Path
+
+
+COMPILE_MODE = os.getenv("WHISPER_COMPILE_ENCODER", "off").strip().lower()
+CACHE_DIR = Path(os.getenv(
+    "WHISPER_COMPILE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "whisper-compiled"),
+))
+COMPILE_MODES = ("off", "trace", "compile")
+if COMPILE_MODE not in COMPILE_MODES:
+    raise RuntimeError(f"WHISPER_COMPILE_ENCODER must be one of {COMPILE_MODES}, got {COMPILE_MODE!r}")
+# Whisper pads every window to 30 s of mel frames
+N_FRAMES = 3000
+
+
+def _checkpoint_hash(model_size):
+    """SHA-256 prefix of the checkpoint whisper downloads for this size ('' if unknown)"""
+    try:
+        import whisper
+        # URLs look like .../models/<sha256>/<name>.pt
+        return whisper._MODELS[model_size].split("/")[-2][:12]
+    except (ImportError, AttributeError, KeyError, IndexError):
+        return ""
+
+
+def cache_key(model_size, n_mels, device):
+    import torch
+
+    parts = [model_size, _checkpoint_hash(model_size), f"mels{n_mels}", device, f"torch{torch.__version__}"]
+    return "-".join(part.replace("/", "_").replace("+", "_") for part in parts if part)
+
+
+def _example_input(model, device):
+    import torch
+
+    n_mels = model.dims.n_mels
+    return torch.zeros(1, n_mels, N_FRAMES, device=device, dtype=next(model.encoder.parameters()).dtype)
+
+
+def _traced_encoder(model, model_size, device, cache_dir):
+    """Frozen TorchScript encoder, loaded from the cache or traced and saved"""
+    import torch
+
+    path = cache_dir / f"encoder-{cache_key(model_size, model.dims.n_mels, device)}.pt"
+    if path.exists():
+        try:
+            return torch.jit.load(str(path), map_location=device), True
+        except Exception as e:
+            print(f"⚠ Cached encoder {path.name} could not be loaded ({e}), tracing again")
+
+    example = _example_input(model, device)
+    with torch.no_grad():
+        traced = torch.jit.trace(model.encoder.eval(), example)
+        traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+        traced(example)  # run the optimisation passes once before saving
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    torch.jit.save(traced, str(tmp_path))
+    os.replace(tmp_path, path)
+    return traced, False
+
+
+def _compiled_encoder(model, cache_dir):
+    """torch.compile'd encoder with Inductor's caches persisted under cache_dir"""
+    import torch
+
+    inductor_dir = cache_dir / f"inductor-torch{torch.__version__.replace('+', '_')}"
+    # Must be set before Inductor first reads them
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(inductor_dir))
+    os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+    cached = inductor_dir.exists()
+    # Compilation itself happens on the first call (the warm-up inference)
+    return torch.compile(model.encoder, dynamic=False), cached
+
+
+def compile_encoder(model, model_size, device, mode=None, cache_dir=None):
+    """
+    Replace model.encoder by its compiled version in place
+
+    Args:
+        model: Loaded Whisper model
+        model_size: Whisper size (part of the cache key)
+        device: Device the model lives on
+        mode: 'trace', 'compile' or 'off' (default: WHISPER_COMPILE_ENCODER)
+        cache_dir: Artifact cache (default: WHISPER_COMPILE_CACHE_DIR)
+
+    Returns:
+        dict: {'mode', 'cached' (artifact found on disk), 'seconds'} or None when off
+    """
+    mode = (mode or COMPILE_MODE).lower()
+    if mode not in COMPILE_MODES:
+        raise ValueError(f"mode must be one of {COMPILE_MODES}, got {mode!r}")
+    if mode == "off" or getattr(model, "compiled_encoder", None):
+        return None
+    if mode == "trace" and device != "cpu":
+        # The trace bakes in fp32, while Whisper feeds fp16 mels on GPU
+        print("⚠ WHISPER_COMPILE_ENCODER=trace is CPU only; staying eager")
+        return None
+
+    import torch
+
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    started = time.perf_counter()
+    try:
+        if mode == "trace":
+            encoder, cached = _traced_encoder(model, model_size, device, cache_dir)
+        else:
+            encoder, cached = _compiled_encoder(model, cache_dir)
+    except Exception as e:
+        print(f"⚠ Could not compile the Whisper encoder ({model_size}, {mode}): {e}; staying eager")
+        return None
+
+    class CompiledEncoder(torch.nn.Module):
+        """Drop-in for AudioEncoder (whisper calls model.encoder(mel))"""
+
+        def __init__(self):
+            super().__init__()
+            # trace: holds its own folded weights, the eager encoder is freed;
+            # compile: wraps (and shares the parameters of) the eager encoder
+            self.compiled = encoder
+
+        def forward(self, x):
+            return self.compiled(x)
+
+    model.encoder = CompiledEncoder()
+    model.compiled_encoder = mode
+
+    info = {'mode': mode, 'cached': cached, 'seconds': round(time.perf_counter() - started, 3)}
+    print(f"✓ Whisper encoder ({model_size}) compiled: {info}")
+    return info
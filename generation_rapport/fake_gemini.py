@@ -0,0 +1,371 @@
+"""
+FAKE GEMINI SERVER - Cedric's Meeting Report Generator
+Local stand-in for the parts of the Gemini REST API the generator uses
+
+Lets the structuring step, the context cache and load tests run without a
+Google account, quota or network. The google-generativeai SDK talks to it
+when the generator is started with:
+
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8089
+
+Endpoints (v1beta, camelCase or snake_case JSON):
+    POST   /v1beta/models/{model}:generateContent   canned report JSON
+    POST   /v1beta/cachedContents                   create (TTL, min size)
+    GET    /v1beta/cachedContents                   list
+    GET    /v1beta/cachedContents/{id}              get
+    PATCH  /v1beta/cachedContents/{id}              extend ttl / expireTime
+    DELETE /v1beta/cachedContents/{id}              delete
+    GET    /stats                                   calls, tokens, caches
+
+Tokens are estimated as characters / 4. Latency is simulated as a fixed
+overhead plus a cost per uncached input token (prefill) and per output
+token, so cached prefixes are measurably faster, as with the real API.
+For load tests (bench_load.py), a random jitter can be added to the latency
+and a fraction of generateContent calls can fail with 500 INTERNAL or
+429 RESOURCE_EXHAUSTED.
+
+Usage:
+    python fake_gemini.py --port 8089 --min-cache-tokens 1024
+    python fake_gemini.py --latency 2 --jitter 0.5 --error-rate 0.02 --rate-limit-rate 0.05
+
+Only uses the standard library.
+"""
+
+import argparse
+import datetime
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Same schema as the structuring prompt (cedric_file2.py)
+CANNED_REPORT = {
+    "meeting_metadata": {
+        "date": "",
+        "type": "medical",
+        "duration_estimate": "30 minutes",
+    },
+    "participants": ["Dr Martin (oncologue)", "Dr Bernard (radiologue)"],
+    "summary": "Compte-rendu généré par le serveur Gemini de test.",
+    "sections": [
+        {"title": "Discussion", "content": "Contenu de test.", "timestamp": "00:00"},
+    ],
+    "key_points": ["Réponse générée sans appel à l'API Gemini"],
+    "action_items": [
+        {"task": "Vérifier le rendu du rapport", "responsible": "Dr Martin", "deadline": "À définir"},
+    ],
+    "decisions": ["Aucune décision réelle (serveur de test)"],
+}
+
+_MODEL_PATH = re.compile(r"^/v1beta/models/([^/:]+):generateContent$")
+_CACHE_PATH = re.compile(r"^/v1beta/(cachedContents)(?:/([^/]+))?$")
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _get(body, camel, default=None):
+    """Field of a request body, in camelCase or snake_case"""
+    if camel in body:
+        return body[camel]
+    snake = re.sub(r"([A-Z])", lambda m: "_" + m.group(1).lower(), camel)
+    return body.get(snake, default)
+
+
+def _contents_text(contents):
+    texts = []
+    for content in contents or []:
+        if isinstance(content, str):
+            texts.append(content)
+            continue
+        for part in content.get("parts", []):
+            texts.append(part if isinstance(part, str) else part.get("text", ""))
+    return "".join(texts)
+
+
+def _parse_duration(value):
+    """'3600s' / '3600.5s' / {'seconds': 3600} -> seconds"""
+    if isinstance(value, dict):
+        return float(value.get("seconds", 0)) + float(value.get("nanos", 0)) / 1e9
+    return float(str(value).rstrip("s"))
+
+
+def _rfc3339(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FakeGemini:
+    """State shared by the request handlers (thread-safe)"""
+
+    def __init__(self, min_cache_tokens=1024, base_latency=0.05,
+                 prefill_ms_per_1k=20.0, output_ms_per_1k=200.0, response=None,
+                 jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=None):
+        self.min_cache_tokens = min_cache_tokens
+        self.base_latency = base_latency
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.output_ms_per_1k = output_ms_per_1k
+        self.jitter = jitter                    # extra latency, uniform in [0, jitter] s
+        self.error_rate = error_rate            # fraction of calls answered 500
+        self.rate_limit_rate = rate_limit_rate  # fraction of calls answered 429
+        self.random = random.Random(seed)
+        self.response_text = json.dumps(response or CANNED_REPORT, ensure_ascii=False)
+        self.caches = {}  # id -> cache resource (dict)
+        self.lock = threading.Lock()
+        self.counters = {
+            "generate_calls": 0,
+            "cached_generate_calls": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "caches_created": 0,
+            "caches_rejected": 0,
+            "errors": 0,
+            "rate_limited": 0,
+        }
+
+    def _expire(self):
+        now = time.time()
+        for cache_id in [cid for cid, c in self.caches.items() if c["_expires"] <= now]:
+            del self.caches[cache_id]
+
+    def _resource(self, cache):
+        return {k: v for k, v in cache.items() if not k.startswith("_")}
+
+    # -- cachedContents -------------------------------------------------------
+
+    def create_cache(self, body):
+        text = (_contents_text(_get(body, "contents", [])) + _contents_text(
+            [_get(body, "systemInstruction")] if _get(body, "systemInstruction") else []))
+        tokens = estimate_tokens(text)
+        if tokens < self.min_cache_tokens:
+            with self.lock:
+                self.counters["caches_rejected"] += 1
+            return 400, {"error": {
+                "code": 400, "status": "INVALID_ARGUMENT",
+                "message": f"Cached content is too small. total_token_count={tokens}, min_total_token_count={self.min_cache_tokens}",
+            }}
+        ttl = _parse_duration(_get(body, "ttl", "3600s"))
+        now = time.time()
+        cache_id = uuid.uuid4().hex[:16]
+        model = _get(body, "model", "")
+        cache = {
+            "name": f"cachedContents/{cache_id}",
+            "model": model if model.startswith("models/") else f"models/{model}",
+            "displayName": _get(body, "displayName", ""),
+            "createTime": _rfc3339(now),
+            "updateTime": _rfc3339(now),
+            "expireTime": _rfc3339(now + ttl),
+            "usageMetadata": {"totalTokenCount": tokens},
+            "_expires": now + ttl,
+            "_tokens": tokens,
+        }
+        with self.lock:
+            self._expire()
+            self.caches[cache_id] = cache
+            self.counters["caches_created"] += 1
+        return 200, self._resource(cache)
+
+    def list_caches(self):
+        with self.lock:
+            self._expire()
+            return 200, {"cachedContents": [self._resource(c) for c in self.caches.values()]}
+
+    def get_cache(self, cache_id):
+        with self.lock:
+            self._expire()
+            cache = self.caches.get(cache_id)
+            if cache is None:
+                return 404, _not_found(cache_id)
+            return 200, self._resource(cache)
+
+    def update_cache(self, cache_id, body):
+        with self.lock:
+            self._expire()
+            cache = self.caches.get(cache_id)
+            if cache is None:
+                return 404, _not_found(cache_id)
+            now = time.time()
+            if _get(body, "ttl") is not None:
+                cache["_expires"] = now + _parse_duration(_get(body, "ttl"))
+            elif _get(body, "expireTime") is not None:
+                expire = datetime.datetime.fromisoformat(_get(body, "expireTime").replace("Z", "+00:00"))
+                cache["_expires"] = expire.timestamp()
+            cache["expireTime"] = _rfc3339(cache["_expires"])
+            cache["updateTime"] = _rfc3339(now)
+            return 200, self._resource(cache)
+
+    def delete_cache(self, cache_id):
+        with self.lock:
+            if self.caches.pop(cache_id, None) is None:
+                return 404, _not_found(cache_id)
+            return 200, {}
+
+    # -- generateContent ------------------------------------------------------
+
+    def generate(self, model, body):
+        cached_tokens = 0
+        cached_name = _get(body, "cachedContent")
+        if cached_name:
+            with self.lock:
+                self._expire()
+                cache = self.caches.get(cached_name.split("/")[-1])
+            if cache is None:
+                return 404, _not_found(cached_name)
+            cached_tokens = cache["_tokens"]
+
+        with self.lock:
+            draw = self.random.random()
+            jitter = self.random.uniform(0.0, self.jitter)
+        if draw < self.rate_limit_rate:
+            with self.lock:
+                self.counters["rate_limited"] += 1
+            return 429, {"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED",
+                "message": "Quota exceeded (fake_gemini). Please retry in 1s.",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "1s"}],
+            }}
+
+        new_tokens = estimate_tokens(_contents_text(_get(body, "contents", [])))
+        output_tokens = estimate_tokens(self.response_text)
+        time.sleep(self.base_latency + jitter
+                   + new_tokens * self.prefill_ms_per_1k / 1e6
+                   + output_tokens * self.output_ms_per_1k / 1e6)
+
+        if draw < self.rate_limit_rate + self.error_rate:
+            with self.lock:
+                self.counters["errors"] += 1
+            return 500, {"error": {"code": 500, "status": "INTERNAL", "message": "Injected failure (fake_gemini)"}}
+
+        with self.lock:
+            self.counters["generate_calls"] += 1
+            self.counters["cached_generate_calls"] += bool(cached_name)
+            self.counters["prompt_tokens"] += new_tokens + cached_tokens
+            self.counters["cached_tokens"] += cached_tokens
+
+        usage = {
+            "promptTokenCount": new_tokens + cached_tokens,
+            "candidatesTokenCount": output_tokens,
+            "totalTokenCount": new_tokens + cached_tokens + output_tokens,
+        }
+        if cached_tokens:
+            usage["cachedContentTokenCount"] = cached_tokens
+        return 200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": self.response_text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": usage,
+            "modelVersion": model,
+        }
+
+    def stats(self):
+        with self.lock:
+            self._expire()
+            return {**self.counters, "live_caches": len(self.caches)}
+
+
+def _not_found(name):
+    return {"error": {"code": 404, "status": "NOT_FOUND", "message": f"{name} not found or expired"}}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _route(self, method):
+            path = self.path.split("?", 1)[0]
+            if method == "GET" and path == "/stats":
+                return self._reply(200, fake.stats())
+            match = _MODEL_PATH.match(path)
+            if match and method == "POST":
+                return self._reply(*fake.generate(match.group(1), self._body()))
+            match = _CACHE_PATH.match(path)
+            if match:
+                cache_id = match.group(2)
+                if cache_id is None and method == "POST":
+                    return self._reply(*fake.create_cache(self._body()))
+                if cache_id is None and method == "GET":
+                    return self._reply(*fake.list_caches())
+                if cache_id and method == "GET":
+                    return self._reply(*fake.get_cache(cache_id))
+                if cache_id and method == "PATCH":
+                    return self._reply(*fake.update_cache(cache_id, self._body()))
+                if cache_id and method == "DELETE":
+                    return self._reply(*fake.delete_cache(cache_id))
+            self._reply(404, _not_found(path))
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_PATCH(self):
+            self._route("PATCH")
+
+        def do_DELETE(self):
+            self._route("DELETE")
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8089, **options):
+    """Start the fake server in a background thread; returns (server, FakeGemini)"""
+    fake = FakeGemini(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--min-cache-tokens", type=int, default=1024,
+                        help="Smallest cacheable prefix (the real API requires ~1024+)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fixed seconds per generateContent call")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=20.0,
+                        help="Simulated milliseconds per 1000 uncached input tokens")
+    parser.add_argument("--output-ms-per-1k", type=float, default=200.0,
+                        help="Simulated milliseconds per 1000 output tokens")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls failing with 429")
+    parser.add_argument("--seed", type=int, help="Random seed of the jitter and failures")
+    args = parser.parse_args()
+
+    fake = FakeGemini(min_cache_tokens=args.min_cache_tokens, base_latency=args.latency,
+                      prefill_ms_per_1k=args.prefill_ms_per_1k, output_ms_per_1k=args.output_ms_per_1k,
+                      jitter=args.jitter, error_rate=args.error_rate,
+                      rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    print(f"✓ Fake Gemini listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""
+GEMINI DISPATCHER MODULE - Cedric's Meeting Report Generator
+Rate-limit-aware scheduling of Gemini calls over a pool of API keys and models
+
+Gemini quotas are per key and per model: requests per minute (RPM) and
+tokens per minute (TPM). With a single key and model, a burst of reports
+hit 429 errors and came back as failed reports. Every Gemini call now goes
+through a GeminiDispatcher:
+- Each (key, model) pair is a lane with two token buckets, refilled
+  continuously at its RPM and TPM limits
+- A call reserves one request and its estimated tokens (prompt characters
+  / 4 plus the expected output) on a lane with headroom; the estimate is
+  corrected with the usage Gemini reports
+- Models are tried in the configured order (cheaper fallbacks last), keys
+  by most headroom
+- Calls that fit nowhere wait until a bucket refills, up to a timeout,
+  instead of failing; interactive requests are served before bulk ones
+  (scheduling.py); a waiting call whose request is cancelled
+  (cancellation.py) leaves the queue at once
+- A 429 from the API puts the lane in cool-down (the server's retry delay
+  when given) and the call is retried on another lane
+
+Configuration:
+    GEMINI_API_KEYS=key1,key2           extra keys (GEMINI_API_KEY comes first)
+    GEMINI_MODELS=gemini-2.5-flash,gemini-2.5-flash-lite
+    GEMINI_RPM=10 GEMINI_TPM=250000     default limits per key and model
+    GEMINI_LIMITS=gemini-2.5-flash-lite=15/250000   per-model overrides
+
+Extra keys need a google-generativeai version in PER_KEY_SDK_VERSIONS (see
+Lane.model_instance); the dispatcher refuses to start with another one.
+`python gemini_dispatcher.py` checks against a stubbed SDK that every lane
+calls Gemini with its own key.
+
+Only uses the standard library (the SDK is imported for extra keys only).
+"""
+
+import os
+import re
+import threading
+import time
+
+import cancellation
+import scheduling
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+API_KEYS = _split(os.getenv("GEMINI_API_KEYS", ""))
+MODELS = _split(os.getenv("GEMINI_MODELS", "gemini-2.5-flash"))
+DEFAULT_RPM = float(os.getenv("GEMINI_RPM", "10"))
+DEFAULT_TPM = float(os.getenv("GEMINI_TPM", "250000"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "300"))
+# Output tokens reserved per call until Gemini reports the real count
+EXPECTED_OUTPUT_TOKENS = 2048
+# Longest sleep between two checks of a waiting call's cancellation
+CANCEL_POLL_SECONDS = 1.0
+# Cool-down of a lane after a 429 without a retry delay from the server
+RATE_LIMIT_COOLDOWN_SECONDS = 30.0
+MAX_ATTEMPTS = 3
+# google-generativeai versions [from, to) whose GenerativeModel takes its
+# client from `model._client` (see Lane.model_instance)
+PER_KEY_SDK_VERSIONS = ((0, 3), (0, 9))
+
+
+def _parse_limits(value):
+    """'model=rpm/tpm,...' -> {model: (rpm, tpm)}"""
+    limits = {}
+    for item in _split(value):
+        model, _, numbers = item.partition("=")
+        rpm, _, tpm = numbers.partition("/")
+        limits[model.strip()] = (float(rpm or DEFAULT_RPM), float(tpm or DEFAULT_TPM))
+    return limits
+
+
+MODEL_LIMITS = _parse_limits(os.getenv("GEMINI_LIMITS", ""))
+
+
+class QuotaTimeout(Exception):
+    """Raised when no lane had quota for a call before the queue timeout"""
+
+
+def check_per_key_sdk():
+    """
+    Fail unless the installed SDK can call Gemini with more than one key
+
+    Raises:
+        RuntimeError: google-generativeai outside PER_KEY_SDK_VERSIONS
+    """
+    import google.generativeai as genai
+
+    version = getattr(genai, "__version__", "")
+    numbers = tuple(int(part) for part in re.findall(r"\d+", version)[:2])
+    low, high = PER_KEY_SDK_VERSIONS
+    if len(numbers) < 2 or not low <= numbers < high:
+        raise RuntimeError(
+            f"GEMINI_API_KEYS needs google-generativeai >={'.'.join(map(str, low))},"
+            f"<{'.'.join(map(str, high))} (installed: {version or 'unknown'}); "
+            "unset GEMINI_API_KEYS to use GEMINI_API_KEY alone"
+        )
+
+
+def estimate_tokens(text):
+    """Rough token count of a prompt (Gemini averages ~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def is_rate_limited(error):
+    text = f"{type(error).__name__} {error}"
+    return "ResourceExhausted" in text or "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def _retry_delay(error):
+    """Retry delay suggested by a 429 ('retry_delay { seconds: 17 }' / 'retryDelay': '17s' / 'retry in 17.5s')"""
+    match = re.search(r"retry(?:_?delay\W+(?:seconds:\s*)?| in )(\d+(?:\.\d+)?)", str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else RATE_LIMIT_COOLDOWN_SECONDS
+
+
+class TokenBucket:
+    """`capacity` units refilled at `capacity` per minute; the level may go negative (debt)"""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now):
+        self._refill(now)
+        return self.level
+
+    def seconds_until(self, amount, now):
+        """Seconds until `amount` can be taken (amounts above capacity wait for a full bucket)"""
+        missing = min(amount, self.capacity) - self.available(now)
+        return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+
+class Lane:
+    """One API key used with one model"""
+
+    def __init__(self, key, key_index, model, rpm, tpm):
+        self.key = key
+        self.key_index = key_index
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.counters = {'calls': 0, 'rate_limited': 0, 'tokens': 0}
+        self._client = None
+
+    @property
+    def name(self):
+        return f"{self.model}#key{self.key_index}"
+
+    @property
+    def primary(self):
+        """Uses the key genai.configure() was called with (context cache, default client)"""
+        return self.key_index == 0
+
+    def seconds_until(self, tokens, now):
+        return max(
+            self.cooldown_until - now,
+            self.requests.seconds_until(1, now),
+            self.tokens.seconds_until(tokens, now),
+        )
+
+    def headroom(self, now):
+        """Smallest remaining fraction of the two quotas"""
+        return min(
+            self.requests.available(now) / self.requests.capacity,
+            self.tokens.available(now) / self.tokens.capacity,
+        )
+
+    def client(self):
+        """Generative service client bound to this lane's key (None = the SDK default)"""
+        if self.primary:
+            return None
+        if self._client is None:
+            # genai.configure() is process-wide; other keys get their own
+            # client from the SDK's public service layer
+            from google.ai import generativelanguage
+
+            options = {"api_key": self.key}
+            endpoint = os.getenv("GEMINI_API_ENDPOINT", "")
+            if endpoint:
+                options["api_endpoint"] = endpoint
+            self._client = generativelanguage.GenerativeServiceClient(
+                client_options=options, transport="rest" if endpoint else None
+            )
+        return self._client
+
+    def model_instance(self, model):
+        """
+        Point a GenerativeModel at this lane's key
+
+        GenerativeModel has no public client argument: the versions in
+        PER_KEY_SDK_VERSIONS (checked when the dispatcher is created) use
+        `model._client` when it is set, else the process-wide client.
+        """
+        client = self.client()
+        if client is not None:
+            if not hasattr(model, "_client"):
+                raise RuntimeError("This google-generativeai version cannot use per-key clients")
+            model._client = client
+        return model
+
+
+class GeminiDispatcher:
+    """
+    Schedules Gemini calls on the lanes with quota left (see module docstring)
+
+    Use from worker threads (structuring runs in the threadpool):
+        response, lane, waited = dispatcher.call(lambda lane: ..., estimated_tokens)
+    """
+
+    def __init__(self, keys, models=None, limits=None, timeout=QUEUE_TIMEOUT_SECONDS):
+        models = models or MODELS
+        limits = MODEL_LIMITS if limits is None else limits
+        if len(keys) > 1:
+            check_per_key_sdk()
+        self.timeout = timeout
+        # Lanes in preference order: models first, keys within a model
+        self.lanes = [
+            Lane(key, index, model, *limits.get(model, (DEFAULT_RPM, DEFAULT_TPM)))
+            for model in models
+            for index, key in enumerate(keys)
+        ]
+        self._changed = threading.Condition()
+        self._queue = scheduling.WaitQueue("structure")
+        self.counters = {'calls': 0, 'queued': 0, 'timed_out': 0, 'cancelled': 0, 'retried': 0,
+                         'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'max_queue': 0}
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+    def _pick(self, tokens, now):
+        """Lane that can take the call right now, or None"""
+        for model in dict.fromkeys(lane.model for lane in self.lanes):
+            ready = [lane for lane in self.lanes if lane.model == model and lane.seconds_until(tokens, now) == 0]
+            if ready:
+                return max(ready, key=lambda lane: lane.headroom(now))
+        return None
+
+    def _acquire(self, tokens):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._changed:
+            ticket = self._queue.add()
+            self.counters['max_queue'] = max(self.counters['max_queue'], len(self._queue))
+            queued = served = False
+            try:
+                while True:
+                    try:
+                        # A cancelled request must not hold its place (or the head) of the queue
+                        cancellation.check("structure")
+                    except cancellation.Cancelled:
+                        self.counters['cancelled'] += 1
+                        raise
+                    now = time.monotonic()
+                    # Only the most urgent waiting call may take a lane
+                    lane = self._pick(tokens, now) if self._queue.head() is ticket else None
+                    if lane is not None:
+                        served = True
+                        break
+                    if now >= deadline:
+                        self.counters['timed_out'] += 1
+                        raise QuotaTimeout(f"No Gemini quota left within {self.timeout:.0f} s")
+                    if not queued:
+                        queued = True
+                        self.counters['queued'] += 1
+                    wait = min(lane.seconds_until(tokens, now) for lane in self.lanes)
+                    self._changed.wait(timeout=min(max(wait, 0.05), deadline - now, CANCEL_POLL_SECONDS))
+            finally:
+                self._queue.remove(ticket, served=served)
+                self._changed.notify_all()
+
+            lane.requests.take(1, now)
+            lane.tokens.take(min(tokens, lane.tokens.capacity), now)
+            lane.in_flight += 1
+            waited = now - started
+            self.counters['calls'] += 1
+            self.counters['wait_seconds'] += waited
+            self.counters['max_wait_seconds'] = max(self.counters['max_wait_seconds'], waited)
+        return lane, waited
+
+    def _release(self, lane, reserved, response=None, rate_limited=None):
+        usage = getattr(response, "usage_metadata", None)
+        used = getattr(usage, "total_token_count", None)
+        with self._changed:
+            now = time.monotonic()
+            lane.in_flight -= 1
+            lane.counters['calls'] += 1
+            if used:
+                # Settle the estimate: refund or add the difference
+                lane.tokens.take(used - min(reserved, lane.tokens.capacity), now)
+                lane.counters['tokens'] += used
+            if rate_limited is not None:
+                lane.counters['rate_limited'] += 1
+                lane.cooldown_until = now + _retry_delay(rate_limited)
+                print(f"⚠ Gemini quota hit on {lane.name}; cooling down "
+                      f"{lane.cooldown_until - now:.0f} s")
+            self._changed.notify_all()
+
+    def call(self, generate, estimated_tokens):
+        """
+        Run `generate(lane)` on a lane with quota, retrying 429s on other lanes
+
+        Args:
+            generate: Function of the Lane making the Gemini call
+            estimated_tokens: Prompt tokens plus expected output tokens
+
+        Returns:
+            tuple: (return value of `generate`, Lane used, seconds queued)
+
+        Raises:
+            QuotaTimeout: no quota became available within the queue timeout
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            lane, waited = self._acquire(estimated_tokens)
+            try:
+                response = generate(lane)
+            except Exception as e:
+                limited = is_rate_limited(e)
+                self._release(lane, estimated_tokens, rate_limited=e if limited else None)
+                if not limited or attempt == MAX_ATTEMPTS:
+                    raise
+                self.counters['retried'] += 1
+                continue
+            self._release(lane, estimated_tokens, response)
+            return response, lane, waited
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def stats(self):
+        with self._changed:
+            now = time.monotonic()
+            return {
+                'queued_now': len(self._queue),
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.counters.items()},
+                'lanes': [
+                    {
+                        'lane': lane.name,
+                        'rpm_limit': lane.requests.capacity,
+                        'rpm_available': round(lane.requests.available(now), 2),
+                        'tpm_limit': lane.tokens.capacity,
+                        'tpm_available': round(lane.tokens.available(now)),
+                        'headroom': round(max(0.0, lane.headroom(now)), 3),
+                        'cooling_down_seconds': round(max(0.0, lane.cooldown_until - now), 1),
+                        'in_flight': lane.in_flight,
+                        **lane.counters,
+                    }
+                    for lane in self.lanes
+                ],
+            }
+
+
+_dispatchers = {}
+_dispatchers_lock = threading.Lock()
+
+
+def for_key(primary_key):
+    """Process-wide dispatcher whose first key is `primary_key` (plus GEMINI_API_KEYS)"""
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(primary_key)
+        if dispatcher is None:
+            keys = [primary_key] + [key for key in API_KEYS if key != primary_key]
+            dispatcher = _dispatchers[primary_key] = GeminiDispatcher(keys)
+        return dispatcher
+
+
+def stats():
+    # Keyed by position: never expose the keys themselves
+    return [dispatcher.stats() for dispatcher in _dispatchers.values()]
+
+
+if __name__ == "__main__":
+    # Self-check against a stubbed SDK: each lane calls Gemini with its own key
+    import sys
+    import types
+
+    configured = {}
+
+    class _ServiceClient:
+        def __init__(self, client_options=None, transport=None):
+            self.key = client_options["api_key"]
+
+        def generate_content(self, prompt):
+            return types.SimpleNamespace(text=self.key, usage_metadata=None)
+
+    class _GenerativeModel:
+        def __init__(self, model_name):
+            self.model_name = model_name
+            self._client = None
+
+        def generate_content(self, prompt):
+            client = self._client or _ServiceClient({"api_key": configured["api_key"]})
+            return client.generate_content(prompt)
+
+    stub_genai = types.ModuleType("google.generativeai")
+    stub_genai.__version__ = "0.8.5"
+    stub_genai.configure = lambda api_key, **options: configured.update(api_key=api_key)
+    stub_genai.GenerativeModel = _GenerativeModel
+    stub_language = types.ModuleType("google.ai.generativelanguage")
+    stub_language.GenerativeServiceClient = _ServiceClient
+    stub_google = sys.modules.setdefault("google", types.ModuleType("google"))
+    stub_ai = types.ModuleType("google.ai")
+    stub_google.generativeai, stub_google.ai, stub_ai.generativelanguage = stub_genai, stub_ai, stub_language
+    sys.modules.update({"google.generativeai": stub_genai, "google.ai": stub_ai,
+                        "google.ai.generativelanguage": stub_language})
+
+    stub_genai.configure(api_key="key-0")
+    dispatcher = GeminiDispatcher(["key-0", "key-1", "key-2"], models=["stub-model"],
+                                  limits={"stub-model": (1000, 10**9)})
+    failures = 0
+    for lane in dispatcher.lanes:
+        used = lane.model_instance(stub_genai.GenerativeModel(lane.model)).generate_content("ping").text
+        print(f"{'✓' if used == lane.key else '✗'} {lane.name} called with {used}")
+        failures += used != lane.key
+    for _ in range(6):
+        response, lane, _ = dispatcher.call(
+            lambda lane: lane.model_instance(stub_genai.GenerativeModel(lane.model)).generate_content("ping"), 10
+        )
+        failures += response.text != lane.key
+    print(f"{'✓' if not failures else '✗'} dispatched calls used their lane's key")
+
+    stub_genai.__version__ = "0.9.0"
+    try:
+        GeminiDispatcher(["key-0", "key-1"], models=["stub-model"])
+        print("✗ unsupported SDK version accepted")
+        failures += 1
+    except RuntimeError as e:
+        print(f"✓ unsupported SDK version refused: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,401 @@
+"""
+MEDICAL LEXICON MODULE - Cedric's Meeting Report Generator
+Corrects oncology terms in Whisper transcripts against a lexicon
+
+Small Whisper models hear "pembrolizumab", "adénocarcinome" or "T2N1M0"
+but often spell them wrong ("pembrolisumab", "adenocarcinome", "t2 n1 m0"),
+which used to call for a larger model at several times the CPU cost. After
+transcription, each word is now matched against an oncology lexicon:
+- seeded from MeetingTranscriber.MEDICAL_PROMPT, plus the built-in drug,
+  tumour and examination names below, plus LEXICON_FILE if set
+- exact matches ignoring accents and case restore the lexicon spelling
+  (only for words written without accents, so "métastasé" stays)
+- longer words are matched fuzzily through a symmetric-delete index
+  (every spelling with up to 1-2 letters deleted, precomputed), so a
+  lookup is a few dictionary probes instead of a scan of the lexicon;
+  ambiguous matches are left alone, and so are words that end
+  differently from the term ("pathologique" is not "pathologiste")
+- common French words close to a term (COMMON_WORDS) are never corrected
+- two words that only form a term together ("carbo platine") are joined
+- TNM stages are normalised ("t2 n1 m0" -> "T2N1M0")
+
+LEXICON_FILE holds one term per line; "variant = term" maps a known
+misspelling, "!word" protects a word from being corrected, "#" comments.
+
+Only uses the standard library.
+"""
+
+import os
+import re
+import threading
+import unicodedata
+
+
+CORRECTION_ENABLED = os.getenv("LEXICON_CORRECTION", "1") != "0"
+LEXICON_FILE = os.getenv("LEXICON_FILE", "")
+
+# Words shorter than this are only corrected for accents and case
+FUZZY_MIN_LENGTH = 8
+# Edit distance allowed for the shorter of the two words: 1 from 8 letters, 2 from 12
+DISTANCE_BY_LENGTH = ((12, 2), (FUZZY_MIN_LENGTH, 1))
+# Words shorter than this are never part of a join ("de", "la", ...)
+JOIN_MIN_PART = 3
+# A fuzzy match must end with the same letters as the term: French endings
+# (-ique / -iste, -isé / -ité, -ale / -aux) change the word, not its spelling
+ENDING_LETTERS = 2
+
+ONCOLOGY_TERMS = (
+    # Cytotoxic drugs
+    "cisplatine", "carboplatine", "oxaliplatine", "cyclophosphamide", "doxorubicine",
+    "épirubicine", "docétaxel", "paclitaxel", "gemcitabine", "capécitabine",
+    "fluorouracile", "irinotécan", "étoposide", "vinorelbine", "pémétrexed",
+    "témozolomide", "méthotrexate", "bléomycine",
+    # Targeted therapies and immunotherapies
+    "pembrolizumab", "nivolumab", "atézolizumab", "durvalumab", "ipilimumab",
+    "trastuzumab", "pertuzumab", "bévacizumab", "cétuximab", "panitumumab",
+    "rituximab", "imatinib", "osimertinib", "erlotinib", "sunitinib", "sorafénib",
+    "lenvatinib", "olaparib", "palbociclib", "ribociclib", "abémaciclib",
+    # Hormone therapies
+    "tamoxifène", "létrozole", "anastrozole", "exémestane", "enzalutamide",
+    "abiratérone", "leuproréline",
+    # Tumours
+    "glioblastome", "mésothéliome", "myélome", "leucémie", "lymphome hodgkinien",
+    "hépatocarcinome", "cholangiocarcinome", "néphroblastome", "neuroblastome",
+    "ostéosarcome", "liposarcome", "léiomyosarcome", "séminome", "astrocytome",
+    "méningiome", "carcinose péritonéale", "néoplasie", "néoplasme", "tumeur neuroendocrine",
+    # Examinations, procedures, follow-up
+    "mammographie", "échographie", "coloscopie", "fibroscopie", "endoscopie",
+    "scintigraphie", "immunohistochimie", "cytoponction", "mastectomie",
+    "tumorectomie", "colectomie", "gastrectomie", "prostatectomie", "lobectomie",
+    "hystérectomie", "néoadjuvant", "néoadjuvante", "adjuvant", "adjuvante",
+    "radiochimiothérapie", "curiethérapie", "hormonothérapie", "thérapie ciblée",
+    "oncologie", "radiologie", "pathologie", "envahissement", "différencié",
+    "indifférencié", "progression", "stabilité", "toxicité", "neutropénie",
+    "thrombopénie", "anémie", "mucite",
+)
+
+# Common words within reach of a term ("infirmer" / "infirmier")
+PROTECTED_WORDS = ("infirmer", "infirmes")
+# Ordinary adjectives and participles of a meeting, next to the terms they derive from
+COMMON_WORDS = (
+    "pathologique", "pathologiques", "oncologique", "oncologiques", "radiologique",
+    "radiologiques", "histologique", "histologiques", "médicale", "médicales", "médicaux",
+    "tumoral", "tumorale", "tumorales", "stabilisé", "stabilisée", "stabilisés", "stabilisées",
+    "progressif", "progressive", "progressifs", "progressives", "différenciée", "différenciées",
+    "métastatique", "métastatiques", "ganglionnaire", "ganglionnaires", "chirurgical",
+    "chirurgicale", "chirurgicaux", "thérapeutique", "thérapeutiques", "toxique", "toxiques",
+)
+
+# Sample meeting text the lexicon must leave as it is (python medical_lexicon.py)
+ORDINARY_TEXT = (
+    "Le dossier médical de la patiente a été revu. L'examen pathologique est sans particularité, "
+    "la maladie est stabilisée et la lésion reste stabilisé depuis trois mois. "
+    "Les données médicales et chirurgicales sont complètes, le bilan radiologique est normal. "
+    "Nous proposons une surveillance thérapeutique, sans traitement toxique supplémentaire. "
+    "Les infirmiers ont confirmé les rendez-vous, la consultation oncologique est programmée."
+)
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+(?:-[^\W\d_]+)*")
+_TNM_RE = re.compile(
+    r"\b([cpy]?)T\s?(is|[0-4x][a-d]?)\s?N\s?([0-3x][a-c]?)\s?M\s?([01x][a-c]?)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize(word):
+    """Matching key of a word: lowercase, without accents"""
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _has_accents(word):
+    return any(unicodedata.combining(c) for c in unicodedata.normalize("NFKD", word))
+
+
+def _allowed_distance(length):
+    for min_length, distance in DISTANCE_BY_LENGTH:
+        if length >= min_length:
+            return distance
+    return 0
+
+
+def _plural(word):
+    """Regular French plural, None when there is none to add"""
+    if word.isupper() or word[-1] in "sxz":
+        return None
+    if word.endswith("al"):
+        return word[:-2] + "aux"    # médical -> médicaux, never "médicals"
+    if word.endswith(("au", "eu")):
+        return word + "x"
+    return word + "s"
+
+
+def _deletes(word, distance):
+    """`word` and every string obtained by deleting up to `distance` letters"""
+    results = frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results = results | frontier
+    return results
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (transpositions count 1); limit + 1 once over `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class Lexicon:
+    """
+    Terms indexed for exact and fuzzy lookup (see module docstring)
+
+    Thread-safe for lookups once built.
+    """
+
+    def __init__(self):
+        self._canonical = {}   # key -> spelling to write
+        self._family = {}      # key -> key of the term it is a form of (plurals)
+        self._index = {}       # deleted key -> keys of the terms it comes from
+        self._protected = {normalize(word) for word in PROTECTED_WORDS + COMMON_WORDS}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._canonical)
+
+    def __contains__(self, word):
+        return normalize(word) in self._canonical
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+    def _add_word(self, word, family=None):
+        key = normalize(word)
+        if len(key) < JOIN_MIN_PART or key in self._canonical:
+            return
+        # Sentence-initial capitals are not part of the spelling; acronyms are
+        self._canonical[key] = word if any(c.isupper() for c in word[1:]) else word[0].lower() + word[1:]
+        self._family[key] = family or key
+        for deleted in _deletes(key, _allowed_distance(len(key))):
+            self._index.setdefault(deleted, set()).add(key)
+
+    def add(self, term):
+        """Add a term (several words are added one by one) with its singular / plural"""
+        for word in _TOKEN_RE.findall(term):
+            self._add_word(word)
+            family = self._family.get(normalize(word))
+            if word[-1] == "s":
+                self._add_word(word[:-1], family)
+            elif _plural(word):
+                self._add_word(_plural(word), family)
+        self._memo.clear()
+
+    def alias(self, variant, term):
+        """Always write `term` for `variant` (a known misspelling)"""
+        self.add(term)
+        self._canonical[normalize(variant)] = term
+        self._family[normalize(variant)] = normalize(term)
+        self._memo.clear()
+
+    def protect(self, word):
+        """Never correct `word`"""
+        self._protected.add(normalize(word))
+        self._memo.clear()
+
+    def load(self, path):
+        """Terms, aliases ("variant = term") and protected words ("!word") from a text file"""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                if line.startswith("!"):
+                    self.protect(line[1:].strip())
+                elif "=" in line:
+                    variant, _, term = line.partition("=")
+                    self.alias(variant.strip(), term.strip())
+                else:
+                    self.add(line)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def lookup(self, word, max_distance=None, exact=False):
+        """
+        Lexicon spelling for `word`, or None to leave it as it is
+
+        Args:
+            word: One word of a transcript
+            max_distance: Cap on the edit distance (default: by length)
+            exact: Also return the spelling of a word that needs no correction
+        """
+        memo_key = (word, max_distance, exact)
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        key = normalize(word)
+        found = None
+        if key in self._protected:
+            pass
+        elif key in self._canonical:
+            canonical = self._canonical[key]
+            if exact or normalize(canonical) != key:
+                found = canonical  # (or an alias of a known misspelling)
+            elif any(c.isupper() for c in canonical[1:]):
+                found = canonical if word != canonical else None  # acronym: "irm" -> "IRM"
+            elif not _has_accents(word) and _has_accents(canonical):
+                # Accents are only restored on words written without any ("métastasé" stays)
+                found = canonical
+        elif len(key) >= FUZZY_MIN_LENGTH:
+            allowed = _allowed_distance(len(key))
+            if max_distance is not None:
+                allowed = min(allowed, max_distance)
+            best, matches = allowed + 1, {}
+            candidates = set()
+            for deleted in _deletes(key, allowed):
+                candidates |= self._index.get(deleted, set())
+            for candidate in candidates:
+                if key[-ENDING_LETTERS:] != candidate[-ENDING_LETTERS:]:
+                    continue  # another ending: another word
+                limit = min(allowed, _allowed_distance(min(len(key), len(candidate))))
+                distance = edit_distance(key, candidate, limit)
+                if distance > limit or distance > best:
+                    continue
+                if distance < best:
+                    best, matches = distance, {}
+                matches.setdefault(self._family[candidate], set()).add(candidate)
+            # Forms of one term ("trastuzumab", "trastuzumabs") are not ambiguous
+            if len(matches) == 1:
+                family, forms = matches.popitem()
+                found = self._canonical[family if family in forms else min(forms)]
+
+        if found is not None and word[0].isupper() and found[0].islower():
+            found = found[0].upper() + found[1:]
+        with self._lock:
+            if len(self._memo) > 100_000:
+                self._memo.clear()
+            self._memo[memo_key] = found
+        return found
+
+    def correct(self, text):
+        """
+        Text with its oncology terms corrected
+
+        Returns:
+            tuple: (corrected text, [(original, correction), ...])
+        """
+        corrections = []
+
+        def tnm(match):
+            prefix, t, n, m = match.groups()
+            stage = f"{prefix.lower()}T{t.lower()}N{n.lower()}M{m.lower()}"
+            if stage != match.group(0):
+                corrections.append((match.group(0), stage))
+            return stage
+
+        text = _TNM_RE.sub(tnm, text)
+
+        tokens = list(_TOKEN_RE.finditer(text))
+        parts, position, i = [], 0, 0
+        while i < len(tokens):
+            token = tokens[i]
+            word = token.group(0)
+            replacement, end = None, token.end()
+
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+            if (following is not None and text[token.end():following.start()].isspace()
+                    and min(len(word), len(following.group(0))) >= JOIN_MIN_PART
+                    and word not in self and following.group(0) not in self):
+                joined = word + following.group(0)
+                if len(joined) >= FUZZY_MIN_LENGTH:
+                    replacement = self.lookup(joined, max_distance=1, exact=True)
+                    if replacement is not None:
+                        word, end = text[token.start():following.end()], following.end()
+                        i += 1
+            if replacement is None:
+                replacement = self.lookup(word)
+
+            parts.append(text[position:token.start()])
+            if replacement is not None and replacement != word:
+                corrections.append((word, replacement))
+                parts.append(replacement)
+            else:
+                parts.append(text[token.start():end])
+            position = end
+            i += 1
+        parts.append(text[position:])
+        return "".join(parts), corrections
+
+
+def from_prompt(prompt):
+    """Lexicon of the terms listed in a Whisper prompt, the built-in terms and LEXICON_FILE"""
+    lexicon = Lexicon()
+    for term in re.split(r"[,.]", prompt):
+        if term.strip():
+            lexicon.add(term.strip())
+    for term in ONCOLOGY_TERMS:
+        lexicon.add(term)
+    if LEXICON_FILE:
+        lexicon.load(LEXICON_FILE)
+    return lexicon
+
+
+_lexicons = {}
+_lexicons_lock = threading.Lock()
+_counters = {'texts': 0, 'corrections': 0}
+
+
+def for_prompt(prompt):
+    """Process-wide Lexicon seeded from `prompt` (built on first use)"""
+    with _lexicons_lock:
+        lexicon = _lexicons.get(prompt)
+        if lexicon is None:
+            lexicon = _lexicons[prompt] = from_prompt(prompt)
+        return lexicon
+
+
+def record(corrections):
+    with _lexicons_lock:
+        _counters['texts'] += 1
+        _counters['corrections'] += len(corrections)
+
+
+def stats():
+    return {
+        'enabled': CORRECTION_ENABLED,
+        'terms': sum(len(lexicon) for lexicon in _lexicons.values()),
+        **_counters,
+    }
+
+
+if __name__ == "__main__":
+    # Regression check: ordinary French must come out unchanged
+    import sys
+
+    from cedric_file1 import MeetingTranscriber
+
+    lexicon = from_prompt(MeetingTranscriber.MEDICAL_PROMPT)
+    text, corrections = lexicon.correct(ORDINARY_TEXT)
+    if corrections:
+        print(f"✗ Ordinary text changed: {corrections}")
+        sys.exit(1)
+    print(f"✓ Ordinary text left unchanged ({len(lexicon)} terms)")
+    for word, expected in (("pembrolisumab", "pembrolizumab"), ("adenocarcinome", "adénocarcinome"),
+                           ("carbo platine", "carboplatine"), ("t2 n1 m0", "T2N1M0")):
+        corrected, _ = lexicon.correct(word)
+        print(f"{'✓' if corrected == expected else '✗'} {word} -> {corrected}")
+        if corrected != expected:
+            sys.exit(1)
@@ -0,0 +1,233 @@
+"""
+MEETINGS SYNC MODULE - Cedric's Meeting Report Generator
+Attaches generated reports to their meeting in the rest-api backend
+
+After generation the PDF went back to the browser, which then had to
+upload or attach it to the meeting itself. When a report request names its
+meeting (`meeting_id` form field) and MEETINGS_API_URL is set, this service
+now attaches the report as soon as it exists: PUT /meetings/{id}/report
+with the structured data and the URL of the PDF (GET /reports/{id}/pdf,
+rendered on demand) - never the PDF bytes.
+
+- Pushes run in the background on the event loop: the report response is
+  not delayed, and does not fail when the backend is down
+- One httpx.AsyncClient per process keeps a pool of keep-alive
+  connections to the backend
+- Connection errors, timeouts, 429 and 5xx answers are retried with
+  exponential backoff and jitter (the server's Retry-After when given), up
+  to PUSH_ATTEMPTS; other 4xx answers (unknown meeting, invalid payload)
+  are not
+- The PUT is idempotent: a retry after a lost response writes the same
+  report again
+- Pushes still running at shutdown get DRAIN_SECONDS to finish
+
+Configuration:
+    MEETINGS_API_URL=http://rest-api:3000       backend (empty = no push)
+    REPORT_PUBLIC_URL=https://reports.example   base of the PDF URLs sent (empty = relative)
+    MEETINGS_API_VERIFY_TLS=0                   accept the self-signed dev certificates
+
+Requirements:
+    pip install httpx
+"""
+
+import asyncio
+import os
+import random
+import re
+from datetime import datetime
+from urllib.parse import quote
+
+
+MEETINGS_API_URL = os.getenv("MEETINGS_API_URL", "").strip().rstrip("/")
+REPORT_PUBLIC_URL = os.getenv("REPORT_PUBLIC_URL", "").strip().rstrip("/")
+VERIFY_TLS = os.getenv("MEETINGS_API_VERIFY_TLS", "1") != "0"
+
+PUSH_ATTEMPTS = int(os.getenv("MEETINGS_PUSH_ATTEMPTS", "6"))
+PUSH_TIMEOUT_SECONDS = float(os.getenv("MEETINGS_PUSH_TIMEOUT", "10"))
+# Connections kept open to the backend (per process)
+POOL_CONNECTIONS = int(os.getenv("MEETINGS_POOL_CONNECTIONS", "8"))
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+DRAIN_SECONDS = float(os.getenv("MEETINGS_DRAIN_SECONDS", "10"))
+
+# Answers worth another attempt
+RETRY_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+_MEETING_ID_RE = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+
+class PushError(Exception):
+    """The report could not be attached to its meeting"""
+
+
+def enabled():
+    return bool(MEETINGS_API_URL)
+
+
+def check_meeting_id(meeting_id):
+    """
+    Raises:
+        ValueError: not a rest-api meeting id
+    """
+    if not _MEETING_ID_RE.match(meeting_id or ""):
+        raise ValueError(f"Invalid meeting id: {meeting_id!r}")
+    return meeting_id
+
+
+def pdf_url(report_id):
+    return f"{REPORT_PUBLIC_URL}/reports/{report_id}/pdf"
+
+
+def report_payload(report_id, structured_data, report_title=None, meeting_type=None,
+                   transcript_id=None, generated_at=None):
+    """Body of PUT /meetings/{id}/report (AttachReportDto in rest-api)"""
+    payload = {
+        'reportId': report_id,
+        'title': report_title,
+        'meetingType': meeting_type,
+        'data': structured_data,
+        'pdfUrl': pdf_url(report_id),
+        'transcriptId': transcript_id,
+        'generatedAt': generated_at or datetime.now().astimezone().isoformat(timespec="seconds"),
+    }
+    return {key: value for key, value in payload.items() if value is not None}
+
+
+def _backoff(attempt):
+    """Full-jitter exponential delay before attempt `attempt + 1`"""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+
+def _retry_after(response):
+    try:
+        return min(MAX_BACKOFF_SECONDS, max(0.0, float(response.headers.get("retry-after", ""))))
+    except ValueError:
+        return None
+
+
+class MeetingsClient:
+    """
+    Pooled, retrying client of the meetings backend
+
+    Used from the event loop only; the HTTP client is created on first use
+    (in the loop, and after serve.py forks its workers).
+    """
+
+    def __init__(self, base_url, attempts=PUSH_ATTEMPTS, timeout=PUSH_TIMEOUT_SECONDS,
+                 connections=POOL_CONNECTIONS, verify=VERIFY_TLS):
+        self.base_url = base_url
+        self.attempts = max(1, attempts)
+        self.timeout = timeout
+        self.connections = connections
+        self.verify = verify
+        self._client = None
+        self._tasks = set()
+        self.counters = {'queued': 0, 'pushed': 0, 'retried': 0, 'failed': 0, 'abandoned': 0}
+        self.last_error = None
+
+    def _http(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.connections,
+                                    max_keepalive_connections=self.connections),
+                verify=self.verify,
+            )
+        return self._client
+
+    async def push(self, meeting_id, payload):
+        """
+        Attach a report to a meeting, retrying transient failures
+
+        Raises:
+            PushError: refused by the backend, or still failing after every attempt
+        """
+        import httpx
+
+        path = f"/meetings/{quote(meeting_id, safe='')}/report"
+        for attempt in range(1, self.attempts + 1):
+            delay = None
+            try:
+                response = await self._http().put(path, json=payload)
+            except httpx.TransportError as exc:   # refused, reset, timed out
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                if response.is_success:
+                    self.counters['pushed'] += 1
+                    return
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    raise PushError(error)
+                delay = _retry_after(response)
+            if attempt == self.attempts:
+                raise PushError(f"{error} (gave up after {attempt} attempts)")
+            self.counters['retried'] += 1
+            await asyncio.sleep(_backoff(attempt) if delay is None else delay)
+
+    def submit(self, meeting_id, payload):
+        """Push in the background; returns the task"""
+        task = asyncio.get_running_loop().create_task(self._push_logged(meeting_id, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.counters['queued'] += 1
+        return task
+
+    async def _push_logged(self, meeting_id, payload):
+        try:
+            await self.push(meeting_id, payload)
+        except PushError as exc:
+            self.counters['failed'] += 1
+            self.last_error = str(exc)
+            print(f"⚠ Could not attach report {payload['reportId']} to meeting {meeting_id}: {exc}")
+        else:
+            print(f"✓ Report {payload['reportId']} attached to meeting {meeting_id}")
+
+    async def aclose(self, timeout=DRAIN_SECONDS):
+        """Let running pushes finish (up to `timeout`), then close the connections"""
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self.counters['abandoned'] += len(pending)
+                print(f"⚠ {len(pending)} report(s) not attached to their meeting before shutdown")
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        return {
+            'enabled': bool(self.base_url),
+            'url': self.base_url or None,
+            'pending': len(self._tasks),
+            **self.counters,
+            'last_error': self.last_error,
+        }
+
+
+client = MeetingsClient(MEETINGS_API_URL)
+
+
+def push_report(meeting_id, report_id, structured_data, **fields):
+    """
+    Attach a report to its meeting in the background (see report_payload
+    for `fields`)
+
+    Returns:
+        bool: False when pushing is disabled (MEETINGS_API_URL not set)
+    """
+    if not enabled():
+        return False
+    client.submit(meeting_id, report_payload(report_id, structured_data, **fields))
+    return True
+
+
+async def aclose():
+    await client.aclose()
+
+
+def stats():
+    return client.stats()
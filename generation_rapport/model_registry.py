@@ -0,0 +1,266 @@
+"""
+WHISPER MODEL REGISTRY - Cedric's Meeting Report Generator
+Keeps Whisper models resident in the process and tracks their warm-up state
+
+Features:
+- Loads each Whisper model size once and shares it between requests
+- Warms freshly loaded models with a short dummy inference (first-call JIT / allocator costs)
+- Can preload the configured model sizes in the background at startup
+- Exposes residency and warm-up state for the /ready endpoint
+- Checks for cancellation (cancellation.py) before each 30-second decoding window
+- Hands a busy model to the most urgent waiting job first (scheduling.py)
+
+Requirements:
+    pip install openai-whisper numpy
+"""
+
+import threading
+import time
+
+import cancellation
+import cpu_topology
+import encoder_compile
+import process_stats
+import scheduling
+import tracing
+
+
+# Length of the silent clip used to warm a model up (seconds @ 16 kHz)
+WARMUP_SECONDS = 1.0
+SAMPLE_RATE = 16000
+
+_torch_patched = False
+_models = {}        # (model_size, device) -> whisper model
+_state = {}         # model_size -> status dict (see readiness())
+_load_locks = {}    # (model_size, device) -> threading.Lock
+_inference_locks = {}  # (model_size, device) -> scheduling.PriorityLock
+_registry_lock = threading.Lock()
+
+
+def _patch_torch_load():
+    """
+    Monkey-patch torch.load BEFORE any whisper import
+
+    Recent versions of openai-whisper call torch.load(weights_only=True),
+    but the model checkpoint files are not compatible with that flag.
+    We force weights_only=False since the Whisper models are trusted.
+    Done lazily so that processes which never transcribe never import torch.
+    """
+    global _torch_patched
+    if _torch_patched:
+        return
+
+    import torch
+    _original_torch_load = torch.load
+
+    def _patched_torch_load(*args, **kwargs):
+        kwargs["weights_only"] = False
+        return _original_torch_load(*args, **kwargs)
+
+    torch.load = _patched_torch_load
+    _torch_patched = True
+
+
+def resolve_device(device="auto"):
+    """Resolve "auto" to an actual device string torch understands"""
+    if device == "auto":
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    return device
+
+
+def _set_state(model_size, **fields):
+    with _registry_lock:
+        _state.setdefault(model_size, {'status': 'pending'}).update(fields)
+
+
+def _load_lock(key):
+    with _registry_lock:
+        return _load_locks.setdefault(key, threading.Lock())
+
+
+def inference_lock(model_size, device="auto"):
+    """
+    Lock serialising inference on one shared model
+
+    Whisper's transcribe() installs kv-cache hooks on the model's modules for
+    the duration of the call, so two concurrent calls on the same model object
+    would corrupt each other's caches. Waiting jobs get the model by
+    priority class, then shortest audio first (``with lock.claim(audio_seconds=...)``).
+    """
+    key = (model_size, resolve_device(device))
+    with _registry_lock:
+        return _inference_locks.setdefault(key, scheduling.PriorityLock("whisper"))
+
+
+def get_model(model_size, device="auto"):
+    """
+    Return the resident Whisper model for this size, loading it on first use
+
+    Concurrent callers asking for the same model wait for a single load.
+    """
+    device = resolve_device(device)
+    key = (model_size, device)
+
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _load_lock(key):
+        model = _models.get(key)
+        if model is None:
+            with _registry_lock:
+                _patch_torch_load()
+            cpu_topology.configure_torch()
+            import whisper
+
+            print(f"🎤 Loading Whisper model ({model_size}) on {device}...")
+            _set_state(model_size, status='loading', device=device)
+            started = time.perf_counter()
+            rss_before = process_stats.rss_bytes()
+            try:
+                with tracing.span("model_load", model=model_size, device=device):
+                    model = whisper.load_model(model_size, device=device)
+            except Exception as e:
+                _set_state(model_size, status='failed', error=str(e))
+                raise
+            compiled = None
+            if encoder_compile.COMPILE_MODE != "off":
+                with tracing.span("compile_encoder", model=model_size, mode=encoder_compile.COMPILE_MODE):
+                    compiled = encoder_compile.compile_encoder(model, model_size, device)
+            # whisper.transcribe() calls model.decode once per 30-second window:
+            # a cancelled request stops at the next window
+            model.decode = cancellation.cancellable(model.decode, "whisper")
+            _models[key] = model
+            _set_state(
+                model_size,
+                status='loaded',
+                load_seconds=round(time.perf_counter() - started, 3),
+                # Approximate when several models load at the same time
+                rss_mb=round(max(0, process_stats.rss_bytes() - rss_before) / 2**20, 1),
+                compiled_encoder=compiled,
+            )
+            print("✓ Whisper model loaded successfully")
+    return model
+
+
+def record_inference(model_size, audio_seconds, seconds):
+    """
+    Track the real-time factor (processing seconds per audio second) of a
+    model as an exponential moving average; used to predict queue times
+    """
+    if audio_seconds < 1.0:
+        return  # warm-up clips and tiny windows say little about throughput
+    rtf = seconds / audio_seconds
+    with _registry_lock:
+        state = _state.setdefault(model_size, {'status': 'pending'})
+        previous = state.get('rtf')
+        state['rtf'] = round(rtf if previous is None else 0.8 * previous + 0.2 * rtf, 4)
+
+
+def real_time_factor(model_size):
+    """Measured real-time factor of a model, None until it has transcribed something"""
+    with _registry_lock:
+        return _state.get(model_size, {}).get('rtf')
+
+
+def warm_up(model_size, device="auto"):
+    """
+    Run a short dummy inference so the first real request does not pay
+    one-off initialisation costs (kernel selection, allocator growth, ...)
+    """
+    import numpy as np
+
+    device = resolve_device(device)
+    model = get_model(model_size, device)
+
+    _set_state(model_size, status='warming')
+    started = time.perf_counter()
+    try:
+        silence = np.zeros(int(SAMPLE_RATE * WARMUP_SECONDS), dtype=np.float32)
+        with inference_lock(model_size, device).claim(WARMUP_SECONDS, audio_seconds=WARMUP_SECONDS):
+            # torch starts its worker threads here: on the whisper cores
+            with cpu_topology.stage("whisper"):
+                model.transcribe(silence, language="fr", fp16=(device == "cuda"))
+    except Exception as e:
+        _set_state(model_size, status='failed', error=f'Warm-up failed: {e}')
+        raise
+    _set_state(
+        model_size,
+        status='ready',
+        warmup_seconds=round(time.perf_counter() - started, 3),
+    )
+    print(f"✓ Whisper model ({model_size}) warmed up")
+
+
+def preload(model_sizes, device="auto", warm=True):
+    """
+    Load (and optionally warm) every model size in turn
+
+    Failures are recorded in the readiness state instead of being raised so
+    that one bad size does not prevent the others from loading.
+    """
+    for model_size in model_sizes:
+        _set_state(model_size, status='pending', preload=True)
+
+    for model_size in model_sizes:
+        try:
+            if warm:
+                warm_up(model_size, device)
+            else:
+                get_model(model_size, device)
+                _set_state(model_size, status='ready')
+        except Exception as e:
+            print(f"✗ Could not preload Whisper model ({model_size}): {e}")
+
+
+def preload_in_background(model_sizes, device="auto", warm=True):
+    """Start preload() in a daemon thread and return the thread"""
+    thread = threading.Thread(
+        target=preload,
+        args=(list(model_sizes), device, warm),
+        name="whisper-preload",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def resident_models():
+    """
+    Model sizes currently loaded in this process
+
+    Returns:
+        dict: {model_size: measured RSS growth of its load in MB, or None}
+    """
+    with _registry_lock:
+        return {size: _state.get(size, {}).get('rss_mb') for (size, _device) in _models}
+
+
+def readiness():
+    """
+    Snapshot of the registry state
+
+    Returns:
+        dict: {
+            'ready': bool (every preloaded model is warm),
+            'status': 'ready' | 'starting' | 'failed',
+            'models': {model_size: {'status': str, 'resident': bool, ...}}
+        }
+    """
+    with _registry_lock:
+        resident = {size for (size, _device) in _models}
+        models = {
+            size: dict(state, resident=size in resident)
+            for size, state in _state.items()
+        }
+
+    preloaded = [state for state in models.values() if state.get('preload')]
+    ready = all(state['status'] == 'ready' for state in preloaded)
+    if ready:
+        status = 'ready'
+    elif any(state['status'] == 'failed' for state in preloaded):
+        status = 'failed'
+    else:
+        status = 'starting'
+    return {'ready': ready, 'status': status, 'models': models}
@@ -0,0 +1,126 @@
+"""
+PROCESS STATS - Cedric's Meeting Report Generator
+Cheap, dependency-free process measurements (memory, startup time)
+
+Features:
+- Current and peak resident set size of this process (Linux /proc, getrusage)
+- Shared / private split of the resident memory (PSS, USS), which is what
+  matters for forked workers sharing the model weights
+- Memory limit of the container (cgroup) or machine
+- Startup timing relative to interpreter start
+- Which heavy modules (torch, whisper, ...) are actually imported
+
+Only uses the standard library so it can be imported by every service role.
+"""
+
+import os
+import resource
+import sys
+import time
+
+
+# Heavy modules worth reporting: a text-only instance must not load these
+HEAVY_MODULES = ("torch", "whisper", "numpy", "google.generativeai", "reportlab")
+
+
+def rss_bytes():
+    """Current resident set size in bytes (0 when /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def memory_breakdown(pid="self"):
+    """
+    Resident memory of a process split into shared and private pages, in MB
+    (Linux smaps_rollup; empty dict when unavailable)
+
+    Returns:
+        dict: {
+            'rss_mb': all resident pages,
+            'pss_mb': proportional share (shared pages divided by their sharers),
+            'uss_mb': private pages (what the process would free on exit),
+            'shared_mb': pages shared with other processes
+        }
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[key] = int(parts[0])
+    except (OSError, ValueError):
+        return {}
+    if "Rss" not in fields:
+        return {}
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return {
+        'rss_mb': round(fields["Rss"] / 1024, 1),
+        'pss_mb': round(fields.get("Pss", 0) / 1024, 1),
+        'uss_mb': round(private / 1024, 1),
+        'shared_mb': round(shared / 1024, 1),
+    }
+
+
+def memory_limit_bytes():
+    """
+    Memory available to this process: the cgroup limit inside a container
+    (v2 memory.max or v1 limit_in_bytes), else physical RAM; 0 if unknown
+    """
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # "max" / a huge number mean no limit
+        if value.isdigit() and int(value) < 2**60:
+            return int(value)
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def peak_rss_bytes():
+    """Peak resident set size in bytes since the process started"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def process_uptime_seconds():
+    """Seconds since the interpreter process was started"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 is the start time in clock ticks since boot; the
+            # command name (field 2) may contain spaces so split after it.
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            system_uptime = float(f.read().split()[0])
+        return system_uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.process_time()
+
+
+def loaded_heavy_modules():
+    """Names of HEAVY_MODULES currently imported in this process"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def snapshot():
+    """All of the above as a JSON-friendly dict"""
+    return {
+        'pid': os.getpid(),
+        'rss_mb': round(rss_bytes() / 2**20, 1),
+        'peak_rss_mb': round(peak_rss_bytes() / 2**20, 1),
+        'uptime_seconds': round(process_uptime_seconds(), 3),
+        'heavy_modules': loaded_heavy_modules(),
+    }
@@ -0,0 +1,221 @@
+"""
+PROMPT CACHE MODULE - Cedric's Meeting Report Generator
+Registers the static part of the structuring prompt as Gemini cached context
+
+Every structuring call used to resend the same French instructions and JSON
+schema in front of the transcript, paying their input tokens and prefill
+latency each time. The static part (per meeting type and report language)
+is now created once as a Gemini CachedContent and referenced by each call;
+only the date and the transcript are sent.
+
+Features:
+- One cache entry per (model, meeting type, language, prompt hash): editing
+  the prompt creates a new entry instead of reusing a stale one
+- Entries made by other processes (workers, restarts) are found by their
+  display name and reused
+- Refreshed (TTL extended) before they expire; recreated when they are gone
+- Prefixes below the model's minimum cacheable size are detected once per
+  entry (character estimate, then count_tokens when close) and always
+  sent inline, without a doomed creation call
+- Any other failure (quota, network, expired entry) falls back to the
+  inline prompt; creation is then not retried for a while
+
+Works against the real API or a local stand-in (fake_gemini.py, with
+GEMINI_API_ENDPOINT=http://127.0.0.1:8089).
+
+Requirements:
+    pip install google-generativeai
+"""
+
+import datetime
+import hashlib
+import os
+import threading
+import time
+
+
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "1") != "0"
+CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CACHE_TTL_SECONDS", "3600"))
+# Entries expiring sooner than this are refreshed before use
+REFRESH_MARGIN_SECONDS = 120
+# After a failed creation, use the inline prompt for this long
+FAILURE_BACKOFF_SECONDS = 600
+DISPLAY_NAME_PREFIX = "cr-structuring"
+
+# Smallest prefix the API caches explicitly (tokens), by model name prefix
+MIN_CACHE_TOKENS = (("gemini-2.5-pro", 2048), ("gemini-2.5-flash", 1024), ("gemini-1.5", 32768))
+DEFAULT_MIN_CACHE_TOKENS = 4096
+MIN_CACHE_TOKENS_OVERRIDE = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "0"))
+# ~4 characters per token: prefixes estimated below half the minimum are not counted
+CHARS_PER_TOKEN = 4
+
+
+def min_cache_tokens(model_name):
+    """Minimum cacheable size of a model's cached contents (tokens)"""
+    if MIN_CACHE_TOKENS_OVERRIDE:
+        return MIN_CACHE_TOKENS_OVERRIDE
+    name = model_name.split("/")[-1]
+    for prefix, tokens in MIN_CACHE_TOKENS:
+        if name.startswith(prefix):
+            return tokens
+    return DEFAULT_MIN_CACHE_TOKENS
+
+
+def _expire_timestamp(cached):
+    expire_time = getattr(cached, "expire_time", None)
+    if expire_time is None:
+        return 0.0
+    if expire_time.tzinfo is None:
+        expire_time = expire_time.replace(tzinfo=datetime.timezone.utc)
+    return expire_time.timestamp()
+
+
+class PromptCache:
+    """
+    Gemini CachedContent entries for static prompt prefixes
+
+    get() returns the CachedContent to generate from, or None when the
+    inline prompt must be used; thread-safe (one creation per key at a time).
+    """
+
+    def __init__(self, model_name, ttl_seconds=CACHE_TTL_SECONDS):
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}       # key -> CachedContent
+        self._failed_until = {}  # key -> timestamp
+        self._cacheable = {}     # key -> prefix large enough to cache
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._listed = False
+        self.counters = {'hits': 0, 'created': 0, 'reused': 0, 'refreshed': 0,
+                         'fallbacks': 0, 'too_small': 0, 'failures': 0, 'invalidated': 0}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def display_name(self, meeting_type, language, static_text):
+        digest = hashlib.sha256(f"{self.model_name}\n{static_text}".encode("utf-8")).hexdigest()[:12]
+        # Display names are limited to 128 characters
+        return f"{DISPLAY_NAME_PREFIX}-{meeting_type}-{language}-{digest}"[:128]
+
+    def _find_existing(self):
+        """Entries created by other processes, by display name (listed once)"""
+        from google.generativeai import caching
+
+        found = {}
+        for cached in caching.CachedContent.list():
+            name = getattr(cached, "display_name", "") or ""
+            if name.startswith(DISPLAY_NAME_PREFIX) and _expire_timestamp(cached) > time.time() + REFRESH_MARGIN_SECONDS:
+                found[name] = cached
+        return found
+
+    def get(self, meeting_type, language, static_text):
+        """CachedContent holding `static_text`, created or refreshed as needed; None = go inline"""
+        if not CONTEXT_CACHE_ENABLED:
+            return None
+        key = self.display_name(meeting_type, language, static_text)
+        if time.time() < self._failed_until.get(key, 0.0):
+            self.counters['fallbacks'] += 1
+            return None
+
+        with self._key_lock(key):
+            if not self._is_cacheable(key, static_text):
+                self.counters['too_small'] += 1
+                return None
+            cached = self._entries.get(key)
+            try:
+                if cached is None and not self._listed:
+                    self._listed = True
+                    for name, existing in self._find_existing().items():
+                        self._entries.setdefault(name, existing)
+                    cached = self._entries.get(key)
+                    if cached is not None:
+                        self.counters['reused'] += 1
+
+                if cached is not None and _expire_timestamp(cached) - time.time() < REFRESH_MARGIN_SECONDS:
+                    if _expire_timestamp(cached) > time.time():
+                        cached.update(ttl=datetime.timedelta(seconds=self.ttl_seconds))
+                        self.counters['refreshed'] += 1
+                    else:
+                        cached = None  # already expired: recreate
+
+                if cached is None:
+                    cached = self._create(key, static_text)
+                    self.counters['created'] += 1
+                else:
+                    self.counters['hits'] += 1
+            except Exception as e:
+                self._entries.pop(key, None)
+                self._failed_until[key] = time.time() + FAILURE_BACKOFF_SECONDS
+                self.counters['failures'] += 1
+                self.counters['fallbacks'] += 1
+                print(f"⚠ Gemini context cache unavailable for {key} ({e}); using the inline prompt")
+                return None
+
+            self._entries[key] = cached
+            return cached
+
+    def _count_tokens(self, static_text):
+        import google.generativeai as genai
+
+        return genai.GenerativeModel(self.model_name).count_tokens(static_text).total_tokens
+
+    def _is_cacheable(self, key, static_text):
+        """Whether `static_text` reaches the model's minimum cacheable size (decided once per key)"""
+        cacheable = self._cacheable.get(key)
+        if cacheable is not None:
+            return cacheable
+        minimum = min_cache_tokens(self.model_name)
+        tokens = len(static_text) // CHARS_PER_TOKEN
+        if tokens >= minimum // 2:
+            # Close enough for the estimate to be wrong either way: ask the API
+            try:
+                tokens = self._count_tokens(static_text)
+            except Exception as e:
+                print(f"⚠ Could not count the tokens of {key} ({e}); using the estimate")
+        cacheable = self._cacheable[key] = tokens >= minimum
+        if not cacheable:
+            print(f"⚠ Prompt prefix {key} has ~{tokens} tokens, below the {minimum}-token minimum "
+                  f"of cached contents on {self.model_name}; sending it inline")
+        return cacheable
+
+    def _create(self, key, static_text):
+        from google.generativeai import caching
+
+        cached = caching.CachedContent.create(
+            model=self.model_name,
+            display_name=key,
+            contents=[{'role': 'user', 'parts': [{'text': static_text}]}],
+            ttl=datetime.timedelta(seconds=self.ttl_seconds),
+        )
+        print(f"✓ Gemini context cache created: {key}")
+        return cached
+
+    def invalidate(self, cached):
+        """Forget an entry the API refused (expired or deleted meanwhile)"""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry is cached or getattr(entry, "name", None) == getattr(cached, "name", ""):
+                    del self._entries[key]
+                    self.counters['invalidated'] += 1
+
+    def stats(self):
+        return {'enabled': CONTEXT_CACHE_ENABLED, 'entries': len(self._entries), **self.counters}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def for_model(model_name):
+    """Process-wide PromptCache of a model (structurers are created per request)"""
+    with _caches_lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = _caches[model_name] = PromptCache(model_name)
+        return cache
+
+
+def stats():
+    return {name: cache.stats() for name, cache in _caches.items()}
@@ -0,0 +1,282 @@
+"""
+REPORT VIEWS MODULE - Cedric's Meeting Report Generator
+One template layer for every report output: PDF, JSON, HTML and Markdown
+
+The structured data from Gemini is loose (missing fields, placeholder dates,
+free-form titles). build_view() turns it into the report as it is shown:
+defaults filled in, French labels, sections in display order. The ReportLab
+renderer (cedric_file3.py) lays this view out as a PDF; to_markdown() and
+to_html() render the same view as text, in a few milliseconds and without
+ReportLab, for previews. The API picks the output with negotiate() from the
+Accept header or a `format` field.
+
+Only uses the standard library.
+"""
+
+import html
+from datetime import datetime
+
+
+# Output formats and their media types (the first is the API default)
+FORMATS = {
+    "pdf": "application/pdf",
+    "json": "application/json",
+    "html": "text/html",
+    "markdown": "text/markdown",
+}
+FORMAT_ALIASES = {"md": "markdown", "htm": "html"}
+
+LABELS = {
+    "date": "Date",
+    "type": "Type",
+    "duration": "Durée estimée",
+    "participants": "Participants",
+    "summary": "Résumé de la réunion",
+    "sections": "Contenu de la réunion",
+    "key_points": "Points clés",
+    "action_items": "Actions à mener",
+    "decisions": "Décisions prises",
+    "task": "Tâche",
+    "responsible": "Responsable",
+    "deadline": "Échéance",
+}
+
+
+def _meeting_date(metadata):
+    date = str(metadata.get('date') or '')
+    # Gemini sometimes returns the format placeholder itself
+    if not date or 'AAAA' in date or 'aaaa' in date:
+        date = datetime.now().strftime('%d/%m/%Y')
+    return date
+
+
+_TYPE_NAMES = {dict: "object", list: "list"}
+
+
+def _field(data, key, expected, default):
+    """`data[key]` (or `default` when missing / null), type-checked"""
+    value = data.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, expected):
+        raise ValueError(f"'{key}' must be a {_TYPE_NAMES[expected]}, not {type(value).__name__}")
+    return value
+
+
+def _records(data, key):
+    """`data[key]` as a list of objects (sections, action items)"""
+    records = _field(data, key, list, [])
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"'{key}[{position}]' must be an object, not {type(record).__name__}")
+    return records
+
+
+def build_view(structured_data, report_title=None, organization_name=""):
+    """
+    The report as displayed, shared by every output format
+
+    Args:
+        structured_data: Structured meeting data (from Gemini or /render)
+        report_title: Custom title (default: "Compte-Rendu de Réunion - <type>")
+        organization_name: Organization shown in the header
+
+    Returns:
+        dict: organization, title, date, type, duration, participants, summary,
+              sections [{title, content, timestamp}], key_points,
+              action_items [{task, responsible, deadline}], decisions, labels
+
+    Raises:
+        ValueError: structured_data does not have the expected shape
+    """
+    if not isinstance(structured_data, dict):
+        raise ValueError(f"structured_data must be an object, not {type(structured_data).__name__}")
+    metadata = _field(structured_data, 'meeting_metadata', dict, {})
+    if report_title is None:
+        report_title = f"Compte-Rendu de Réunion - {str(metadata.get('type') or 'Général').title()}"
+
+    return {
+        'organization': organization_name,
+        'title': report_title,
+        'date': _meeting_date(metadata),
+        'type': metadata.get('type', 'Réunion générale'),
+        'duration': metadata.get('duration_estimate', 'N/A'),
+        'participants': [str(p) for p in _field(structured_data, 'participants', list, [])],
+        'summary': structured_data.get('summary', '') or '',
+        'sections': [
+            {
+                'title': section.get('title', 'Section sans titre'),
+                'content': section.get('content', ''),
+                'timestamp': section.get('timestamp', ''),
+            }
+            for section in _records(structured_data, 'sections')
+        ],
+        'key_points': [str(p) for p in _field(structured_data, 'key_points', list, [])],
+        'action_items': [
+            {
+                'task': item.get('task', 'N/A'),
+                'responsible': item.get('responsible', 'À définir'),
+                'deadline': item.get('deadline', 'À définir'),
+            }
+            for item in _records(structured_data, 'action_items')
+        ],
+        'decisions': [str(d) for d in _field(structured_data, 'decisions', list, [])],
+        'labels': dict(LABELS),
+    }
+
+
+def to_markdown(view):
+    labels = view['labels']
+    lines = []
+    if view['organization']:
+        lines += [f"**{view['organization']}**", ""]
+    lines += [f"# {view['title']}", ""]
+    lines += [
+        f"- **{labels['date']} :** {view['date']}",
+        f"- **{labels['type']} :** {view['type']}",
+        f"- **{labels['duration']} :** {view['duration']}",
+        "",
+    ]
+    if view['participants']:
+        lines += [f"## {labels['participants']}", ""]
+        lines += [f"- {p}" for p in view['participants']] + [""]
+    if view['summary']:
+        lines += [f"## {labels['summary']}", "", view['summary'], ""]
+    if view['sections']:
+        lines += [f"## {labels['sections']}", ""]
+        for section in view['sections']:
+            timestamp = f" *({section['timestamp']})*" if section['timestamp'] else ""
+            lines += [f"### {section['title']}{timestamp}", "", section['content'], ""]
+    if view['key_points']:
+        lines += [f"## {labels['key_points']}", ""]
+        lines += [f"- {p}" for p in view['key_points']] + [""]
+    if view['action_items']:
+        lines += [
+            f"## {labels['action_items']}", "",
+            f"| {labels['task']} | {labels['responsible']} | {labels['deadline']} |",
+            "|---|---|---|",
+        ]
+        for item in view['action_items']:
+            cells = [str(item[k]).replace("|", "\\|").replace("\n", " ") for k in ('task', 'responsible', 'deadline')]
+            lines.append(f"| {' | '.join(cells)} |")
+        lines.append("")
+    if view['decisions']:
+        lines += [f"## {labels['decisions']}", ""]
+        lines += [f"{i}. {d}" for i, d in enumerate(view['decisions'], 1)] + [""]
+    return "\n".join(lines)
+
+
+_HTML_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; max-width: 800px; margin: 2em auto; color: #222; line-height: 1.45; }
+.org { color: #1a5490; font-weight: bold; text-align: center; }
+h1 { text-align: center; color: #1a5490; }
+h2 { color: #1a5490; border-bottom: 1px solid #ccc; padding-bottom: 0.2em; }
+table { border-collapse: collapse; width: 100%; }
+th { background: #1a5490; color: white; text-align: left; }
+th, td { border: 1px solid #999; padding: 0.3em 0.5em; }
+tr:nth-child(even) td { background: #f0f0f0; }
+"""
+
+
+def to_html(view):
+    """Standalone HTML page (all values escaped)"""
+    e = lambda value: html.escape(str(value))
+    labels = view['labels']
+    parts = [
+        '<!DOCTYPE html>',
+        '<html lang="fr"><head><meta charset="utf-8">',
+        f"<title>{e(view['title'])}</title><style>{_HTML_STYLE}</style></head><body>",
+    ]
+    if view['organization']:
+        parts.append(f"<p class=\"org\">{e(view['organization'])}</p>")
+    parts.append(f"<h1>{e(view['title'])}</h1>")
+    parts.append(
+        f"<p><b>{e(labels['date'])} :</b> {e(view['date'])}<br>"
+        f"<b>{e(labels['type'])} :</b> {e(view['type'])}<br>"
+        f"<b>{e(labels['duration'])} :</b> {e(view['duration'])}</p>"
+    )
+    if view['participants']:
+        items = "".join(f"<li>{e(p)}</li>" for p in view['participants'])
+        parts.append(f"<h2>{e(labels['participants'])}</h2><ul>{items}</ul>")
+    if view['summary']:
+        parts.append(f"<h2>{e(labels['summary'])}</h2><p>{e(view['summary'])}</p>")
+    if view['sections']:
+        parts.append(f"<h2>{e(labels['sections'])}</h2>")
+        for section in view['sections']:
+            timestamp = f" <i>({e(section['timestamp'])})</i>" if section['timestamp'] else ""
+            parts.append(f"<h3>{e(section['title'])}{timestamp}</h3><p>{e(section['content'])}</p>")
+    if view['key_points']:
+        items = "".join(f"<li>{e(p)}</li>" for p in view['key_points'])
+        parts.append(f"<h2>{e(labels['key_points'])}</h2><ul>{items}</ul>")
+    if view['action_items']:
+        rows = "".join(
+            f"<tr><td>{e(item['task'])}</td><td>{e(item['responsible'])}</td><td>{e(item['deadline'])}</td></tr>"
+            for item in view['action_items']
+        )
+        parts.append(
+            f"<h2>{e(labels['action_items'])}</h2><table><tr><th>{e(labels['task'])}</th>"
+            f"<th>{e(labels['responsible'])}</th><th>{e(labels['deadline'])}</th></tr>{rows}</table>"
+        )
+    if view['decisions']:
+        items = "".join(f"<li>{e(d)}</li>" for d in view['decisions'])
+        parts.append(f"<h2>{e(labels['decisions'])}</h2><ol>{items}</ol>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def render_text(view, output_format):
+    """(body, media type) of a non-PDF output"""
+    if output_format == "html":
+        return to_html(view), FORMATS["html"] + "; charset=utf-8"
+    if output_format == "markdown":
+        return to_markdown(view), FORMATS["markdown"] + "; charset=utf-8"
+    raise ValueError(f"{output_format!r} is not a text format")
+
+
+def negotiate(accept=None, output_format=None, default="pdf"):
+    """
+    Output format of a request: the explicit `format` field wins, then the
+    Accept header (by q-value), then `default`
+
+    Raises:
+        ValueError: unknown `format` value
+        LookupError: nothing in Accept can be produced (HTTP 406)
+    """
+    if output_format:
+        name = output_format.strip().lower()
+        name = FORMAT_ALIASES.get(name, name)
+        if name not in FORMATS:
+            raise ValueError(f"Unknown format {output_format!r} (choose from {', '.join(FORMATS)})")
+        return name
+    if not accept:
+        return default
+
+    ranges = []
+    for position, item in enumerate(accept.split(",")):
+        media_range, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_range and quality > 0:
+            ranges.append((-quality, position, media_range.lower()))
+
+    for _, _, media_range in sorted(ranges):
+        if media_range in ("*/*", "*"):
+            return default
+        if media_range.endswith("/*"):
+            family = media_range[:-1]
+            if FORMATS[default].startswith(family):
+                return default
+            for name, media_type in FORMATS.items():
+                if media_type.startswith(family):
+                    return name
+            continue
+        for name, media_type in FORMATS.items():
+            if media_range == media_type:
+                return name
+    raise LookupError(f"Cannot produce any of: {accept} (available: {', '.join(FORMATS.values())})")
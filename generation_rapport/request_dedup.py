@@ -0,0 +1,173 @@
+"""
+REQUEST DEDUPLICATION MODULE - Cedric's Meeting Report Generator
+Collapses duplicate generation requests onto a single pipeline run
+
+A double-click in the report modal or a client retry used to start a second
+full Whisper + Gemini run on the same input. Two mechanisms prevent that:
+
+- Single flight: concurrent requests with the same fingerprint (endpoint,
+  parameters and a hash of the uploaded content) wait for the run already
+  in progress and all receive its result.
+- Idempotency keys: a request carrying an ``Idempotency-Key`` header has its
+  result recorded on disk; a retry with the same key gets the recorded
+  result back instead of re-running the pipeline. Reusing a key for a
+  different request is refused.
+
+Only uses the standard library.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+
+# How long a recorded idempotent result can be replayed
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyMismatch(ValueError):
+    """Raised when an Idempotency-Key is reused for a different request"""
+
+
+def fingerprint(*parts):
+    """
+    Stable SHA-256 of request parts (bytes, str, numbers, None, or
+    JSON-serialisable values). Parts are length-prefixed so that
+    ("ab", "c") and ("a", "bc") differ.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            data = bytes(part)
+        else:
+            data = json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    At most one in-flight call per key; later callers share its result
+
+    The call runs as its own task, so a caller going away (client
+    disconnect) does not cancel the work the other callers wait for.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """
+        Await `fn(*args, **kwargs)` (a coroutine function), or the call with
+        the same key already in progress
+
+        Returns:
+            tuple: (result, shared) - shared is True when this caller joined
+                   a call started by another request
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if shared:
+            self.shared += 1
+        else:
+            self.executed += 1
+            call = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(call), shared
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not call.cancelled():
+            call.exception()
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        return {
+            'in_flight': self.in_flight(),
+            'executed': self.executed,
+            'shared': self.shared,
+        }
+
+
+class IdempotencyStore:
+    """
+    Results of requests sent with an Idempotency-Key, one JSON file per key
+
+    A record holds the request fingerprint and the result to replay; it
+    expires after `ttl` seconds.
+    """
+
+    def __init__(self, root, ttl=IDEMPOTENCY_TTL_SECONDS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    def _path(self, key):
+        if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+            raise ValueError(f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} printable characters")
+        # Hash the key: client-chosen strings never become file names
+        return self.root / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, key, request_fingerprint):
+        """
+        Recorded result for `key`, or None
+
+        Raises:
+            IdempotencyKeyMismatch: the key was used for a different request
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - record['created_at'] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        if record['fingerprint'] != request_fingerprint:
+            raise IdempotencyKeyMismatch(
+                "Idempotency-Key was already used for a different request"
+            )
+        return record['result']
+
+    def save(self, key, request_fingerprint, result):
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                'fingerprint': request_fingerprint,
+                'created_at': time.time(),
+                'result': result,
+            }, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, key):
+        self._path(key).unlink(missing_ok=True)
+
+    def purge_expired(self):
+        """Remove expired records; returns how many were removed"""
+        removed = 0
+        now = time.time()
+        for path in self.root.glob("*.json"):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    expired = now - json.load(f)['created_at'] > self.ttl
+            except (OSError, ValueError, KeyError):
+                expired = True
+            if expired:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
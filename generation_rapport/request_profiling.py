@@ -0,0 +1,264 @@
+"""
+REQUEST PROFILING MODULE - Cedric's Meeting Report Generator
+Opt-in profiling of single requests, stored by request id
+
+When one report takes 10 minutes instead of 2, profile the next one:
+- A sampling profiler records the Python stacks of the threads working on
+  the request (wall clock, so time spent waiting on Gemini shows up too),
+  attributed to pipeline stages (whisper, gemini, pdf, ...)
+- The Whisper stage additionally gets a torch profiler trace (operator
+  timings, viewable in chrome://tracing or Perfetto)
+- Results are written to <profile dir>/<request id>/:
+      summary.json         stage timings, hottest functions
+      cpu.folded           collapsed stacks (speedscope, flamegraph.pl)
+      whisper_trace.json   torch profiler chrome trace
+      whisper_ops.txt      torch operator table
+
+When no profile is active the hooks cost one context variable lookup.
+
+Only uses the standard library (torch for the Whisper trace, when installed).
+"""
+
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+# Seconds between two stack samples
+SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+# Deepest stack kept per sample
+MAX_STACK_DEPTH = 80
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """Samples collected for one request"""
+
+    def __init__(self, request_id, directory):
+        self.request_id = request_id
+        self.directory = Path(directory)
+        self.started = time.perf_counter()
+        self.stages = []              # {'stage', 'thread', 'start', 'seconds'}
+        self.samples = collections.Counter()  # (stage, stack) -> seconds
+        self.artifacts = []
+        self._threads = {}            # thread ident -> stack of stage names
+        self._lock = threading.Lock()
+
+    def enter(self, name):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.setdefault(ident, []).append(name)
+        return ident, time.perf_counter()
+
+    def exit(self, name, ident, started):
+        with self._lock:
+            stack = self._threads.get(ident)
+            if stack:
+                stack.pop()
+                if not stack:
+                    del self._threads[ident]
+            self.stages.append({
+                'stage': name,
+                'thread': ident,
+                'start': round(started - self.started, 4),
+                'seconds': round(time.perf_counter() - started, 4),
+            })
+
+    def sample(self, frames, seconds):
+        """Charge `seconds` to the current stack of every thread working for this request"""
+        with self._lock:
+            threads = [(ident, names[-1]) for ident, names in self._threads.items()]
+        for ident, stage in threads:
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[(stage, tuple(reversed(stack)))] += seconds
+
+    def _hottest(self, limit=25):
+        """Functions with the most time on top of the stack (self) and anywhere (total)"""
+        own = collections.Counter()
+        total = collections.Counter()
+        for (_stage, stack), seconds in self.samples.items():
+            if stack:
+                own[stack[-1]] += seconds
+            for function in set(stack):
+                total[function] += seconds
+        return {
+            'self': [{'function': f, 'seconds': round(t, 3)} for f, t in own.most_common(limit)],
+            'total': [{'function': f, 'seconds': round(t, 3)} for f, t in total.most_common(limit)],
+        }
+
+    def save(self, status_code=None, path=None):
+        """Write the profile files; returns the summary"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "cpu.folded", "w", encoding="utf-8") as f:
+            # Weights in milliseconds (the format wants integers)
+            for (stage, stack), seconds in sorted(self.samples.items()):
+                f.write(f"{';'.join((stage,) + stack)} {max(1, round(seconds * 1000))}\n")
+
+        summary = {
+            'request_id': self.request_id,
+            'path': path,
+            'status_code': status_code,
+            'seconds': round(time.perf_counter() - self.started, 3),
+            'sample_interval': SAMPLE_INTERVAL,
+            'sampled_seconds': round(sum(self.samples.values()), 3),
+            'stages': self.stages,
+            'hottest': self._hottest(),
+            'files': ["cpu.folded"] + self.artifacts,
+        }
+        with open(self.directory / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+class _Sampler:
+    """One background thread sampling every active profile; stops when idle"""
+
+    def __init__(self):
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, profile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        last = time.perf_counter()
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+            # Weigh each sample by the time actually elapsed (sleep overshoots)
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames, now - last)
+            del frames
+            last = now
+            time.sleep(SAMPLE_INTERVAL)
+
+
+_sampler = _Sampler()
+# The sampler thread does not survive a fork (serve.py workers)
+os.register_at_fork(after_in_child=_sampler.__init__)
+
+
+class ProfilingControl:
+    """
+    Decides which requests are profiled: those asking for it (header) and,
+    when switched on by an admin, all requests or the next N
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.enabled = False
+        self.remaining = None  # None = every request while enabled
+        self._lock = threading.Lock()
+
+    def configure(self, enabled, requests=None):
+        with self._lock:
+            self.enabled = enabled
+            self.remaining = requests if enabled else None
+        return self.status()
+
+    def status(self):
+        return {'enabled': self.enabled, 'remaining_requests': self.remaining}
+
+    def should_profile(self, requested):
+        if requested:
+            return True
+        with self._lock:
+            if not self.enabled:
+                return False
+            if self.remaining is not None:
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    self.enabled, self.remaining = False, None
+            return True
+
+    def directory(self, request_id):
+        if not request_id or not request_id.replace("-", "").isalnum():
+            raise ValueError(f"Invalid request id: {request_id!r}")
+        return self.root / request_id
+
+    @contextlib.contextmanager
+    def profile(self, request_id):
+        """Profile the code run in this context (and in tasks / threads it starts)"""
+        profile = RequestProfile(request_id, self.directory(request_id))
+        token = _current.set(profile)
+        _sampler.add(profile)
+        try:
+            yield profile
+        finally:
+            _sampler.remove(profile)
+            _current.reset(token)
+
+
+def active():
+    """Profile of the current request, or None"""
+    return _current.get()
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Mark the calling thread as working on pipeline stage `name` for the
+    current request's profile (no-op when the request is not profiled)
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    ident, started = profile.enter(name)
+    try:
+        yield
+    finally:
+        profile.exit(name, ident, started)
+
+
+@contextlib.contextmanager
+def torch_trace(name):
+    """torch profiler trace of the block, saved with the current request's profile"""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    import torch
+    from torch.profiler import ProfilerActivity, profile as torch_profile
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+    with torch_profile(activities=activities) as prof:
+        yield
+
+    profile.directory.mkdir(parents=True, exist_ok=True)
+    prof.export_chrome_trace(str(profile.directory / f"{name}_trace.json"))
+    with open(profile.directory / f"{name}_ops.txt", "w", encoding="utf-8") as f:
+        f.write(prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=40))
+    profile.artifacts += [f"{name}_trace.json", f"{name}_ops.txt"]
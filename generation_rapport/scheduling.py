@@ -0,0 +1,310 @@
+"""
+SCHEDULING MODULE - Cedric's Meeting Report Generator
+Priority classes and duration-aware ordering of the work waiting for Whisper and Gemini
+
+A 5-second /transcribe preview used to wait behind a 90-minute
+/generate/audio job: the shared Whisper model runs one inference at a time
+and Gemini calls queue for quota, both first come, first served. Requests
+now carry a Job describing their priority class and expected cost, and the
+waiting work of each shared resource is served:
+- by class: interactive (previews, short audio) before bulk (full reports,
+  long recordings)
+- within a class, shortest expected work first
+- with aging: every AGING_SECONDS spent waiting moves a job one class up,
+  so a long bulk job cannot be starved by a stream of short ones
+
+The audio length is probed from the upload's header (audio_io.probe_duration)
+before anything is decoded, and turned into a cost estimate per stage
+(decode, whisper, structure, render). Queue waits are reported per class
+and per stage.
+
+Work started outside a request (live windows, background upload steps,
+warm-ups) is classified by the length of the audio it transcribes.
+
+Only uses the standard library.
+"""
+
+import collections
+import contextvars
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Served in this order (index = class rank)
+PRIORITY_CLASSES = ("interactive", "bulk")
+# Audio up to this length is interactive unless the client says otherwise
+INTERACTIVE_MAX_AUDIO_SECONDS = float(os.getenv("SCHEDULER_INTERACTIVE_MAX_SECONDS", "120"))
+# Seconds of waiting that promote a job by one class
+AGING_SECONDS = float(os.getenv("SCHEDULER_AGING_SECONDS", "60"))
+
+STAGES = ("decode", "whisper", "structure", "render")
+# Cost model (seconds) of the stages that do not depend on the Whisper model
+DECODE_SECONDS_PER_AUDIO_SECOND = 0.002
+STRUCTURE_SECONDS = 8.0
+STRUCTURE_SECONDS_PER_AUDIO_MINUTE = 0.5
+RENDER_SECONDS = 1.0
+# Waits kept per class and stage for the percentiles
+RECENT_WAITS = 256
+
+
+def classify(requested=None, tier=None, audio_seconds=None):
+    """
+    Priority class of a job: the client's choice, else interactive for
+    preview-tier and short audio, bulk otherwise
+
+    Raises:
+        ValueError: unknown requested class
+    """
+    if requested:
+        name = requested.strip().lower()
+        if name not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority {requested!r} (choose from {', '.join(PRIORITY_CLASSES)})")
+        return name
+    if tier == "preview":
+        return "interactive"
+    if audio_seconds is not None and audio_seconds <= INTERACTIVE_MAX_AUDIO_SECONDS:
+        return "interactive"
+    return "bulk"
+
+
+def estimate(audio_seconds, real_time_factor, stages=STAGES):
+    """Expected seconds of each stage of a job on `audio_seconds` of audio"""
+    audio_seconds = audio_seconds or 0.0
+    costs = {
+        'decode': audio_seconds * DECODE_SECONDS_PER_AUDIO_SECOND,
+        'whisper': audio_seconds * real_time_factor,
+        'structure': STRUCTURE_SECONDS + audio_seconds / 60.0 * STRUCTURE_SECONDS_PER_AUDIO_MINUTE,
+        'render': RENDER_SECONDS,
+    }
+    return {stage: round(costs[stage], 2) for stage in stages}
+
+
+class Job:
+    """Priority class and expected cost of one request's pipeline run"""
+
+    def __init__(self, priority_class, audio_seconds=None, stages=None):
+        self.priority_class = priority_class
+        self.audio_seconds = audio_seconds
+        self.stages = stages or {}   # stage -> expected seconds
+
+    @property
+    def expected_seconds(self):
+        return round(sum(self.stages.values()), 2)
+
+
+_current = contextvars.ContextVar("scheduling_job", default=None)
+
+
+@contextmanager
+def bind(job):
+    """Make `job` the current one (tasks and threadpool calls started inside inherit it)"""
+    reset = _current.set(job)
+    try:
+        yield job
+    finally:
+        _current.reset(reset)
+
+
+def current():
+    return _current.get()
+
+
+# ----------------------------------------------------------------------
+# Wait queues
+# ----------------------------------------------------------------------
+class Waiter:
+    """One unit of work waiting for a resource"""
+
+    __slots__ = ("priority_class", "cost", "enqueued", "seq")
+
+    def __init__(self, priority_class, cost, seq):
+        self.priority_class = priority_class
+        self.cost = cost
+        self.enqueued = time.monotonic()
+        self.seq = seq
+
+    def rank(self, now):
+        """Class rank after aging (lower is served first)"""
+        return PRIORITY_CLASSES.index(self.priority_class) - int((now - self.enqueued) // AGING_SECONDS)
+
+    def key(self, now):
+        return self.rank(now), self.cost, self.seq
+
+
+class WaitQueue:
+    """
+    Work waiting for one resource (see module docstring for the order)
+
+    Not thread-safe: used under the lock of the resource it orders.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._waiters = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._waiters)
+
+    def add(self, cost=None, audio_seconds=None):
+        """
+        Queue work of the current job
+
+        Args:
+            cost: Size of the work, in any unit shared by the queue
+                  (default: the job's estimate for this stage)
+            audio_seconds: Audio length of work done outside a request (classification)
+        """
+        job = current()
+        if job is None:
+            priority_class = classify(audio_seconds=audio_seconds)
+        else:
+            priority_class = job.priority_class
+            if cost is None:
+                cost = job.stages.get(self.stage, job.expected_seconds)
+        waiter = Waiter(priority_class, cost or 0.0, next(self._seq))
+        self._waiters.append(waiter)
+        _metrics.waiting(priority_class, self.stage, +1)
+        return waiter
+
+    def head(self):
+        """Waiter to serve next"""
+        now = time.monotonic()
+        return min(self._waiters, key=lambda waiter: waiter.key(now), default=None)
+
+    def remove(self, waiter, served=True):
+        """Take `waiter` off the queue; its wait is recorded when it got the resource"""
+        self._waiters.remove(waiter)
+        _metrics.waiting(waiter.priority_class, self.stage, -1)
+        if served:
+            now = time.monotonic()
+            _metrics.record(waiter.priority_class, self.stage, now - waiter.enqueued,
+                            promoted=waiter.rank(now) < PRIORITY_CLASSES.index(waiter.priority_class))
+
+
+class PriorityLock:
+    """
+    Mutual exclusion handing the resource to the best waiter instead of any
+
+    Drop-in for threading.Lock (``with lock:``); ``with lock.claim(cost):``
+    also gives the size of the work for shortest-first ordering.
+    """
+
+    def __init__(self, stage):
+        self._queue = WaitQueue(stage)
+        self._changed = threading.Condition()
+        self._held = False
+
+    def acquire(self, cost=None, audio_seconds=None):
+        with self._changed:
+            waiter = self._queue.add(cost, audio_seconds)
+            try:
+                while self._held or self._queue.head() is not waiter:
+                    self._changed.wait()
+            except BaseException:
+                self._queue.remove(waiter, served=False)
+                self._changed.notify_all()
+                raise
+            self._queue.remove(waiter)
+            self._held = True
+
+    def release(self):
+        with self._changed:
+            self._held = False
+            self._changed.notify_all()
+
+    @contextmanager
+    def claim(self, cost=None, audio_seconds=None):
+        self.acquire(cost, audio_seconds)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def __len__(self):
+        """Work waiting for the lock"""
+        with self._changed:
+            return len(self._queue)
+
+
+# ----------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------
+class _Metrics:
+    """Queue waits per priority class and stage (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = collections.Counter()   # class -> jobs scheduled
+        self._stages = {}                   # (class, stage) -> counters
+
+    def _entry(self, priority_class, stage):
+        entry = self._stages.get((priority_class, stage))
+        if entry is None:
+            entry = self._stages[(priority_class, stage)] = {
+                'waiting': 0, 'served': 0, 'promoted': 0,
+                'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+                'recent': collections.deque(maxlen=RECENT_WAITS),
+            }
+        return entry
+
+    def scheduled(self, job):
+        with self._lock:
+            self.jobs[job.priority_class] += 1
+
+    def waiting(self, priority_class, stage, delta):
+        with self._lock:
+            self._entry(priority_class, stage)['waiting'] += delta
+
+    def record(self, priority_class, stage, waited, promoted=False):
+        with self._lock:
+            entry = self._entry(priority_class, stage)
+            entry['served'] += 1
+            entry['promoted'] += promoted
+            entry['wait_seconds'] += waited
+            entry['max_wait_seconds'] = max(entry['max_wait_seconds'], waited)
+            entry['recent'].append(waited)
+
+    def stats(self):
+        with self._lock:
+            classes = {name: {'jobs': self.jobs[name], 'stages': {}} for name in PRIORITY_CLASSES}
+            for (priority_class, stage), entry in sorted(self._stages.items()):
+                recent = sorted(entry['recent'])
+                classes[priority_class]['stages'][stage] = {
+                    'waiting': entry['waiting'],
+                    'served': entry['served'],
+                    'promoted': entry['promoted'],
+                    'mean_wait_seconds': round(entry['wait_seconds'] / entry['served'], 3) if entry['served'] else 0.0,
+                    'p95_wait_seconds': round(recent[math.ceil(0.95 * len(recent)) - 1], 3) if recent else 0.0,
+                    'max_wait_seconds': round(entry['max_wait_seconds'], 3),
+                }
+            return classes
+
+
+_metrics = _Metrics()
+
+
+def schedule(priority_class, audio_seconds=None, stages=None):
+    """New Job, counted in the per-class statistics"""
+    job = Job(priority_class, audio_seconds, stages)
+    _metrics.scheduled(job)
+    return job
+
+
+def stats():
+    return {
+        'interactive_max_audio_seconds': INTERACTIVE_MAX_AUDIO_SECONDS,
+        'aging_seconds': AGING_SECONDS,
+        'classes': _metrics.stats(),
+    }
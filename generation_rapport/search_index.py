@@ -0,0 +1,329 @@
+"""
+REPORT SEARCH INDEX - Cedric's Meeting Report Generator
+Local full-text index (SQLite FTS5) over generated reports and their transcripts
+
+Features:
+- Indexes the structured JSON from MeetingTextStructurer and the transcript
+  incrementally, right after each report is generated
+- Accent- and case-insensitive matching (unicode61 tokenizer, remove_diacritics)
+- Report-level search: all terms must appear somewhere in the report, or in
+  one kind of content only (e.g. only in the decisions)
+- Ranked hits (BM25) with the section title / transcript timestamp and a
+  snippet (HTML: the text is escaped, matched terms are wrapped in <b>)
+- Safe with several writer processes (serve.py workers): each report is
+  written in one BEGIN IMMEDIATE transaction
+
+Two FTS5 tables are kept:
+    report_docs    one row per report, one column per kind of content;
+                   answers "which reports match" in a single query
+    report_chunks  one row per section / decision / transcript window;
+                   answers "where in the report", with section and timestamp.
+                   A report's chunks get a contiguous rowid range so that
+                   per-report lookups are rowid-bounded index scans.
+
+Only uses the standard library (sqlite3 with FTS5, bundled with CPython).
+"""
+
+import html
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+# Kinds of indexed content (also the report_docs column names)
+KINDS = ("summary", "sections", "key_points", "decisions", "action_items", "participants", "transcript")
+
+# Transcript segments are grouped into windows of about this many seconds
+TRANSCRIPT_WINDOW_SECONDS = 30.0
+# Untimed transcripts (text input) are cut into chunks of about this many characters
+TRANSCRIPT_CHUNK_CHARS = 1000
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    meeting_type TEXT,
+    organization_name TEXT,
+    pdf_filename TEXT,
+    transcript_id TEXT,
+    summary TEXT,
+    first_chunk INTEGER,
+    last_chunk INTEGER
+);
+CREATE INDEX IF NOT EXISTS reports_created_at ON reports(created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS report_docs USING fts5(
+    {", ".join(KINDS)},
+    report_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS report_chunks USING fts5(
+    content,
+    kind UNINDEXED,
+    section UNINDEXED,
+    timestamp UNINDEXED,
+    report_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_TERM_RE = re.compile(r"\w+\*?", re.UNICODE)
+
+# Highlight markers of snippet(), replaced by <b> / </b> once the text is escaped
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+
+def to_fts_query(text, operator="AND"):
+    """
+    Turn free text into a safe FTS5 query: every word is quoted (so that
+    FTS5 syntax in user input is inert) and a trailing * keeps prefix search
+    """
+    terms = []
+    for term in _TERM_RE.findall(text):
+        prefix = term.endswith("*")
+        word = term.rstrip("*")
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return f" {operator} ".join(terms)
+
+
+def format_timestamp(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def _as_text(value):
+    if isinstance(value, dict):
+        return " ".join(_as_text(v) for v in value.values() if v)
+    if isinstance(value, (list, tuple)):
+        return " ".join(_as_text(v) for v in value if v)
+    return str(value or "")
+
+
+def build_chunks(structured_data, transcript=None, segments=None):
+    """
+    Split a report into indexable chunks
+
+    Returns:
+        list of dict: {'kind', 'section', 'timestamp', 'content'}
+    """
+    data = structured_data or {}
+    chunks = []
+
+    def add(kind, content, section=None, timestamp=None):
+        content = _as_text(content).replace(_MARK_OPEN, "").replace(_MARK_CLOSE, "").strip()
+        if content:
+            chunks.append({'kind': kind, 'section': section, 'timestamp': timestamp, 'content': content})
+
+    add("summary", data.get('summary'), section="Résumé")
+    for section in data.get('sections') or []:
+        if isinstance(section, dict):
+            title = section.get('title') or "Section"
+            add("sections", f"{title}. {_as_text(section.get('content'))}",
+                section=title, timestamp=section.get('timestamp') or None)
+    for point in data.get('key_points') or []:
+        add("key_points", point, section="Points clés")
+    for decision in data.get('decisions') or []:
+        add("decisions", decision, section="Décisions prises")
+    for item in data.get('action_items') or []:
+        add("action_items", item, section="Actions à mener")
+    add("participants", data.get('participants'), section="Participants")
+
+    if segments:
+        window, window_start = [], None
+        for segment in segments:
+            if window_start is None:
+                window_start = segment['start']
+            window.append(segment['text'].strip())
+            if segment['end'] - window_start >= TRANSCRIPT_WINDOW_SECONDS:
+                add("transcript", " ".join(window), section="Transcription",
+                    timestamp=format_timestamp(window_start))
+                window, window_start = [], None
+        if window:
+            add("transcript", " ".join(window), section="Transcription",
+                timestamp=format_timestamp(window_start))
+    elif transcript:
+        for start in range(0, len(transcript), TRANSCRIPT_CHUNK_CHARS):
+            add("transcript", transcript[start:start + TRANSCRIPT_CHUNK_CHARS], section="Transcription")
+
+    return chunks
+
+
+class ReportIndex:
+    """
+    SQLite FTS5 index of reports
+
+    One connection per thread (the API calls it from the thread pool);
+    writes take SQLite's write lock up front (BEGIN IMMEDIATE), so that
+    threads and processes are serialised, and WAL mode lets reads run meanwhile.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._reset()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+        # SQLite connections must not be used across a fork (serve.py workers)
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_report(self, report_id, structured_data, transcript=None, segments=None,
+                   meeting_type=None, organization_name=None, pdf_filename=None,
+                   transcript_id=None, created_at=None):
+        """Index (or re-index) one report; returns the number of chunks written"""
+        chunks = build_chunks(structured_data, transcript=transcript, segments=segments)
+        columns = {kind: [] for kind in KINDS}
+        for chunk in chunks:
+            columns[chunk['kind']].append(chunk['content'])
+
+        conn = self._connection()
+        with self._write_lock, conn:
+            # The chunk rowids are read and used in one write transaction:
+            # another process cannot take the same range in between
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete(conn, report_id)
+            first_chunk = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM report_chunks").fetchone()[0]
+            cursor = conn.execute(
+                "INSERT INTO reports (report_id, created_at, meeting_type, organization_name,"
+                " pdf_filename, transcript_id, summary, first_chunk, last_chunk)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    report_id,
+                    created_at or time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    meeting_type,
+                    organization_name,
+                    pdf_filename,
+                    transcript_id,
+                    _as_text((structured_data or {}).get('summary')),
+                    first_chunk,
+                    first_chunk + len(chunks) - 1,
+                ),
+            )
+            # report_docs rows share the rowid of their reports row
+            conn.execute(
+                f"INSERT INTO report_docs (rowid, {', '.join(KINDS)}, report_id)"
+                f" VALUES ({', '.join('?' * (len(KINDS) + 2))})",
+                [cursor.lastrowid] + [" \n".join(columns[kind]) for kind in KINDS] + [report_id],
+            )
+            conn.executemany(
+                "INSERT INTO report_chunks (rowid, content, kind, section, timestamp, report_id)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (first_chunk + i, chunk['content'], chunk['kind'], chunk['section'],
+                     chunk['timestamp'], report_id)
+                    for i, chunk in enumerate(chunks)
+                ],
+            )
+        return len(chunks)
+
+    def _delete(self, conn, report_id):
+        row = conn.execute(
+            "SELECT rowid, first_chunk, last_chunk FROM reports WHERE report_id = ?", (report_id,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM reports WHERE rowid = ?", (row['rowid'],))
+        conn.execute("DELETE FROM report_docs WHERE rowid = ?", (row['rowid'],))
+        conn.execute(
+            "DELETE FROM report_chunks WHERE rowid BETWEEN ? AND ?",
+            (row['first_chunk'], row['last_chunk']),
+        )
+
+    def delete_report(self, report_id):
+        conn = self._connection()
+        with self._write_lock, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete(conn, report_id)
+
+    def search(self, query, limit=20, kind=None, meeting_type=None, hits_per_report=3):
+        """
+        Reports containing every term of `query`, best first
+
+        Args:
+            query: Free text; words are ANDed, `word*` does prefix search
+            limit: Maximum number of reports
+            kind: Restrict matching to one kind of content (see KINDS)
+            meeting_type: Only reports of this meeting type
+            hits_per_report: Best matching chunks returned per report
+
+        Returns:
+            dict: {'query', 'took_ms', 'results': [{report..., 'score', 'hits': [...]}]}
+        """
+        started = time.perf_counter()
+        if kind is not None and kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+
+        match = to_fts_query(query)
+        if not match:
+            return {'query': query, 'took_ms': 0.0, 'results': []}
+        if kind is not None:
+            match = f"{{{kind}}} : ({match})"
+
+        conn = self._connection()
+        sql = (
+            "SELECT r.*, bm25(report_docs) AS score"
+            " FROM report_docs JOIN reports r ON r.rowid = report_docs.rowid"
+            " WHERE report_docs MATCH ?"
+        )
+        params = [match]
+        if meeting_type:
+            sql += " AND r.meeting_type = ?"
+            params.append(meeting_type)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        reports = [dict(row) for row in conn.execute(sql, params)]
+
+        # Where in each report: chunks matching any of the terms. bm25() would
+        # rescan the global term statistics on every query, so chunks are
+        # ranked by their number of highlighted terms instead.
+        any_term = to_fts_query(query, operator="OR")
+        for report in reports:
+            sql = (
+                "SELECT rowid, kind, section, timestamp,"
+                f" snippet(report_chunks, 0, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', 16) AS snippet"
+                " FROM report_chunks WHERE report_chunks MATCH ? AND rowid BETWEEN ? AND ?"
+            )
+            params = [any_term, report.pop('first_chunk'), report.pop('last_chunk')]
+            if kind is not None:
+                sql += " AND kind = ?"
+                params.append(kind)
+            hits = [dict(row) for row in conn.execute(sql, params)]
+            for hit in hits:
+                # Transcripts are user content: escape them before adding markup
+                hit['snippet'] = (html.escape(hit['snippet'])
+                                  .replace(_MARK_OPEN, "<b>").replace(_MARK_CLOSE, "</b>"))
+            hits.sort(key=lambda hit: (-hit['snippet'].count("<b>"), hit['rowid']))
+            for hit in hits:
+                del hit['rowid']
+            report['hits'] = hits[:hits_per_report]
+
+        return {
+            'query': query,
+            'took_ms': round((time.perf_counter() - started) * 1000, 2),
+            'results': reports,
+        }
+
+    def stats(self):
+        conn = self._connection()
+        return {
+            'reports': conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0],
+            'chunks': conn.execute("SELECT COUNT(*) FROM report_chunks").fetchone()[0],
+            'size_bytes': self.db_path.stat().st_size,
+        }
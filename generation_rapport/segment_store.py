@@ -0,0 +1,318 @@
+"""
+TRANSCRIPT SEGMENT STORE - Cedric's Meeting Report Generator
+Compact, memory-mapped columnar storage for timestamped transcripts
+
+Instead of keeping Whisper's result (a list of dicts with token lists per
+segment) around, a transcript is written once to a single file holding:
+- start / end times as float32 arrays
+- the segment texts concatenated in one UTF-8 buffer, addressed by offsets
+- an accent- and case-folded copy of that buffer for keyword lookups
+- optional per-word timings (same layout: arrays + one text buffer)
+
+The file is opened with mmap, so lookups only touch the pages they need:
+- time_range(start, end): binary search on the start times and on the
+  running maximum of the end times (segments of different speakers overlap)
+- search(keyword): substring scan of the folded buffer, mapped back to
+  segments by binary search on the offsets
+
+File layout (little endian, every array 8-byte aligned):
+    header   <8s I I I Q Q Q Q   magic, version, n_segments, n_words,
+                                  text_len, folded_len, words_len, meta_len
+    float32  seg_start[n], seg_end[n], seg_max_end[n]   (running maximum of seg_end)
+    uint64   text_offsets[n+1], folded_offsets[n+1]
+    uint32   word_index[n+1]      (words of segment i: word_index[i]:word_index[i+1])
+    float32  word_start[w], word_end[w]
+    uint64   word_offsets[w+1]
+    bytes    text, folded, words, meta (JSON)
+
+Requirements:
+    pip install numpy
+"""
+
+import json
+import mmap
+import os
+import struct
+import unicodedata
+from pathlib import Path
+
+
+MAGIC = b"NXSEG\x00\x00\x01"
+VERSION = 2
+# Version 1 files have no seg_max_end (computed on open)
+READ_VERSIONS = (1, 2)
+HEADER = struct.Struct("<8sIIIQQQQ")
+FILE_SUFFIX = ".seg"
+
+
+def fold_text(text):
+    """Lowercase and strip accents (radiothérapie -> radiotherapie)"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def transcript_path(directory, transcript_id):
+    """Path of a transcript file; rejects ids that could escape `directory`"""
+    if not transcript_id or not transcript_id.isalnum():
+        raise ValueError(f"Invalid transcript id: {transcript_id!r}")
+    return Path(directory) / f"{transcript_id}{FILE_SUFFIX}"
+
+
+def _align(position):
+    return (position + 7) & ~7
+
+
+def _pack_strings(strings):
+    """Concatenate strings as UTF-8; returns (buffer, offsets list of len n+1)"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for chunk in encoded:
+        offsets.append(offsets[-1] + len(chunk))
+    return b"".join(encoded), offsets
+
+
+class SegmentStore:
+    """
+    Read-only view of a transcript file (see module docstring for the layout)
+
+    Use SegmentStore.write(...) / SegmentStore.from_whisper_result(...) to
+    create one and SegmentStore(path) to open it.
+    """
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty segment store: {self.path}")
+
+        (magic, version, n_segments, n_words,
+         text_len, folded_len, words_len, meta_len) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version not in READ_VERSIONS:
+            self.close()
+            raise ValueError(f"Not a segment store (or unsupported version): {self.path}")
+
+        position = HEADER.size
+
+        def array(dtype, count):
+            nonlocal position
+            position = _align(position)
+            values = np.frombuffer(self._mm, dtype=dtype, count=count, offset=position)
+            position += values.nbytes
+            return values
+
+        def buffer(length):
+            nonlocal position
+            start = position
+            position += length
+            return start, position
+
+        self.starts = array("<f4", n_segments)
+        self.ends = array("<f4", n_segments)
+        if version >= 2:
+            self._max_ends = array("<f4", n_segments)
+        else:
+            self._max_ends = np.maximum.accumulate(self.ends) if n_segments else self.ends
+        self._text_offsets = array("<u8", n_segments + 1)
+        self._folded_offsets = array("<u8", n_segments + 1)
+        self._word_index = array("<u4", n_segments + 1)
+        self.word_starts = array("<f4", n_words)
+        self.word_ends = array("<f4", n_words)
+        self._word_offsets = array("<u8", n_words + 1)
+        self._text = buffer(text_len)
+        self._folded = buffer(folded_len)
+        self._words = buffer(words_len)
+        meta_start, meta_end = buffer(meta_len)
+        self.meta = json.loads(self._mm[meta_start:meta_end] or b"{}")
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    @classmethod
+    def write(cls, path, segments, meta=None):
+        """
+        Write a transcript to `path` and return it opened
+
+        Args:
+            path: Output file
+            segments: Iterable of {'start', 'end', 'text', optional 'words':
+                      [{'start', 'end', 'word'}]}; sorted by start on write
+            meta: Optional JSON-serialisable dict (language, model, ...)
+        """
+        import numpy as np
+
+        segments = sorted(segments, key=lambda seg: (seg['start'], seg['end']))
+        texts = [seg['text'].strip() for seg in segments]
+        words = []
+        word_index = [0]
+        for seg in segments:
+            words.extend(seg.get('words') or [])
+            word_index.append(len(words))
+
+        text, text_offsets = _pack_strings(texts)
+        folded, folded_offsets = _pack_strings([fold_text(t) for t in texts])
+        word_text, word_offsets = _pack_strings([w['word'] for w in words])
+        meta = dict(meta or {})
+        ends = np.asarray([seg['end'] for seg in segments], dtype="<f4")
+        # Only used to prune time_range(): the stored ends stay the real ones
+        max_ends = np.maximum.accumulate(ends) if segments else ends
+        if segments:
+            meta.setdefault('duration', float(max_ends[-1]))
+        meta_bytes = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+
+        arrays = [
+            np.asarray([seg['start'] for seg in segments], dtype="<f4"),
+            ends,
+            max_ends,
+            np.asarray(text_offsets, dtype="<u8"),
+            np.asarray(folded_offsets, dtype="<u8"),
+            np.asarray(word_index, dtype="<u4"),
+            np.asarray([w['start'] for w in words], dtype="<f4"),
+            np.asarray([w['end'] for w in words], dtype="<f4"),
+            np.asarray(word_offsets, dtype="<u8"),
+        ]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, len(segments), len(words),
+                len(text), len(folded), len(word_text), len(meta_bytes),
+            ))
+            for values in arrays:
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                f.write(values.tobytes())
+            for blob in (text, folded, word_text, meta_bytes):
+                f.write(blob)
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @classmethod
+    def from_whisper_result(cls, path, result, meta=None):
+        """Write the segments of a Whisper transcribe() result"""
+        meta = dict(meta or {})
+        meta.setdefault('language', result.get('language'))
+        segments = [
+            {
+                'start': seg['start'],
+                'end': seg['end'],
+                'text': seg['text'],
+                'words': seg.get('words'),
+            }
+            for seg in result.get('segments', [])
+        ]
+        return cls.write(path, segments, meta=meta)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return len(self.starts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Drop the NumPy views first: mmap refuses to close while exported
+        for name in ("starts", "ends", "_max_ends", "_text_offsets", "_folded_offsets", "_word_index",
+                     "word_starts", "word_ends", "_word_offsets"):
+            self.__dict__.pop(name, None)
+        if getattr(self, "_mm", None) is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # a caller still holds an array view; unmapped on garbage collection
+            self._mm = None
+        self._file.close()
+
+    @property
+    def has_words(self):
+        return len(self.word_starts) > 0
+
+    def _string(self, buffer, offsets, index):
+        base = buffer[0]
+        return self._mm[base + int(offsets[index]):base + int(offsets[index + 1])].decode("utf-8")
+
+    def text(self, index):
+        return self._string(self._text, self._text_offsets, index)
+
+    def words(self, index):
+        """Per-word timings of segment `index` (empty if not stored)"""
+        first, last = int(self._word_index[index]), int(self._word_index[index + 1])
+        return [
+            {
+                'start': round(float(self.word_starts[i]), 3),
+                'end': round(float(self.word_ends[i]), 3),
+                'word': self._string(self._words, self._word_offsets, i),
+            }
+            for i in range(first, last)
+        ]
+
+    def segment(self, index, with_words=False):
+        segment = {
+            'index': index,
+            'start': round(float(self.starts[index]), 3),
+            'end': round(float(self.ends[index]), 3),
+            'text': self.text(index),
+        }
+        if with_words and self.has_words:
+            segment['words'] = self.words(index)
+        return segment
+
+    def full_text(self):
+        # Segments are stored without separators: rebuild with spaces
+        return " ".join(self.text(i) for i in range(len(self)))
+
+    def time_range(self, start=None, end=None, with_words=False):
+        """Segments overlapping [start, end] (seconds; None = open bound)"""
+        import numpy as np
+
+        # Segments before `first` all end before `start`; later ones may
+        # still do (a short turn during a long one), hence the check on ends
+        first = 0 if start is None else int(np.searchsorted(self._max_ends, start, side="right"))
+        last = len(self) if end is None else int(np.searchsorted(self.starts, end, side="left"))
+        return [
+            self.segment(i, with_words) for i in range(first, max(first, last))
+            if start is None or self.ends[i] > start
+        ]
+
+    def search(self, keyword, limit=50):
+        """
+        Segments containing `keyword` (case- and accent-insensitive), in time order
+        """
+        import numpy as np
+
+        needle = fold_text(keyword.strip()).encode("utf-8")
+        if not needle:
+            return []
+
+        base, end = self._folded
+        hits = []
+        position = self._mm.find(needle, base, end)
+        while position != -1 and len(hits) < limit:
+            index = int(np.searchsorted(self._folded_offsets, position - base, side="right")) - 1
+            segment_end = base + int(self._folded_offsets[index + 1])
+            # A match straddling two segments is not a match
+            if position + len(needle) <= segment_end:
+                hits.append(self.segment(index))
+                position = segment_end  # one hit per segment
+            else:
+                position += 1
+            position = self._mm.find(needle, position, end)
+        return hits
+
+    def summary(self):
+        return {
+            'segments': len(self),
+            'words': len(self.word_starts),
+            'size_bytes': self.path.stat().st_size,
+            **self.meta,
+        }
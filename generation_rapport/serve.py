@@ -0,0 +1,174 @@
+"""
+MULTI-WORKER SERVER - Cedric's Meeting Report Generator
+Serves the API from several worker processes that share the Whisper weights
+
+`uvicorn --workers N` starts N independent interpreters, each loading its
+own copy of every Whisper model (N x 1.5 GB for 'medium'). This launcher
+instead:
+1. imports the app and loads WHISPER_PRELOAD_MODELS once, in the parent
+2. freezes the garbage collector (gc.freeze) so that collections in the
+   workers never write to the pages holding the parent's objects
+3. binds the listening socket and forks the workers, which inherit the
+   loaded models: the weight tensors are only read, so their pages stay
+   shared copy-on-write between all workers
+4. restarts workers that die (fork again from the parent, which still
+   holds the models, so a restart costs no model load)
+
+Each worker warms the models up itself (no inference runs in the parent:
+forking after OpenMP thread pools have started is unsafe), gets an equal
+share of the CPU threads and of the private memory budget, and reports its
+shared / private memory in GET /health -> worker. With a CPU_TOPOLOGY
+(cpu_topology.py), each worker gets its own slice of the whisper cores
+and as many torch threads, instead of an equal share of all cores.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+    WEB_WORKERS=4 python serve.py
+
+Linux only (fork); requires the same packages as api_server.py.
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+import cpu_topology
+
+
+# Worker processes (0 = one per CPU core, at most 4)
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "0"))
+# Seconds between two restarts of a crashing worker
+RESTART_DELAY_SECONDS = 1.0
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _bind(host, port, backlog=2048):
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Forks the workers from the preloaded parent and keeps them running"""
+
+    def __init__(self, api_server, sock, workers, log_level="info"):
+        self.api_server = api_server
+        self.sock = sock
+        self.workers = workers
+        self.log_level = log_level
+        self.threads = max(1, _cpu_count() // workers)
+        self.children = {}  # pid -> worker id
+        self.stopping = False
+
+        import process_stats
+
+        # Memory of the parent at fork time is shared by every worker; the
+        # rest of the admission budget is split between them
+        controller = api_server.admission_controller
+        self.shared_mb = process_stats.rss_bytes() / 2**20
+        self.worker_budget_mb = self.shared_mb + max(0.0, controller.budget_mb - self.shared_mb) / workers
+
+    def _run_worker(self, worker_id):
+        """Body of a forked worker; never returns"""
+        code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            threads = cpu_topology.use_worker(worker_id, self.workers) or self.threads
+            if "torch" in sys.modules:
+                sys.modules["torch"].set_num_threads(threads)
+            self.api_server.WORKER_ID = worker_id
+            self.api_server.admission_controller.budget_mb = self.worker_budget_mb
+            config = uvicorn.Config(self.api_server.app, log_level=self.log_level, lifespan="on")
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException as e:
+            print(f"✗ Worker {worker_id} crashed: {e!r}")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+
+    def spawn(self, worker_id):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(worker_id)
+        self.children[pid] = worker_id
+        topology = cpu_topology.current()
+        if topology is None:
+            print(f"✓ Worker {worker_id} started (pid {pid}, {self.threads} threads)")
+        else:
+            topology = topology.for_worker(worker_id, self.workers)
+            print(f"✓ Worker {worker_id} started (pid {pid}, {topology.whisper_threads} threads "
+                  f"on cores {topology.describe()['whisper']})")
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for worker_id in range(self.workers):
+            self.spawn(worker_id)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            worker_id = self.children.pop(pid, None)
+            if worker_id is None or self.stopping:
+                continue
+            print(f"⚠ Worker {worker_id} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            time.sleep(RESTART_DELAY_SECONDS)
+            self.spawn(worker_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS or min(4, _cpu_count()))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    import api_server
+    import model_registry
+
+    # Load without warming: the warm-up inference runs in each worker
+    if api_server.PRELOAD_MODELS:
+        model_registry.preload(api_server.PRELOAD_MODELS, warm=False)
+    print(f"✓ Parent ready in {time.perf_counter() - started:.1f} s, forking {args.workers} workers")
+
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port)
+    Supervisor(api_server, sock, args.workers, log_level=args.log_level).run()
+
+
+if __name__ == "__main__":
+    main()
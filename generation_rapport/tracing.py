@@ -0,0 +1,360 @@
+"""
+REQUEST TRACING MODULE - Cedric's Meeting Report Generator
+Request-correlated trace spans for the report pipeline
+
+Progress used to be reported with print banners, which interleave between
+concurrent requests and cannot be tied back to one of them. Each stage now
+runs in a span (upload, decode, model_load, transcribe, structure, parse,
+render, ...) that records its start, duration, attributes and outcome under
+the trace of the HTTP request that caused it.
+
+Features:
+- The trace id comes from the incoming W3C `traceparent` header when
+  present, so spans join the caller's trace; otherwise from X-Request-Id
+- Spans started in worker threads (run_in_threadpool) nest under the
+  request span: the current span lives in a context variable
+- Each finished span also prints one line prefixed with the request id
+- Every span is also a request_profiling stage, so profiles use the same names
+- Finished spans are exported in the background, in batches:
+      TRACE_EXPORTER=file   JSON lines in TRACE_FILE (rotated at TRACE_FILE_MAX_MB)
+      TRACE_EXPORTER=otlp   OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT/v1/traces
+      TRACE_EXPORTER=none   only kept in memory
+- The spans of recent requests are kept in memory (recent_trace) to look at
+  the critical path of a slow request without a collector
+
+Only uses the standard library.
+"""
+
+import atexit
+import collections
+import contextlib
+import contextvars
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.request
+from pathlib import Path
+
+import request_profiling
+
+
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").rstrip("/")
+EXPORTER = os.getenv("TRACE_EXPORTER", "otlp" if OTLP_ENDPOINT else "file")
+TRACE_FILE = os.getenv("TRACE_FILE", "")  # default: set by configure()
+TRACE_FILE_MAX_MB = float(os.getenv("TRACE_FILE_MAX_MB", "50"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "generation-rapport")
+# One line per finished span on stdout
+CONSOLE = os.getenv("TRACE_CONSOLE", "1") != "0"
+# Requests whose spans are kept in memory
+RECENT_TRACES = 200
+EXPORT_BATCH_SIZE = 256
+EXPORT_INTERVAL_SECONDS = 2.0
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+
+def _new_span_id():
+    return os.urandom(8).hex()
+
+
+def trace_id_for(request_id):
+    """32-hex trace id for a request id (kept as is when it already is one)"""
+    if re.fullmatch(r"[0-9a-f]{32}", request_id):
+        return request_id
+    return hashlib.sha256(request_id.encode("utf-8")).hexdigest()[:32]
+
+
+class Span:
+    """One timed stage of a request"""
+
+    def __init__(self, name, trace_id, parent_id, request_id, attributes, root=False):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.request_id = request_id
+        self.attributes = dict(attributes)
+        self.root = root  # the HTTP request span
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        """Add attributes (JSON scalars) to the span"""
+        self.attributes.update(attributes)
+
+    def fail(self, message):
+        """Mark the span as failed without raising (pipeline steps return errors)"""
+        self.error = str(message)
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'request_id': self.request_id,
+            'name': self.name,
+            'root': self.root,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': round((self.end_ns - self.start_ns) / 1e6, 3),
+            'status': 'error' if self.error else 'ok',
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+# ------------------------------------------------------------------
+# Export
+# ------------------------------------------------------------------
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def to_otlp(spans):
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) for finished span dicts"""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': SERVICE_NAME})},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [
+                    {
+                        'traceId': span['trace_id'],
+                        'spanId': span['span_id'],
+                        'parentSpanId': span['parent_id'] or "",
+                        'name': span['name'],
+                        'kind': 2 if span['root'] else 1,  # SERVER / INTERNAL
+                        'startTimeUnixNano': str(span['start_ns']),
+                        'endTimeUnixNano': str(span['end_ns']),
+                        'attributes': _otlp_attributes(dict(span['attributes'], **{'request.id': span['request_id']})),
+                        'status': (
+                            {'code': 2, 'message': span['error']} if span['error'] else {'code': 1}
+                        ),
+                    }
+                    for span in spans
+                ],
+            }],
+        }],
+    }
+
+
+class _Exporter:
+    """Background thread writing finished spans in batches"""
+
+    def __init__(self):
+        self.kind = EXPORTER
+        self.path = Path(TRACE_FILE) if TRACE_FILE else None
+        self.exported = 0
+        self.failed = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()  # the thread and flush() at exit
+
+    def submit(self, span):
+        if self.kind == "none":
+            return
+        self._queue.put(span)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def _drain(self, timeout):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < EXPORT_BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._drain(EXPORT_INTERVAL_SECONDS)
+            if batch:
+                self._export(batch)
+
+    def flush(self):
+        batch = self._drain(0)
+        while batch:
+            self._export(batch)
+            batch = self._drain(0)
+
+    def _export(self, batch):
+        try:
+            with self._export_lock:
+                self._send(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            # Tracing must never break a request; the spans are dropped
+            self.failed += len(batch)
+            print(f"⚠ Could not export {len(batch)} trace spans: {e}")
+
+    def _send(self, batch):
+        if self.kind == "otlp":
+            request = urllib.request.Request(
+                f"{OTLP_ENDPOINT}/v1/traces",
+                data=json.dumps(to_otlp(batch)).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(request, timeout=10):
+                pass
+        elif self.path is not None:
+            self._write(batch)
+
+    def _write(self, batch):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size > TRACE_FILE_MAX_MB * 2**20:
+            os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        # One append per batch: forked workers (serve.py) share the file
+        lines = "".join(json.dumps(span, ensure_ascii=False) + "\n" for span in batch)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+_exporter = _Exporter()
+_recent = collections.OrderedDict()  # request id -> finished span dicts
+_recent_lock = threading.Lock()
+
+
+def flush():
+    """Export the spans still queued (called at exit)"""
+    _exporter.flush()
+
+
+atexit.register(flush)
+
+
+def _after_fork():
+    """Forked workers (serve.py) start with their own queue, locks and exporter thread"""
+    global _exporter, _recent_lock
+    path = _exporter.path
+    _exporter = _Exporter()
+    _exporter.path = path
+    _recent.clear()
+    _recent_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def configure(trace_file=None):
+    """Set the default trace file (used when TRACE_FILE is not set)"""
+    if _exporter.path is None and trace_file is not None:
+        _exporter.path = Path(trace_file)
+
+
+def _finish(span):
+    span.end_ns = time.time_ns()
+    record = span.to_dict()
+    with _recent_lock:
+        spans = _recent.get(span.request_id)
+        if spans is None:
+            spans = _recent[span.request_id] = []
+            while len(_recent) > RECENT_TRACES:
+                _recent.popitem(last=False)
+        spans.append(record)
+    _exporter.submit(record)
+
+    if CONSOLE and not span.root:
+        details = ", ".join(f"{key}={value}" for key, value in span.attributes.items() if value is not None)
+        mark = f"✗ {span.name} failed: {span.error}" if span.error else f"✓ {span.name}"
+        print(f"[{span.request_id[:12]}] {mark} ({span.seconds:.2f} s){f' {details}' if details else ''}")
+
+
+# ------------------------------------------------------------------
+# Spans
+# ------------------------------------------------------------------
+@contextlib.contextmanager
+def request_span(request_id, name, traceparent=None, **attributes):
+    """
+    Root span of one HTTP request; joins the caller's trace when a valid
+    W3C traceparent header is given
+    """
+    match = _TRACEPARENT_RE.match(traceparent or "")
+    trace_id, parent_id = match.groups() if match else (trace_id_for(request_id), None)
+    span = Span(name, trace_id, parent_id, request_id, attributes, root=True)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.fail(repr(e))
+        raise
+    finally:
+        _current.reset(token)
+        _finish(span)
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """
+    Child span of the current one (and a request_profiling stage of the same
+    name). Outside a request (scripts, tests) a trace is started for the
+    call so that the console output stays the same.
+    """
+    parent = _current.get()
+    if parent is None:
+        request_id = os.urandom(6).hex()
+        current = Span(name, trace_id_for(request_id), None, request_id, attributes)
+    else:
+        current = Span(name, parent.trace_id, parent.span_id, parent.request_id, attributes)
+    token = _current.set(current)
+    try:
+        with request_profiling.stage(name):
+            yield current
+    except BaseException as e:
+        current.fail(repr(e))
+        raise
+    finally:
+        _current.reset(token)
+        _finish(current)
+
+
+def current_span():
+    """Innermost active span, or None"""
+    return _current.get()
+
+
+def recent_trace(request_id):
+    """Finished spans of a recent request, ordered by start time (None if unknown)"""
+    with _recent_lock:
+        spans = _recent.get(request_id)
+        spans = list(spans) if spans is not None else None
+    if spans is None:
+        return None
+    return sorted(spans, key=lambda span: span['start_ns'])
+
+
+def stats():
+    return {
+        'exporter': _exporter.kind,
+        'file': str(_exporter.path) if _exporter.path and _exporter.kind == "file" else None,
+        'exported_spans': _exporter.exported,
+        'failed_spans': _exporter.failed,
+        'recent_requests': len(_recent),
+    }
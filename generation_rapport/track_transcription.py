@@ -0,0 +1,341 @@
+"""
+MULTI-TRACK TRANSCRIPTION MODULE - Cedric's Meeting Report Generator
+Transcribes one audio track per participant concurrently and merges them
+
+The video call already has every participant on a separate audio track.
+Transcribing the tracks separately instead of a mixdown means:
+- no overlapping speech inside one Whisper window
+- speaker labels for free (no diarisation pass)
+- the tracks can be transcribed in parallel on all cores
+
+Features:
+- A pool of worker processes per model size, each worker holding its own
+  resident Whisper model and an equal share of the CPU threads (of the
+  tracks cores with a CPU_TOPOLOGY, see cpu_topology.py); pools outlive
+  requests, and the least recently used idle pool is shut down when more
+  than TRACK_POOLS sizes are in use
+- Decoding happens in the workers too, so it is parallel as well
+- A cancelled request (cancellation.py) cancels its tracks still queued,
+  and its running tracks stop at their next Whisper window: each job
+  passes a cancel Event to the workers, set when the request's token fires
+- Segments of all tracks are merged by start time into one labelled transcript
+- On GPU the tracks go through the shared in-process model one after another
+  (the GPU is already saturated by a single transcription)
+
+Requirements:
+    pip install openai-whisper numpy
+"""
+
+import collections
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_EXCEPTION, CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cancellation
+import cpu_topology
+import model_registry
+
+
+# Worker processes for track transcription; each holds its own copy of the
+# model, so memory grows with this (0 = one per CPU core, at most 4)
+TRACK_WORKERS = int(os.getenv("TRACK_WORKERS", "0"))
+# Consecutive segments of one speaker closer than this are joined in the transcript
+MERGE_GAP_SECONDS = 1.0
+# Worker pools (model sizes) kept loaded; idle ones beyond this are shut down
+TRACK_POOLS = int(os.getenv("TRACK_POOLS", "2"))
+# Longest wait between two checks of the request's cancellation
+CANCEL_POLL_SECONDS = 1.0
+
+# model size -> _Pool, least recently used first
+_pools = collections.OrderedDict()
+_pool_lock = threading.Lock()
+# Serves the per-job cancel Events (started with the first cancellable job)
+_manager = None
+
+# Set inside each worker process by _init_worker
+_worker_transcriber = None
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_worker(model_size, workers):
+    """Runs once per worker process: pin its thread budget and load the model"""
+    global _worker_transcriber
+    threads = cpu_topology.use_track_worker(workers) or max(1, _cpu_count() // workers)
+    import torch
+
+    torch.set_num_threads(threads)
+    from cedric_file1 import MeetingTranscriber
+
+    _worker_transcriber = MeetingTranscriber(model_size=model_size, device="cpu")
+    _worker_transcriber._load_model()
+
+
+def _transcribe_in_worker(audio, pcm, language, decoding, cancel_event=None):
+    if cancel_event is None:
+        return _transcribe_track(_worker_transcriber, audio, pcm, language, decoding)
+    # The model checks the bound token before each 30-second window (model_registry.py)
+    with cancellation.bind(cancellation.CancelToken(cancel_event, reason="request cancelled")):
+        return _transcribe_track(_worker_transcriber, audio, pcm, language, decoding)
+
+
+def _transcribe_track(transcriber, audio, pcm, language, decoding=None):
+    result = transcriber.transcribe_audio_file(audio, language=language, pcm=pcm, decoding=decoding)
+    if not result['success']:
+        return result
+    # Only ship back what the merge needs (not tokens / logprobs)
+    return {
+        'success': True,
+        'language': result['language'],
+        'segments': [
+            {'start': seg['start'], 'end': seg['end'], 'text': seg['text'].strip()}
+            for seg in result['full_result'].get('segments', [])
+        ],
+    }
+
+
+class _Pool:
+    """Worker pool of one model size and the requests using it"""
+
+    def __init__(self, model_size, workers):
+        # spawn: forking a process that already runs torch threads can deadlock
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, workers),
+        )
+        self.workers = workers
+        self.users = 0
+
+
+def _forget_pool():
+    """A forked serving worker (serve.py) must not use its parent's pools"""
+    global _pools, _pool_lock, _manager
+    _pools, _pool_lock, _manager = collections.OrderedDict(), threading.Lock(), None
+
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+def worker_count():
+    return TRACK_WORKERS or min(4, _cpu_count())
+
+
+def resident_pools():
+    """
+    Model copies held by the live worker pools: {model_size: workers}
+
+    Idle pools keep their workers (and models) loaded between requests,
+    so admission.py counts them as resident memory.
+    """
+    with _pool_lock:
+        return {model_size: pool.workers for model_size, pool in _pools.items()}
+
+
+def _evict_idle():
+    """Shut down least recently used pools nobody is using while over TRACK_POOLS (lock held)"""
+    for model_size in list(_pools):
+        if len(_pools) <= max(1, TRACK_POOLS):
+            return
+        if _pools[model_size].users == 0:
+            # Idle: nothing queued, no other request's futures to cancel
+            _pools.pop(model_size).executor.shutdown(wait=False)
+
+
+def _acquire_pool(model_size):
+    """
+    Worker pool for `model_size`, kept between requests so the models stay
+    loaded; release it with _release_pool when the request's tracks are done
+    """
+    with _pool_lock:
+        pool = _pools.get(model_size)
+        if pool is None:
+            pool = _pools[model_size] = _Pool(model_size, worker_count())
+        _pools.move_to_end(model_size)
+        pool.users += 1
+        _evict_idle()
+        return pool
+
+
+def _release_pool(model_size, pool, broken=False):
+    with _pool_lock:
+        pool.users -= 1
+        if broken and _pools.get(model_size) is pool:
+            # A worker died: the next request starts a fresh pool; requests
+            # still holding this one get BrokenProcessPool themselves
+            del _pools[model_size]
+            pool.executor.shutdown(wait=False)
+        _evict_idle()
+
+
+def _cancel_event():
+    """Event shared with the workers, to stop one job's running tracks"""
+    global _manager
+    with _pool_lock:
+        if _manager is None:
+            _manager = multiprocessing.get_context("spawn").Manager()
+        return _manager.Event()
+
+
+def _wait_for(futures, token, cancel_event):
+    """
+    Results of the track futures; when `token` fires, cancel the tracks
+    still queued, signal the running ones and raise Cancelled
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_EXCEPTION)
+        if any(future.exception() is not None for future in done):
+            break
+        if token is not None and token.cancelled:
+            for future in pending:
+                future.cancel()
+            cancel_event.set()
+            cancellation.check("whisper")
+    return [future.result() for future in futures]
+
+
+def shutdown():
+    global _pools, _manager
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.executor.shutdown(wait=False, cancel_futures=True)
+        _pools = collections.OrderedDict()
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
+
+
+def merge_tracks(track_segments):
+    """
+    Merge per-speaker segment lists into one time-ordered list
+
+    Args:
+        track_segments: {speaker: [{'start', 'end', 'text'}, ...]}
+
+    Returns:
+        list of dict: {'start', 'end', 'text', 'speaker'} sorted by start;
+        consecutive segments of the same speaker are joined
+    """
+    merged = sorted(
+        (
+            dict(segment, speaker=speaker)
+            for speaker, segments in track_segments.items()
+            for segment in segments
+            if segment['text']
+        ),
+        key=lambda segment: (segment['start'], segment['end']),
+    )
+
+    turns = []
+    for segment in merged:
+        previous = turns[-1] if turns else None
+        if (previous is not None and previous['speaker'] == segment['speaker']
+                and segment['start'] - previous['end'] <= MERGE_GAP_SECONDS):
+            previous['end'] = max(previous['end'], segment['end'])
+            previous['text'] = f"{previous['text']} {segment['text']}"
+        else:
+            turns.append(dict(segment))
+    return turns
+
+
+def _format_timestamp(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def format_transcript(turns):
+    """Labelled transcript for MeetingTextStructurer: one speaker turn per line"""
+    return "\n".join(
+        f"[{_format_timestamp(turn['start'])}] {turn['speaker']}: {turn['text']}"
+        for turn in turns
+    )
+
+
+def transcribe_tracks(tracks, model_size="base", language=None, decoding=None):
+    """
+    Transcribe participant tracks concurrently and merge them
+
+    Args:
+        tracks: list of {'speaker': str, 'audio': bytes/path, 'pcm': dict or None}
+        model_size: Whisper model size
+        language: Language code (None = detect per track)
+        decoding: Optional Whisper decoding settings (see decoding_tiers.py)
+
+    Returns:
+        dict: {
+            'success': bool,
+            'transcription': str (labelled, one speaker turn per line),
+            'segments': list of {'start', 'end', 'text', 'speaker'},
+            'language': str,
+            'speakers': list of str,
+            'error': str (if applicable)
+        }
+    """
+    if not tracks:
+        return {'success': False, 'error': "No audio tracks given"}
+
+    speakers = [track['speaker'] for track in tracks]
+    if len(set(speakers)) != len(speakers):
+        return {'success': False, 'error': "Speaker labels must be unique"}
+
+    device = model_registry.resolve_device()
+    print(f"🎤 Transcribing {len(tracks)} participant tracks with Whisper ({model_size}, {device})...")
+
+    if device == "cuda" or len(tracks) == 1:
+        from cedric_file1 import MeetingTranscriber
+
+        transcriber = MeetingTranscriber(model_size=model_size, device=device)
+        results = [
+            _transcribe_track(transcriber, track['audio'], track.get('pcm'), language, decoding)
+            for track in tracks
+        ]
+    else:
+        token = cancellation.current()
+        cancel_event = _cancel_event() if token is not None else None
+        pool = _acquire_pool(model_size)
+        broken = False
+        try:
+            futures = [
+                pool.executor.submit(
+                    _transcribe_in_worker, track['audio'], track.get('pcm'), language, decoding, cancel_event
+                )
+                for track in tracks
+            ]
+            results = _wait_for(futures, token, cancel_event)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory)
+            broken = True
+            return {'success': False, 'error': "Track transcription worker crashed"}
+        except CancelledError:
+            # Only at interpreter shutdown (shutdown() cancels queued tracks)
+            return {'success': False, 'error': "Track transcription was shut down"}
+        finally:
+            _release_pool(model_size, pool, broken)
+
+    for speaker, result in zip(speakers, results):
+        if not result['success']:
+            return {'success': False, 'error': f"Track '{speaker}': {result['error']}"}
+
+    turns = merge_tracks({
+        speaker: result['segments'] for speaker, result in zip(speakers, results)
+    })
+    languages = [result['language'] for result in results if result.get('language')]
+    print(f"✓ {len(tracks)} tracks transcribed: {len(turns)} speaker turns")
+
+    return {
+        'success': True,
+        'transcription': format_transcript(turns),
+        'segments': turns,
+        'language': language or (max(set(languages), key=languages.count) if languages else 'unknown'),
+        'speakers': speakers,
+    }
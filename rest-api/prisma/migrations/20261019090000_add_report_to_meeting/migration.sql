@@ -0,0 +1,8 @@
+-- AlterTable
+ALTER TABLE "meetings" ADD COLUMN     "reportData" JSONB,
+ADD COLUMN     "reportGeneratedAt" TIMESTAMP(3),
+ADD COLUMN     "reportId" TEXT,
+ADD COLUMN     "reportMeetingType" TEXT,
+ADD COLUMN     "reportPdfUrl" TEXT,
+ADD COLUMN     "reportTitle" TEXT,
+ADD COLUMN     "reportTranscriptId" TEXT;
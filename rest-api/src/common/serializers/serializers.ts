@@ -89,7 +89,21 @@ export function serializeMeeting(m: any) {
     scheduledDate: m.scheduledDate,
     startedAt: m.startedAt,
     duration: m.duration,
+    report: serializeMeetingReport(m),
     createdAt: m.createdAt,
     updatedAt: m.updatedAt,
   };
 }
+
+export function serializeMeetingReport(m: any, withData = false) {
+  if (!m?.reportId) return null;
+  return {
+    id: m.reportId,
+    title: m.reportTitle,
+    meetingType: m.reportMeetingType,
+    pdfUrl: m.reportPdfUrl,
+    transcriptId: m.reportTranscriptId,
+    generatedAt: m.reportGeneratedAt,
+    ...(withData && { data: m.reportData }),
+  };
+}
@@ -0,0 +1,29 @@
+import { IsString, IsNotEmpty, IsOptional, IsObject, IsDateString } from 'class-validator';
+
+export class AttachReportDto {
+    @IsString()
+    @IsNotEmpty()
+    reportId: string;
+
+    @IsString()
+    @IsOptional()
+    title?: string;
+
+    @IsString()
+    @IsOptional()
+    meetingType?: string;
+
+    @IsObject()
+    data: Record<string, any>;
+
+    @IsString()
+    @IsNotEmpty()
+    pdfUrl: string;
+
+    @IsString()
+    @IsOptional()
+    transcriptId?: string;
+
+    @IsDateString()
+    generatedAt: string;
+}
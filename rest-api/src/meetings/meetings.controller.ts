@@ -1,8 +1,9 @@
-import { Controller, Get, Post, Body, Patch, Param, Delete, Query } from '@nestjs/common';
+import { Controller, Get, Post, Put, Body, Patch, Param, Delete, Query } from '@nestjs/common';
 import { MeetingsService } from './meetings.service';
 import { CreateMeetingDto } from './dto/create-meeting.dto';
 import { UpdateMeetingDto } from './dto/update-meeting.dto';
 import { MarkFormFilledDto } from './dto/add-patient-record.dto';
+import { AttachReportDto } from './dto/attach-report.dto';
 
 @Controller('meetings')
 export class MeetingsController {
@@ -70,6 +71,20 @@ export class MeetingsController {
         return this.meetingsService.getPatientRecordsForMeeting(id);
     }
 
+    @Get(':id/report')
+    getReport(@Param('id') id: string) {
+        return this.meetingsService.getReport(id);
+    }
+
+    // Appelé par generation_rapport dès qu'un rapport est généré pour la réunion
+    @Put(':id/report')
+    attachReport(
+        @Param('id') id: string,
+        @Body() attachReportDto: AttachReportDto
+    ) {
+        return this.meetingsService.attachReport(id, attachReportDto);
+    }
+
     @Patch(':id/start')
     startMeeting(@Param('id') id: string) {
         return this.meetingsService.startMeeting(id);
@@ -3,7 +3,8 @@ import { PrismaService } from '../prisma/prisma.service';
 import { CreateMeetingDto } from './dto/create-meeting.dto';
 import { UpdateMeetingDto } from './dto/update-meeting.dto';
 import { MarkFormFilledDto } from './dto/add-patient-record.dto';
-import { serializeMeeting, serializePatientRecord, serializeMeetingParticipant, serializeUser, serializeProfession } from '../common/serializers/serializers';
+import { AttachReportDto } from './dto/attach-report.dto';
+import { serializeMeeting, serializeMeetingReport, serializePatientRecord, serializeMeetingParticipant, serializeUser, serializeProfession } from '../common/serializers/serializers';
 import { v4 as uuidv4 } from 'uuid';
 
 const MEETING_INCLUDE = {
@@ -248,6 +249,38 @@ export class MeetingsService {
         }));
     }
 
+    async getReport(meetingId: string) {
+        const meeting = await this.prisma.meeting.findUnique({ where: { id: meetingId } });
+        if (!meeting) {
+            throw new NotFoundException(`Meeting with ID ${meetingId} not found`);
+        }
+        if (!meeting.reportId) {
+            throw new NotFoundException(`No report for meeting ${meetingId}`);
+        }
+        return serializeMeetingReport(meeting, true);
+    }
+
+    // Idempotent : un nouvel envoi du même rapport (retry) le réécrit à l'identique
+    async attachReport(meetingId: string, attachReportDto: AttachReportDto) {
+        const meeting = await this.prisma.meeting.findUnique({ where: { id: meetingId } });
+        if (!meeting) {
+            throw new NotFoundException(`Meeting with ID ${meetingId} not found`);
+        }
+        const updated = await this.prisma.meeting.update({
+            where: { id: meetingId },
+            data: {
+                reportId: attachReportDto.reportId,
+                reportTitle: attachReportDto.title ?? null,
+                reportMeetingType: attachReportDto.meetingType ?? null,
+                reportData: attachReportDto.data,
+                reportPdfUrl: attachReportDto.pdfUrl,
+                reportTranscriptId: attachReportDto.transcriptId ?? null,
+                reportGeneratedAt: new Date(attachReportDto.generatedAt),
+            },
+        });
+        return serializeMeetingReport(updated);
+    }
+
     async startMeeting(id: string) {
         const meeting = await this.prisma.meeting.findUnique({ where: { id } });
         if (!meeting) {
@@ -9,9 +9,10 @@ type Step = 'idle' | 'recording' | 'recorded' | 'transcribing' | 'generating' |
 interface ReportGeneratorModalProps {
     isOpen: boolean;
     onClose: () => void;
+    meetingId?: string;
 }
 
-const ReportGeneratorModal: React.FC<ReportGeneratorModalProps> = ({ isOpen, onClose }) => {
+const ReportGeneratorModal: React.FC<ReportGeneratorModalProps> = ({ isOpen, onClose, meetingId }) => {
     const [step, setStep] = useState<Step>('idle');
     const [audioBlob, setAudioBlob] = useState<Blob | null>(null);
     const [audioUrl, setAudioUrl] = useState<string | null>(null);
@@ -121,6 +122,8 @@ const ReportGeneratorModal: React.FC<ReportGeneratorModalProps> = ({ isOpen, onC
             const form = new FormData();
             form.append('text', textToSend);
             form.append('meeting_type', meetingType);
+            // Le service de rapport rattache lui-même le rapport à la réunion
+            if (meetingId) form.append('meeting_id', meetingId);
 
             const res = await fetch(`${REPORT_API_URL}/generate/text`, { method: 'POST', body: form });
             if (!res.ok) {
@@ -135,7 +138,7 @@ const ReportGeneratorModal: React.FC<ReportGeneratorModalProps> = ({ isOpen, onC
             setErrorMsg(err.message);
             setStep('error');
         }
-    }, [manualText, transcription, meetingType, mode]);
+    }, [manualText, transcription, meetingType, mode, meetingId]);
 
     const fmtTime = (s: number) =>
         `${String(Math.floor(s / 60)).padStart(2, '0')}:${String(s % 60).padStart(2, '0')}`;
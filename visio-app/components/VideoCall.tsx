@@ -1189,6 +1189,7 @@ const VideoCall: React.FC<VideoCallProps> = ({ onLeave, initialMicOn = true, ini
       <ReportGeneratorModal
         isOpen={showReportModal}
         onClose={() => setShowReportModal(false)}
+        meetingId={meetingId}
       />
     </div>
   );